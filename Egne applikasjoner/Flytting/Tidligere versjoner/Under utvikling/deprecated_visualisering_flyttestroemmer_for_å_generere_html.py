@@ -1,5 +1,7 @@
 import os
 import json
+import base64
+import numpy as np
 import pandas as pd
 
 # ============================================================
@@ -58,6 +60,10 @@ COLOR_TELEMARK = "#005260"      # Telemark fylkeskommune color
 MAP_CENTER = [62.0, 10.0]
 MAP_ZOOM = 5
 
+# Embed the flow data as base64 typed arrays with a shared string table (True), or as JSON records (False).
+# The page decodes the compact format back to the same records, so the rest of the JavaScript is unchanged.
+COMPACT_DATA = True
+
 # ============================================================
 # Step 1: Load data
 # ============================================================
@@ -126,10 +132,115 @@ def df_to_records(df):
     """Convert DataFrame to list of dicts for JSON serialization."""
     return df.to_dict(orient="records")
 
-data_fra_json = json.dumps(df_to_records(df_fra), ensure_ascii=False)
-data_til_json = json.dumps(df_to_records(df_til), ensure_ascii=False)
-data_fra_fylke_json = json.dumps(df_to_records(df_fra_fylke), ensure_ascii=False)
-data_til_fylke_json = json.dumps(df_to_records(df_til_fylke), ensure_ascii=False)
+
+def smallest_int_type(values):
+    """Smallest typed array type (little-endian) that holds all values."""
+    low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+    for name, dtype in [("u8", "<u1"), ("i8", "<i1"), ("u16", "<u2"), ("i16", "<i2"), ("i32", "<i4")]:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return name, dtype
+    return "f64", "<f8"
+
+
+def encode_column(series, strings):
+    """
+    Encode one column as a base64 typed array.
+
+    Text columns are stored as indices into the shared string table (kommune and fylke names are then only
+    written once for the whole page), booleans as 0/1, integers with the smallest integer type, and floats as
+    Float32 when that keeps 5 decimals (coordinates), otherwise Float64.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        kind, (type_name, dtype), values = "bool", ("u8", "<u1"), series.to_numpy().astype("<u1")
+    elif pd.api.types.is_integer_dtype(series):
+        kind, values = "num", series.to_numpy()
+        type_name, dtype = smallest_int_type(values)
+    elif pd.api.types.is_float_dtype(series):
+        kind, values = "num", series.to_numpy(dtype="<f8")
+        as_float32 = values.astype("<f4").astype("<f8")
+        lossless = np.allclose(as_float32, values, rtol=0, atol=1e-5, equal_nan=True)
+        type_name, dtype = ("f32", "<f4") if lossless else ("f64", "<f8")
+    else:
+        kind = "str"
+        index = {text: i for i, text in enumerate(strings)}
+        codes = []
+        for value in series.tolist():
+            value = None if pd.isna(value) else str(value)
+            if value not in index:
+                index[value] = len(strings)
+                strings.append(value)
+            codes.append(index[value])
+        values = np.array(codes)
+        type_name, dtype = smallest_int_type(values)
+
+    data = base64.b64encode(values.astype(dtype).tobytes()).decode("ascii")
+    return {"kind": kind, "type": type_name, "data": data}
+
+
+def encode_columnar(frames):
+    """
+    Encode DataFrames as columnar typed arrays for the page (decoded by decodeColumnar in the HTML).
+
+    Args:
+        frames (dict): Name -> DataFrame.
+
+    Returns:
+        dict: {"strings": [...], "tables": {name: {"n": rows, "columns": {column: {kind, type, data}}}}}
+    """
+    strings = []
+    tables = {}
+    for name, df in frames.items():
+        tables[name] = {
+            "n": len(df),
+            "columns": {column: encode_column(df[column], strings) for column in df.columns},
+        }
+    return {"strings": strings, "tables": tables}
+
+
+# Decodes the compact payload to the same list of records as df_to_records (plain string: no f-string braces)
+DECODER_JS = """
+    function decodeColumnar(packed) {
+        const types = { u8: Uint8Array, i8: Int8Array, u16: Uint16Array, i16: Int16Array,
+                        i32: Int32Array, f32: Float32Array, f64: Float64Array };
+        const tables = {};
+        for (const [name, table] of Object.entries(packed.tables)) {
+            const columns = Object.entries(table.columns).map(([column, spec]) => {
+                const bytes = Uint8Array.from(atob(spec.data), c => c.charCodeAt(0));
+                return [column, spec.kind, new types[spec.type](bytes.buffer)];
+            });
+            const rows = new Array(table.n);
+            for (let i = 0; i < table.n; i++) {
+                const row = {};
+                for (const [column, kind, values] of columns) {
+                    const v = values[i];
+                    row[column] = kind === 'str' ? packed.strings[v] : kind === 'bool' ? v === 1 : v;
+                }
+                rows[i] = row;
+            }
+            tables[name] = rows;
+        }
+        return tables;
+    }
+"""
+
+frames = {"dataFra": df_fra, "dataTil": df_til, "dataFraFylke": df_fra_fylke, "dataTilFylke": df_til_fylke}
+
+if COMPACT_DATA:
+    packed_json = json.dumps(encode_columnar(frames), ensure_ascii=False, separators=(",", ":"))
+    data_script = (
+        DECODER_JS
+        + f"    const {{ {', '.join(frames)} }} = decodeColumnar({packed_json});"
+    )
+else:
+    data_script = "\n".join(
+        f"    const {name} = {json.dumps(df_to_records(df), ensure_ascii=False)};" for name, df in frames.items()
+    )
+
+records_size = sum(len(json.dumps(df_to_records(df), ensure_ascii=False).encode("utf-8")) for df in frames.values())
+print(f"\nEmbedded data: {len(data_script.encode('utf-8')) / 1024:.1f} KB "
+      f"({'compact' if COMPACT_DATA else 'records'}; records would be {records_size / 1024:.1f} KB)")
+
 telemark_list_json = json.dumps(TELEMARK_KOMMUNER, ensure_ascii=False)
 fylke_coords_json = json.dumps(FYLKE_COORDS, ensure_ascii=False)
 palette_json = json.dumps(TELEMARK_PALETTE, ensure_ascii=False)
@@ -565,10 +676,7 @@ full_html = f"""<!DOCTYPE html>
     // ============================================================
     // Data (embedded from Python)
     // ============================================================
-    const dataFra = {data_fra_json};
-    const dataTil = {data_til_json};
-    const dataFraFylke = {data_fra_fylke_json};
-    const dataTilFylke = {data_til_fylke_json};
+{data_script}
     const telemarkKommuner = {telemark_list_json};
     const fylkeCoords = {fylke_coords_json};
     const PALETTE = {palette_json};
@@ -0,0 +1,91 @@
+"""
+Bygger statiske kartfliser for Pilot web-app kart
+=================================================
+
+Writes public/tiles/ with:
+
+    kommuner/    Telemark kommunegrenser (Kart/Kartfiler/Telemark_kommuner_WGS1984.geojson), one simplified file
+                 per zoom level, with only kommunenummer and navn.
+    bedrifter/   The filtered Geodata companies (output of geodata_bedrifter.py) as z/x/y tiles, with only the
+                 fields the popup shows. Zoom 8-9 only include larger companies (MIN_EMPLOYEES).
+
+The map (src/utils/tileApi.js) loads these instead of querying the Geodata API on every map move. Run it after
+geodata_bedrifter.py has updated the data, then build/deploy the app as usual:
+
+    python scripts/build_tiles.py [--companies path/or/url.csv]
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+from urllib.parse import quote
+
+import pandas as pd
+
+APP_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_FOLDER = os.path.dirname(os.path.dirname(APP_FOLDER))
+sys.path.append(os.path.join(REPO_FOLDER, "Python"))
+
+from Helper_scripts.tile_functions import build_polygon_levels, build_point_tiles, write_tileset
+
+OUTPUT_FOLDER = os.path.join(APP_FOLDER, "public", "tiles")
+KOMMUNER_FILE = os.path.join(REPO_FOLDER, "Kart", "Kartfiler", "Telemark_kommuner_WGS1984.geojson")
+COMPANIES_URL = "https://raw.githubusercontent.com/evensrii/Telemark/main/" + quote(
+    "Data/03_Arbeid og næringsliv/02_Næringsliv/Virksomheter/geodata_sql_filtrerte_virksomheter.csv"
+)
+
+KOMMUNE_ZOOMS = range(6, 13)
+COMPANY_ZOOMS = range(8, 12)  # The map uses zoom 11 tiles when zoomed further in
+MIN_EMPLOYEES = {8: 20, 9: 5}
+
+# Column in geodata_sql_filtrerte_virksomheter.csv -> property used by GeodataLayer.js
+COMPANY_PROPERTIES = {
+    "Org. nr.": "orgnr",
+    "Navn": "navn",
+    "Kommunenavn": "kommune",
+    "Nace_5_navn": "naeringsnavn",
+    "Antall ansatte": "antallAnsatte",
+    "Organisasjonsform": "organisasjonsform",
+}
+KOMMUNE_PROPERTIES = {"kommunenummer": "kommunenummer", "navn": "navn"}
+
+
+def read_companies(source):
+    """Reads the company CSV (Lat/Lon are written with decimal commas by geodata_bedrifter.py)."""
+    df = pd.read_csv(source, dtype={"Org. nr.": str})
+    for column in ["Lat", "Lon"]:
+        df[column] = pd.to_numeric(df[column].astype(str).str.replace(",", "."), errors="coerce")
+    df["Antall ansatte"] = pd.to_numeric(df["Antall ansatte"], errors="coerce")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build static map tiles for Pilot web-app kart.")
+    parser.add_argument("--companies", default=COMPANIES_URL, help="Company CSV (path or URL).")
+    parser.add_argument("--output", default=OUTPUT_FOLDER, help="Output folder (default: public/tiles).")
+    args = parser.parse_args()
+
+    # Old tiles are removed, so tiles that no longer have companies are not served
+    shutil.rmtree(args.output, ignore_errors=True)
+
+    with open(KOMMUNER_FILE, "r", encoding="utf-8") as f:
+        kommuner = json.load(f)
+    write_tileset(args.output, "kommuner", polygon_levels=build_polygon_levels(kommuner, KOMMUNE_ZOOMS, KOMMUNE_PROPERTIES))
+
+    companies = read_companies(args.companies)
+    print(f"Read {len(companies):,} companies from {args.companies}")
+    bounds = [
+        [companies["Lat"].min(), companies["Lon"].min()],
+        [companies["Lat"].max(), companies["Lon"].max()],
+    ]
+    tiles = build_point_tiles(
+        companies, COMPANY_ZOOMS, "Lon", "Lat", COMPANY_PROPERTIES,
+        min_value=MIN_EMPLOYEES, value_column="Antall ansatte",
+    )
+    write_tileset(args.output, "bedrifter", point_tiles=tiles, bounds=bounds)
+
+
+if __name__ == "__main__":
+    main()
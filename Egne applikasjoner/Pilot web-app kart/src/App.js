@@ -6,6 +6,7 @@ import LayerControl from './components/LayerControl';
 import Legend from './components/Legend';
 import SearchControl from './components/SearchControl';
 import GeodataLayer from './components/GeodataLayer';
+import KommuneLayer from './components/KommuneLayer';
 import CompanyInfoBox from './components/CompanyInfoBox';
 import { telemarkColors } from './utils/colors';
 
@@ -20,6 +21,7 @@ function MapController({ center, zoom }) {
 function App() {
   const [activeLayers, setActiveLayers] = useState({
     geodataBedrifter: true,
+    kommunegrenser: true,
   });
 
   const [mapCenter, setMapCenter] = useState([59.5, 9.0]);
@@ -39,6 +41,17 @@ function App() {
           { color: telemarkColors.nype, label: 'Bedrift' },
         ]
       }
+    },
+    {
+      id: 'kommunegrenser',
+      name: 'Kommunegrenser',
+      isMarkerLayer: true,
+      legend: {
+        title: 'Kommuner i Telemark',
+        items: [
+          { color: telemarkColors.vann, label: 'Kommunegrense' },
+        ]
+      }
     }
   ];
 
@@ -108,7 +121,8 @@ function App() {
             url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
           />
 
-          
+          <KommuneLayer isActive={activeLayers.kommunegrenser} />
+
           <GeodataLayer 
             isActive={activeLayers.geodataBedrifter}
             filterTelemark={true}
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { Marker, Popup, useMap } from 'react-leaflet';
 import L from 'leaflet';
 import { fetchGeodataCompanies, filterCompaniesByTelemark } from '../utils/geodataApi';
+import { fetchTiledFeatures } from '../utils/tileApi';
 import { telemarkColors } from '../utils/colors';
 
 delete L.Icon.Default.prototype._getIconUrl;
@@ -45,7 +46,9 @@ function GeodataLayer({ isActive, filterTelemark = true, filterMinEmployees = fa
       
       try {
         const bounds = map.getBounds();
-        const data = await fetchGeodataCompanies(bounds, 1000);
+        // Static tiles (scripts/build_tiles.py) if they are built, otherwise the live Geodata API
+        const data = (await fetchTiledFeatures('bedrifter', bounds, map.getZoom()))
+          || await fetchGeodataCompanies(bounds, 1000);
         
         // Apply employee filter if enabled
         let filteredCompanies = data.features;
@@ -0,0 +1,49 @@
+import React, { useEffect, useState } from 'react';
+import { GeoJSON, useMap } from 'react-leaflet';
+import { fetchSimplifiedPolygons } from '../utils/tileApi';
+import { telemarkColors } from '../utils/colors';
+
+// Kommunegrenser from the static tiles, simplified for the current zoom level
+function KommuneLayer({ isActive }) {
+  const [data, setData] = useState(null);
+  const [zoom, setZoom] = useState(null);
+  const map = useMap();
+
+  useEffect(() => {
+    if (!isActive) return;
+
+    const handleZoomEnd = () => setZoom(map.getZoom());
+    handleZoomEnd();
+    map.on('zoomend', handleZoomEnd);
+    return () => {
+      map.off('zoomend', handleZoomEnd);
+    };
+  }, [isActive, map]);
+
+  useEffect(() => {
+    if (!isActive || zoom === null) return;
+
+    let cancelled = false;
+    fetchSimplifiedPolygons('kommuner', zoom)
+      .then((collection) => {
+        if (!cancelled) setData(collection);
+      })
+      .catch((err) => console.error('Failed to load kommunegrenser:', err));
+    return () => {
+      cancelled = true;
+    };
+  }, [isActive, zoom]);
+
+  if (!isActive || !data) return null;
+
+  return (
+    <GeoJSON
+      key={`kommuner-${zoom}`}
+      data={data}
+      style={{ color: telemarkColors.vann, weight: 2, fillOpacity: 0 }}
+      onEachFeature={(feature, layer) => layer.bindTooltip(feature.properties.navn, { sticky: true })}
+    />
+  );
+}
+
+export default KommuneLayer;
@@ -0,0 +1,83 @@
+// Static tiles built by scripts/build_tiles.py (public/tiles)
+
+const TILE_ROOT = `${process.env.PUBLIC_URL || ''}/tiles`;
+
+const manifests = {};
+const tileCache = new Map();
+
+const fetchJson = async (url) => {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+};
+
+// Returns the manifest of a tile set, or null if the tiles have not been built
+export const loadTileManifest = async (name) => {
+  if (!(name in manifests)) {
+    manifests[name] = fetchJson(`${TILE_ROOT}/${name}/manifest.json`).catch((error) => {
+      console.log(`No static tiles for '${name}':`, error.message);
+      return null;
+    });
+  }
+  return manifests[name];
+};
+
+const clampZoom = (zoom, zooms) => Math.min(Math.max(Math.floor(zoom), zooms[0]), zooms[zooms.length - 1]);
+
+const lonLatToTile = (lng, lat, zoom) => {
+  const n = 2 ** zoom;
+  const latRad = (Math.max(Math.min(lat, 85.0511), -85.0511) * Math.PI) / 180;
+  const x = Math.floor(((lng + 180) / 360) * n);
+  const y = Math.floor(((1 - Math.asinh(Math.tan(latRad)) / Math.PI) / 2) * n);
+  return [Math.min(Math.max(x, 0), n - 1), Math.min(Math.max(y, 0), n - 1)];
+};
+
+// Loads the point tiles covering the map bounds and returns the points inside them as a FeatureCollection
+export const fetchTiledFeatures = async (name, bounds, mapZoom) => {
+  const manifest = await loadTileManifest(name);
+  if (!manifest) return null;
+
+  const zoom = clampZoom(mapZoom, manifest.zooms);
+  const { _southWest, _northEast } = bounds;
+  const [xMin, yMin] = lonLatToTile(_southWest.lng, _northEast.lat, zoom);
+  const [xMax, yMax] = lonLatToTile(_northEast.lng, _southWest.lat, zoom);
+
+  // Only tiles listed in the manifest exist (empty tiles are not written)
+  const urls = (manifest.tiles[String(zoom)] || [])
+    .filter(([x, y]) => x >= xMin && x <= xMax && y >= yMin && y <= yMax)
+    .map(([x, y]) => `${TILE_ROOT}/${name}/${zoom}/${x}/${y}.json`);
+
+  const collections = await Promise.all(urls.map((url) => {
+    if (!tileCache.has(url)) {
+      tileCache.set(url, fetchJson(url).catch((error) => {
+        tileCache.delete(url);
+        throw error;
+      }));
+    }
+    return tileCache.get(url);
+  }));
+
+  const features = collections
+    .flatMap((collection) => collection.features)
+    .filter((feature) => {
+      const [lng, lat] = feature.geometry.coordinates;
+      return lat >= _southWest.lat && lat <= _northEast.lat && lng >= _southWest.lng && lng <= _northEast.lng;
+    });
+
+  console.log(`Loaded ${features.length} features from ${urls.length} '${name}' tiles (zoom ${zoom})`);
+  return { type: 'FeatureCollection', features };
+};
+
+// Returns the polygons simplified for the map zoom, or null if the tiles have not been built
+export const fetchSimplifiedPolygons = async (name, mapZoom) => {
+  const manifest = await loadTileManifest(name);
+  if (!manifest) return null;
+
+  const url = `${TILE_ROOT}/${name}/z${clampZoom(mapZoom, manifest.zooms)}.json`;
+  if (!tileCache.has(url)) {
+    tileCache.set(url, fetchJson(url));
+  }
+  return tileCache.get(url);
+};
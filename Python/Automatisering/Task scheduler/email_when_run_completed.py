@@ -5,6 +5,7 @@ import base64
 from datetime import datetime
 import urllib.parse
 import sys
+from Helper_scripts.telemetry_functions import read_telemetry, get_history_file, telemetry_baseline
 
 ### EMAIL CONFIGURATION ###
 
@@ -147,6 +148,12 @@ except Exception as e:
     print(f"Error reading log file: {e}")
     sys.exit(1)
 
+# Read the telemetry of this run (one JSON line per script, written by the master script) and the history
+telemetry_file_path = os.path.join(script_dir, "./logs/00_master_run_weekly_telemetry.jsonl" if is_weekly else "./logs/00_master_run_telemetry.jsonl")
+run_telemetry = {record["task"]: record for record in read_telemetry(telemetry_file_path)}
+telemetry_history = read_telemetry(get_history_file())
+print(f"Read telemetry for {len(run_telemetry)} tasks from: {telemetry_file_path}")
+
 # Push logs to GitHub and get URLs
 log_urls = push_logs_to_github()
 
@@ -177,12 +184,75 @@ def generate_raw_github_url(task_name):
     
     return url
 
-def format_log_as_html_table(log_content):
+def format_seconds(seconds):
+    """Formats seconds as "12,3 s" or "2:05 min"."""
+    if seconds is None:
+        return "N/A"
+    if seconds < 60:
+        return f"{seconds:.1f} s".replace(".", ",")
+    return f"{int(seconds // 60)}:{int(seconds % 60):02d} min"
+
+
+def format_trend(value, baseline):
+    """
+    Trend badge comparing a run to the median of earlier runs: red if clearly slower, green if clearly faster.
+    Small differences (under 25 % or under 5 seconds) are not shown.
+    """
+    if value is None or not baseline:
+        return ""
+    change = (value - baseline) / baseline
+    if abs(change) < 0.25 or abs(value - baseline) < 5:
+        return ""
+    color = "#FF4500" if change > 0 else "#0bb30b"
+    arrow = "▲" if change > 0 else "▼"
+    return f"<br><span style='color: {color}; font-size: 12px;'>{arrow} {change:+.0%} (median {format_seconds(baseline)})</span>"
+
+
+def format_telemetry_cells(record, history):
+    """
+    HTML cells with the telemetry of a task: run time (with trend), CPU, memory, download and phases.
+
+    Args:
+        record (dict or None): The task's telemetry record for this run.
+        history (list): All telemetry records (for the trend).
+
+    Returns:
+        str: Five <td> cells.
+    """
+    if not record:
+        return "<td>N/A</td>" * 5
+
+    baseline = telemetry_baseline(history, record["task"], record["timestamp"])
+    wall = format_seconds(record.get("wall_seconds")) + format_trend(record.get("wall_seconds"), baseline)
+    cpu = format_seconds(record.get("cpu_seconds"))
+    memory = f"{record['peak_rss_mb']:.0f} MB" if record.get("peak_rss_mb") is not None else "N/A"
+
+    http_requests = record.get("http_requests") or {}
+    downloaded = record.get("bytes_downloaded")
+    download = "N/A" if downloaded is None else f"{downloaded / (1024 * 1024):.1f} MB".replace(".", ",")
+    hosts = ", ".join(f"{host}: {count}" for host, count in http_requests.items())
+    download += f"<br><span style='font-size: 12px;' title='{hosts}'>{sum(http_requests.values())} kall</span>"
+
+    phases = record.get("phases") or {}
+    labels = {"fetch": "Henting", "transform": "Bearbeiding", "compare": "Sammenlikning", "upload": "Opplasting"}
+    phase_text = "<br>".join(
+        f"{labels[name]}: {format_seconds(phases[name])}" for name in labels if phases.get(name)
+    ) or "N/A"
+
+    return (
+        f"<td>{wall}</td><td>{cpu}</td><td>{memory}</td><td>{download}</td>"
+        f"<td style='text-align: left; font-size: 12px;'>{phase_text}</td>"
+    )
+
+
+def format_log_as_html_table(log_content, telemetry=None, history=None):
     """
     Formats the log content into an HTML table with separate "Dato" and "Tid" columns.
 
     Args:
         log_content (str): The content of the master log file.
+        telemetry (dict or None): Telemetry records of this run by task name (adds performance columns).
+        history (list or None): Earlier telemetry records, for the trend in the run time column.
 
     Returns:
         str: HTML string for the table.
@@ -301,6 +371,7 @@ def format_log_as_html_table(log_content):
             <td>{status_badge}</td>
             <td>{new_data_badge}</td>
             <td>{last_commit}</td>
+            {format_telemetry_cells((telemetry or {}).get(row["task"]), history or [])}
         </tr>
         """
         html_rows.append(html_row)
@@ -354,6 +425,11 @@ def format_log_as_html_table(log_content):
                 <th>Fullført</th>
                 <th>Nye data?</th>
                 <th>Sist oppdatert</th>
+                <th>Kjøretid</th>
+                <th>CPU</th>
+                <th>Minne</th>
+                <th>Nedlastet</th>
+                <th>Faser</th>
             </tr>
         </thead>
         <tbody>
@@ -365,7 +441,7 @@ def format_log_as_html_table(log_content):
 
 
 # Generate the HTML table
-html_table = format_log_as_html_table(log_content)
+html_table = format_log_as_html_table(log_content, run_telemetry, telemetry_history)
 
 
 ### SEND EMAIL ###
@@ -170,6 +170,7 @@ sys.path.append(pythonpath)
 
 from Helper_scripts.utility_functions import fetch_data
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.transform_functions import standard_fhi_transformations
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -252,105 +253,11 @@ print(f"  Columns: {{', '.join(df.columns.tolist())}}")
 
 # --- Standard FHI transformations (auto-generated) ---
 
-# Handle Skoleår column (e.g. "2022/23-2024/25"): keep as-is, create "År" and "Skoleår_slutt"
-if 'Skoleår' in df.columns:
-    df['År'] = pd.to_datetime(df['Skoleår'].str.split('-').str[-1].str[:4] + '-01-01').dt.strftime('%Y-%m-%d')
-    df['Skoleår_slutt'] = df['Skoleår'].str.split('-').str[-1]
-    # Place År and Skoleår_slutt directly after Skoleår
-    cols = df.columns.tolist()
-    idx = cols.index('Skoleår')
-    cols.remove('År')
-    cols.remove('Skoleår_slutt')
-    cols.insert(idx + 1, 'År')
-    cols.insert(idx + 2, 'Skoleår_slutt')
-    df = df[cols]
-
-# Convert År to datetime (YYYY-01-01) if column contains single years
-# If År contains intervals (e.g. "2013-2016"), rename to "År (intervall)" and create "År" from last year
-if 'År' in df.columns:
-    if df['År'].astype(str).str.match(r'^\\d{{4}}[-/]\\d{{4}}$').all():
-        df = df.rename(columns={{'År': 'År (intervall)'}})
-        df['År'] = pd.to_datetime(df['År (intervall)'].str.split(r'[-/]').str[1] + '-01-01').dt.strftime('%Y-%m-%d')
-        # Place År directly after År (intervall)
-        cols = df.columns.tolist()
-        idx = cols.index('År (intervall)')
-        cols.remove('År')
-        cols.insert(idx + 1, 'År')
-        df = df[cols]
-    elif df['År'].astype(str).str.match(r'^\\d{{4}}$').all():
-        df['År'] = pd.to_datetime(df['År'].astype(str) + '-01-01').dt.strftime('%Y-%m-%d')
-
-# Capitalize first letter in Kjønn if column exists
-if 'Kjønn' in df.columns:
-    df['Kjønn'] = df['Kjønn'].str.capitalize()
-
-# Capitalize first letter in Alder if column exists
-if 'Alder' in df.columns:
-    df['Alder'] = df['Alder'].str.capitalize()
-
-# Determine value column name based on Måltall content
-value_col_name = 'Antall'
-if 'Måltall' in df.columns:
-    maaltall_str = df['Måltall'].astype(str).str.lower().str.cat(sep=' ')
-    if any(term in maaltall_str for term in ['andel', 'prosent', 'percent']):
-        value_col_name = 'Andel'
-
-# Replace ":" with empty string and process value column
-if 'value' in df.columns:
-    df['value'] = df['value'].replace(':', '')
-    df['value'] = pd.to_numeric(df['value'], errors='coerce').round(1)
-    df = df.rename(columns={{'value': value_col_name}})
-
-# Divide by 100 for Andel columns (named "Andel" or "Andel (YYYY)")
-for col in df.columns:
-    if col == 'Andel' or (col.startswith('Andel (') and col.endswith(')')):
-        df[col] = df[col] / 100
-
-# Create SortKjonn column if Kjønn exists and has more than one unique value
-if 'Kjønn' in df.columns and df['Kjønn'].nunique() > 1:
-    kjonn_sort = {{"Kjønn samlet": 1, "Begge kjønn": 1, "Menn": 2, "Mann": 2, "Gutter": 2, "Kvinner": 3, "Kvinne": 3, "Jenter": 3}}
-    df['SortKjonn'] = df['Kjønn'].map(kjonn_sort)
-
-# Create SortAlder column if Alder exists and has more than one unique value
-if 'Alder' in df.columns and df['Alder'].nunique() > 1:
-    unique_alder = df['Alder'].unique().tolist()
-    alder_sort = {{}}
-    sort_num = 1
-    if 'Alle aldre' in unique_alder:
-        alder_sort['Alle aldre'] = sort_num
-        sort_num += 1
-    if '0-74 år' in unique_alder:
-        alder_sort['0-74 år'] = sort_num
-        sort_num += 1
-    remaining = sorted([a for a in unique_alder if a not in alder_sort],
-                       key=lambda x: (int(x.split('-')[0].split(' ')[0]) if x[0].isdigit() else 999))
-    for a in remaining:
-        alder_sort[a] = sort_num
-        sort_num += 1
-    df['SortAlder'] = df['Alder'].map(alder_sort)
-
-# Rename Geografi to Kommune
-if 'Geografi' in df.columns:
-    df = df.rename(columns={{'Geografi': 'Kommune'}})
-
-# Create SortKommune column
-if 'Kommune' in df.columns:
-    unique_kommuner = df['Kommune'].unique().tolist()
-    sort_kommune = {{"Telemark": 1, "Hele landet": 2}}
-    # Alphabetically sorted kommuner (excluding fixed and Bø/Sauherad)
-    regular = sorted([k for k in unique_kommuner if k not in ["Telemark", "Hele landet", "Bø", "Sauherad"]])
-    sort_num = 3
-    for k in regular:
-        sort_kommune[k] = sort_num
-        sort_num += 1
-    # Bø and Sauherad last
-    if "Bø" in unique_kommuner:
-        sort_kommune["Bø"] = sort_num
-        sort_num += 1
-    if "Sauherad" in unique_kommuner:
-        sort_kommune["Sauherad"] = sort_num
-        sort_num += 1
-    df['SortKommune'] = df['Kommune'].map(sort_kommune)
+# Shared implementation in Helper_scripts/transform_functions.py:
+# - Skoleår -> "År" + "Skoleår_slutt", År intervals -> "År (intervall)" + "År" (YYYY-01-01)
+# - Capitalizes Kjønn/Alder, renames value to Andel/Antall based on Måltall (Andel / 100)
+# - Renames Geografi to Kommune and adds SortKjonn, SortAlder and SortKommune
+df = standard_fhi_transformations(df)
 
 # --- End standard transformations ---
 # Add script-specific transformations below:
@@ -3,8 +3,11 @@ import os
 from datetime import datetime
 from Helper_scripts.github_functions import compare_to_github, get_last_commit_time
 from Helper_scripts.utility_functions import delete_files_in_temp_folder
+from Helper_scripts.artifact_functions import start_artifact_run, end_artifact_run
+from Helper_scripts.telemetry_functions import TELEMETRY_FILE_ENV, read_script_telemetry, append_telemetry, new_record
 import re
 import sys
+import time
 
 # Paths and configurations
 base_path = os.getenv("PYTHONPATH")
@@ -15,6 +18,7 @@ LOG_DIR = os.path.join(base_path, "Automatisering", "Task scheduler", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
 MASTER_LOG_FILE = os.path.join(LOG_DIR, "00_master_run_weekly.log")
+TELEMETRY_LOG_FILE = os.path.join(LOG_DIR, "00_master_run_weekly_telemetry.jsonl")
 EMAIL_LOG_FILE = os.path.join(LOG_DIR, "00_email_weekly.log")
 CONDA_ENV = "analyse"
 PYTHON_PATH = os.getenv("PYTHONPATH")
@@ -46,6 +50,9 @@ def run_script(script_path, task_name):
     status = "Completed"
     new_data = "No"
     last_commit = None  # Initialize last_commit at the start
+    # The script writes its telemetry (CPU, memory, HTTP, phases) here when it exits, see telemetry_functions.py
+    script_telemetry_file = os.path.join(LOG_DIR, f"{task_name}.telemetry.json")
+    env = dict(os.environ, **{TELEMETRY_FILE_ENV: script_telemetry_file})
 
     try:
         # First read the script content to extract github_folder and file_name
@@ -83,6 +90,7 @@ def run_script(script_path, task_name):
             # Continue execution even if we can't get the commit time
         
         # Run the script and capture its output
+        started = time.perf_counter()
         result = subprocess.run(
             [
                 "conda",
@@ -95,6 +103,7 @@ def run_script(script_path, task_name):
             capture_output=True,
             text=True,
             check=True,
+            env=env,
         )
 
         # Write script output to its log file
@@ -118,6 +127,12 @@ def run_script(script_path, task_name):
                 log.write("\nErrors:\n")
                 log.write(e.stderr)
 
+    wall_seconds = time.perf_counter() - started
+    script_telemetry = read_script_telemetry(script_telemetry_file)
+    # Use the result of compare_to_github reported by the script; the text match above is the fallback
+    if script_telemetry.get("new_data") is not None:
+        new_data = "Yes" if script_telemetry["new_data"] else "No"
+
     # Log to master log file
     with open(MASTER_LOG_FILE, "a", encoding="utf-8") as log:
         log_entry = f"[{timestamp}] {task_name}: {script_name}: {status}, {new_data}"
@@ -125,6 +140,12 @@ def run_script(script_path, task_name):
             log_entry += f", {last_commit}"
         log.write(log_entry + "\n")
 
+    # Structured telemetry next to the master log (and in the history used for trends in the email)
+    append_telemetry(
+        new_record(task_name, script_name, status, wall_seconds, script_telemetry, new_data == "Yes", last_commit),
+        TELEMETRY_LOG_FILE,
+    )
+
 
 def send_email():
     """Call the email script to format and send the email."""
@@ -150,10 +171,16 @@ def main():
         if file != "readme.txt":
             os.remove(os.path.join(LOG_DIR, file))
 
+    # Shared artifact store: outputs published by one script can be read locally by later scripts in this run
+    # (download_github_file(..., use_artifact_store=True))
+    start_artifact_run(TEMP_FOLDER)
+
     # Run each script
     for script, task_name in SCRIPTS:
         run_script(script, task_name)
 
+    end_artifact_run()
+
     # Send email
     send_email()
 
@@ -0,0 +1,87 @@
+"""
+Benchmark: Arealregnskap across kommuner, workbooks vs. converted dataset
+=========================================================================
+
+Compares a typical cross-kommune aggregation (dekar per kommune and arealformålsgruppe) done
+1. by opening every workbook in Data/Arealregnskap/Arealregnskap_kommunefiler with pandas/openpyxl, and
+2. by reading the partitioned dataset written by Helper_scripts.arealregnskap_functions.
+
+The script first runs convert_arealregnskap (timing the conversion, and a second run where all workbooks
+are unchanged and skipped), checks that both approaches give identical results and then times the
+aggregation both ways.
+
+Usage:
+    python benchmark_arealregnskap.py
+"""
+
+import os
+import sys
+import time
+import pandas as pd
+
+# Make Helper_scripts importable when run directly from this folder
+PYTHON_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PYTHON_FOLDER)
+
+from Helper_scripts.arealregnskap_functions import (
+    SOURCE_FOLDER,
+    WORKBOOK_PATTERN,
+    convert_arealregnskap,
+    parse_workbook,
+    read_arealregnskap,
+)
+
+GROUP_COLUMNS = ["Kommunenummer", "Arealformålsgruppe"]
+VALUE_COLUMN = "Dekar.sum"
+REPEATS = 3
+
+
+def aggregate(df):
+    """The aggregation used in the benchmark: dekar per kommune and arealformålsgruppe."""
+    return df.groupby(GROUP_COLUMNS, as_index=False)[VALUE_COLUMN].sum().sort_values(GROUP_COLUMNS, ignore_index=True)
+
+
+def aggregate_from_workbooks():
+    """Opens every workbook (the old way) and aggregates."""
+    frames = []
+    for file in sorted(os.listdir(SOURCE_FOLDER)):
+        if WORKBOOK_PATTERN.match(file):
+            df = parse_workbook(os.path.join(SOURCE_FOLDER, file))
+            if len(df):
+                frames.append(df[GROUP_COLUMNS + [VALUE_COLUMN]])
+    return aggregate(pd.concat(frames, ignore_index=True))
+
+
+def aggregate_from_dataset():
+    """Reads only the needed columns from the converted dataset and aggregates."""
+    return aggregate(read_arealregnskap(columns=GROUP_COLUMNS + [VALUE_COLUMN]))
+
+
+def best_of(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    convert_arealregnskap(force=True)
+    print(f"Conversion (all workbooks, process pool): {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    convert_arealregnskap()
+    print(f"Re-run (unchanged workbooks skipped):     {time.perf_counter() - start:.2f} s")
+
+    # Opening all workbooks is slow, so it is only timed once
+    from_workbooks, workbook_time = best_of(aggregate_from_workbooks, 1)
+    from_dataset, dataset_time = best_of(aggregate_from_dataset, REPEATS)
+
+    pd.testing.assert_frame_equal(from_workbooks, from_dataset)
+    print("Results are identical.")
+
+    print(f"Aggregation from workbooks: {workbook_time:.2f} s")
+    print(f"Aggregation from dataset:   {dataset_time:.3f} s (best of {REPEATS})")
+    print(f"Speedup: {workbook_time / dataset_time:.0f}x")
@@ -0,0 +1,93 @@
+"""
+Benchmark: SSB 250 m grid and zone lookup
+=========================================
+
+Checks Helper_scripts.grid_functions against geografiske_definisjoner_250m_ruter.csv:
+
+1. ssbid_from_utm gives the ssbid of every cell in the definitions file (from the cell center X/Y)
+2. in_grid gives the same number of cells per zone after add_zones has added new cells (the outer join makes
+   the 0/1 flag columns float, which must not change which cells are in a zone)
+3. The time of in_grid and assign_cells on 1 million points (best of N runs)
+
+The script exits with status 1 if a check fails.
+
+Usage:
+    python benchmark_grid_functions.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Make Helper_scripts importable when run directly from this folder
+PYTHON_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PYTHON_FOLDER)
+
+from Helper_scripts.grid_functions import ssbid_from_utm, read_grid_definitions, in_grid, add_zones, assign_cells
+
+DEFINITIONS_FILE = os.path.join(
+    PYTHON_FOLDER, "..", "Data", "Bystrategi_Grenland", "Areal_og_byutvikling", "geografiske_definisjoner_250m_ruter.csv"
+)
+NUMBER_OF_POINTS = 1_000_000
+REPEATS = 5
+
+
+def best_time(func):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    failures = []
+
+    # 1. Cell ids from coordinates
+    raw = pd.read_csv(DEFINITIONS_FILE, sep=";", dtype={"ssbid": str}, encoding="utf-8-sig")
+    computed = ssbid_from_utm(raw["X"], raw["Y"])
+    mismatches = int((computed != raw["ssbid"].astype("int64").to_numpy()).sum())
+    print(f"ssbid_from_utm: {len(raw) - mismatches} of {len(raw)} cells match the definitions file")
+    if mismatches:
+        failures.append(f"{mismatches} cells get another ssbid from ssbid_from_utm")
+
+    # 2. Zone counts before and after add_zones (one new cell outside the grid)
+    grid_index = read_grid_definitions(DEFINITIONS_FILE)
+    zones = [column for column in grid_index.columns if column != "Kommune"]
+    new_cell = int(grid_index.index.max()) + 250
+    extended = add_zones(grid_index, pd.Series({new_cell: "Ny sone"}, name="Ny_sone", dtype=object).rename_axis("ssbid"))
+
+    print(f"\n{'Zone':<34}{'Before':>10}{'After':>10}")
+    for zone in zones:
+        before = int(in_grid(grid_index.index, grid_index, zone=zone).sum())
+        after = int(in_grid(extended.index, extended, zone=zone).sum())
+        print(f"{zone:<34}{before:>10}{after:>10}")
+        if before != after:
+            failures.append(f"{zone}: {before} cells before add_zones, {after} after")
+    if int(in_grid(extended.index, extended, zone="Ny_sone").sum()) != 1:
+        failures.append("Ny_sone: the added zone does not contain exactly the new cell")
+
+    # 3. Timing
+    rng = np.random.default_rng(0)
+    x_ll, y_ll = grid_index.index // 10_000_000 - 2_000_000, grid_index.index % 10_000_000
+    points = pd.DataFrame({
+        "X": rng.uniform(x_ll.min(), x_ll.max() + 250, NUMBER_OF_POINTS),
+        "Y": rng.uniform(y_ll.min(), y_ll.max() + 250, NUMBER_OF_POINTS),
+    })
+    ids = ssbid_from_utm(points["X"], points["Y"])
+    print(f"\nin_grid, {NUMBER_OF_POINTS:,} ids: {best_time(lambda: in_grid(ids, grid_index)) * 1000:.1f} ms")
+    print(f"assign_cells, {NUMBER_OF_POINTS:,} points: {best_time(lambda: assign_cells(points, 'X', 'Y', grid_index)) * 1000:.1f} ms")
+
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: import time of the Helper_scripts modules
+=====================================================
+
+Imports every Helper_scripts/*_functions.py module in a fresh Python process (so nothing is cached in
+sys.modules) and reports:
+
+1. The import time (best of N runs)
+2. Whether the import loaded pandas, numpy, pyjstat or dotenv
+3. Whether the import printed anything or read token.env (importing a helper should have no side effects)
+
+The processes run without GITHUB_TOKEN and with PYTHONPATH pointing to an empty folder, so any module that
+still loads the token at import fails here. The modules in LIGHT_MODULES must import without pandas; the
+script exits with status 1 if one of them does not, or if any module has import side effects, so it can be
+run as a check after changing the helpers.
+
+Usage:
+    python benchmark_imports.py [--repeats 5] [--only github_functions]
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Make Helper_scripts importable when run directly from this folder
+PYTHON_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HELPER_FOLDER = os.path.join(PYTHON_FOLDER, "Helper_scripts")
+
+REPEATS = 5
+HEAVY_MODULES = ["pandas", "numpy", "pyjstat", "dotenv"]
+
+# Modules that should import without pandas (used by scripts and tools that do not need DataFrames)
+LIGHT_MODULES = [
+    "cache_functions",
+    "coalesce_functions",
+    "artifact_functions",
+    "columnar_functions",
+    "fixture_functions",
+    "telemetry_functions",
+    "github_functions",
+    "utility_functions",
+    "pxweb_functions",
+    "tile_functions",
+]
+
+# Runs in the child process: imports one module and reports time, loaded modules and printed output
+CHILD_CODE = """
+import io, sys, json, time, importlib, contextlib
+name = sys.argv[1]
+output = io.StringIO()
+start = time.perf_counter()
+try:
+    with contextlib.redirect_stdout(output):
+        importlib.import_module("Helper_scripts." + name)
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "seconds": seconds,
+    "error": error,
+    "output": output.getvalue(),
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def list_modules():
+    """Names of the helper modules (Helper_scripts/*_functions.py)."""
+    paths = sorted(glob.glob(os.path.join(HELPER_FOLDER, "*_functions.py")))
+    return [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+
+def import_once(name, env):
+    """Imports a module in a new process and returns the child's report."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE, name],
+        cwd=PYTHON_FOLDER,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"seconds": None, "error": result.stderr.strip().splitlines()[-1], "output": "", "loaded": []}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the Helper_scripts modules.")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Imports per module (best is reported).")
+    parser.add_argument("--only", help="Only modules whose name contains this text.")
+    args = parser.parse_args()
+
+    modules = [name for name in list_modules() if not args.only or args.only in name]
+
+    with tempfile.TemporaryDirectory() as empty_folder:
+        # No token and no token.env: a module loading the token at import fails
+        env = {key: value for key, value in os.environ.items() if key not in ("GITHUB_TOKEN", "HTTP_FIXTURE_MODE")}
+        env["PYTHONPATH"] = empty_folder + os.pathsep + PYTHON_FOLDER
+
+        failures = []
+        print(f"{'Module':<32}{'Import (ms)':>12}  Loaded")
+        for name in modules:
+            reports = [import_once(name, env) for _ in range(args.repeats)]
+            report = reports[0]
+            times = [r["seconds"] for r in reports if r["seconds"] is not None]
+
+            if report["error"]:
+                # Missing optional dependencies (e.g. selenium) are reported, not counted as failures
+                print(f"{name:<32}{'-':>12}  not importable here ({report['error']})")
+                if "token.env" in report["error"] or "GITHUB_TOKEN" in report["error"]:
+                    failures.append(f"{name} needs a token to import")
+                continue
+
+            print(f"{name:<32}{min(times) * 1000:>12.1f}  {', '.join(report['loaded']) or '-'}")
+            if report["output"].strip():
+                failures.append(f"{name} prints on import: {report['output'].strip()[:80]!r}")
+            if "dotenv" in report["loaded"]:
+                failures.append(f"{name} loads dotenv on import")
+            if name in LIGHT_MODULES and "pandas" in report["loaded"]:
+                failures.append(f"{name} imports pandas on import")
+
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll modules import without side effects.")
+
+
+if __name__ == "__main__":
+    main()
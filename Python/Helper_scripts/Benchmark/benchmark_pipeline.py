@@ -0,0 +1,156 @@
+"""
+Benchmark: the master_script.py suite, recorded once and replayed offline
+=========================================================================
+
+Runs the scripts in master_script.py (the SCRIPTS list, in the same order) with the HTTP fixture harness
+in Helper_scripts/fixture_functions.py, and writes a timing baseline with one row per script.
+
+    record   Runs every script against the real services (network and token.env needed) and saves all HTTP
+             exchanges in the fixture store. Scripts that already have fixtures are skipped unless --force.
+             Note that a recording run is a normal run: changed data is uploaded to GitHub.
+    replay   Runs every script without network. Responses come from the fixture store and GitHub is a local
+             copy of the files saved while recording (FakeGitHub), so uploads never leave the machine.
+
+Each script runs in its own process with the current Python interpreter (not "conda run" as in master_script.py),
+and with a fresh Temp folder and artifact store for the run. The baseline (CSV) and the output of every script
+are written to Cache/benchmarks/pipeline_<mode>_<timestamp>/.
+
+Usage:
+    python benchmark_pipeline.py record [--only Folkehelse] [--force]
+    python benchmark_pipeline.py replay [--latency 0.05 | --latency recorded] [--only Befolkning]
+"""
+
+import os
+import re
+import ast
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+# Make Helper_scripts importable when run directly from this folder
+PYTHON_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PYTHON_FOLDER)
+
+from Helper_scripts.cache_functions import get_cache_folder
+from Helper_scripts.fixture_functions import (
+    FIXTURE_MODE_ENV,
+    FIXTURE_SCRIPT_ENV,
+    FIXTURE_LATENCY_ENV,
+    FAKE_GITHUB_FOLDER_ENV,
+    get_fixture_folder,
+    script_key,
+    copy_github_seed,
+)
+
+MASTER_SCRIPT = os.path.join(PYTHON_FOLDER, "Automatisering", "Task scheduler", "master_script.py")
+TIMEOUT = 1800  # seconds per script
+
+
+def read_master_scripts(master_script=MASTER_SCRIPT):
+    """
+    Returns the SCRIPTS list of master_script.py as (script path, task name) tuples, without running the
+    master script (only the SCRIPTS assignment is evaluated).
+    """
+    with open(master_script, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "SCRIPTS" for t in node.targets):
+            namespace = {"os": os, "PYTHON_PATH": PYTHON_FOLDER}
+            return eval(compile(ast.Expression(node.value), master_script, "eval"), namespace)
+    raise ValueError(f"No SCRIPTS list in {master_script}")
+
+
+def run_script(script_path, task_name, env, log_folder):
+    """Runs one script and returns its row in the baseline."""
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            [sys.executable, script_path], env=env, capture_output=True, text=True, timeout=TIMEOUT
+        )
+        status = "Completed" if result.returncode == 0 else "Failed"
+        output = result.stdout + ("\nErrors/Warnings:\n" + result.stderr if result.stderr else "")
+    except subprocess.TimeoutExpired as e:
+        status = "Timeout"
+        output = (e.stdout or "") if isinstance(e.stdout, str) else ""
+    seconds = time.perf_counter() - start
+
+    log_name = re.sub(r'[<>:"/\\|?*]', "_", task_name)
+    with open(os.path.join(log_folder, f"{log_name}.log"), "w", encoding="utf-8") as log:
+        log.write(output)
+
+    return {
+        "Task": task_name,
+        "Script": os.path.relpath(script_path, PYTHON_FOLDER),
+        "Status": status,
+        "Seconds": round(seconds, 3),
+        "Missing fixtures": output.count("No HTTP fixture for"),
+        "New data": "Yes" if "New data detected" in output else "No",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay the master_script.py suite with HTTP fixtures.")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--latency", default="0", help='Replay: seconds added per request, or "recorded".')
+    parser.add_argument("--only", default=None, help="Only run tasks whose name contains this text.")
+    parser.add_argument("--force", action="store_true", help="Record: also re-record scripts that have fixtures.")
+    args = parser.parse_args()
+
+    scripts = read_master_scripts()
+    if args.only:
+        scripts = [(path, task) for path, task in scripts if args.only.lower() in task.lower()]
+
+    run_folder = get_cache_folder("benchmarks", f"pipeline_{args.mode}_{datetime.now():%Y%m%d_%H%M%S}")
+    log_folder = os.path.join(run_folder, "logs")
+    temp_folder = os.path.join(run_folder, "Temp")
+    os.makedirs(log_folder, exist_ok=True)
+    os.makedirs(os.path.join(temp_folder, "artifacts"), exist_ok=True)
+
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": PYTHON_FOLDER,
+        "TEMP_FOLDER": temp_folder,
+        "ARTIFACT_RUN_FOLDER": os.path.join(temp_folder, "artifacts"),
+        FIXTURE_MODE_ENV: args.mode,
+        FIXTURE_LATENCY_ENV: args.latency,
+    })
+    if args.mode == "replay":
+        env[FAKE_GITHUB_FOLDER_ENV] = copy_github_seed(os.path.join(run_folder, "github"))
+
+    fixture_folder = get_fixture_folder()
+    rows = []
+    for script_path, task_name in scripts:
+        key = script_key(script_path)
+        if args.mode == "record" and not args.force and os.path.isdir(os.path.join(fixture_folder, key)):
+            print(f"{task_name}: already recorded, skipping")
+            continue
+
+        row = run_script(script_path, task_name, dict(env, **{FIXTURE_SCRIPT_ENV: key}), log_folder)
+        rows.append(row)
+        print(f"{task_name}: {row['Status']} in {row['Seconds']:.2f} s"
+              + (f" ({row['Missing fixtures']} missing fixtures)" if row["Missing fixtures"] else ""))
+
+    if not rows:
+        print("Nothing was run.")
+        return
+
+    baseline = pd.DataFrame(rows)
+    baseline_path = os.path.join(run_folder, "baseline.csv")
+    baseline.to_csv(baseline_path, index=False, encoding="utf-8")
+
+    print(f"\n{len(baseline)} scripts, {int((baseline['Status'] == 'Completed').sum())} completed, "
+          f"total {baseline['Seconds'].sum():.1f} s")
+    print(baseline.sort_values("Seconds", ascending=False).head(10).to_string(index=False))
+    print(f"\nBaseline written to {baseline_path}")
+
+    # The copy of the GitHub seed is only needed during the run
+    shutil.rmtree(os.path.join(run_folder, "github"), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
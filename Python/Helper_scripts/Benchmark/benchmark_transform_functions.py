@@ -0,0 +1,183 @@
+"""
+Benchmark: standard FHI transformations
+=======================================
+
+Compares the inline transformations from the FHI script template (fhi_script_generator.py) with
+Helper_scripts.transform_functions.standard_fhi_transformations on the largest raw FHI outputs in
+Data/08_Folkehelse og levekår.
+
+For each file the script:
+1. Checks that both implementations give identical output
+2. Times both implementations (best of N runs), also on the data repeated 10x
+
+Usage:
+    python benchmark_transform_functions.py
+"""
+
+import os
+import sys
+import time
+import pandas as pd
+
+# Make Helper_scripts importable when run directly from this folder
+PYTHON_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PYTHON_FOLDER)
+
+from Helper_scripts.transform_functions import standard_fhi_transformations
+
+DATA_FOLDER = os.path.join(PYTHON_FOLDER, "..", "Data", "08_Folkehelse og levekår")
+NUMBER_OF_FILES = 4
+REPEATS = 5
+SCALE_FACTOR = 10
+
+
+def legacy_fhi_transformations(df):
+    """The standard transformations as they were inlined in the generated FHI scripts."""
+    df = df.copy()
+
+    if 'Skoleår' in df.columns:
+        df['År'] = pd.to_datetime(df['Skoleår'].str.split('-').str[-1].str[:4] + '-01-01').dt.strftime('%Y-%m-%d')
+        df['Skoleår_slutt'] = df['Skoleår'].str.split('-').str[-1]
+        cols = df.columns.tolist()
+        idx = cols.index('Skoleår')
+        cols.remove('År')
+        cols.remove('Skoleår_slutt')
+        cols.insert(idx + 1, 'År')
+        cols.insert(idx + 2, 'Skoleår_slutt')
+        df = df[cols]
+
+    if 'År' in df.columns:
+        if df['År'].astype(str).str.match(r'^\d{4}[-/]\d{4}$').all():
+            df = df.rename(columns={'År': 'År (intervall)'})
+            df['År'] = pd.to_datetime(df['År (intervall)'].str.split(r'[-/]').str[1] + '-01-01').dt.strftime('%Y-%m-%d')
+            cols = df.columns.tolist()
+            idx = cols.index('År (intervall)')
+            cols.remove('År')
+            cols.insert(idx + 1, 'År')
+            df = df[cols]
+        elif df['År'].astype(str).str.match(r'^\d{4}$').all():
+            df['År'] = pd.to_datetime(df['År'].astype(str) + '-01-01').dt.strftime('%Y-%m-%d')
+
+    if 'Kjønn' in df.columns:
+        df['Kjønn'] = df['Kjønn'].str.capitalize()
+
+    if 'Alder' in df.columns:
+        df['Alder'] = df['Alder'].str.capitalize()
+
+    value_col_name = 'Antall'
+    if 'Måltall' in df.columns:
+        maaltall_str = df['Måltall'].astype(str).str.lower().str.cat(sep=' ')
+        if any(term in maaltall_str for term in ['andel', 'prosent', 'percent']):
+            value_col_name = 'Andel'
+
+    if 'value' in df.columns:
+        df['value'] = df['value'].replace(':', '')
+        df['value'] = pd.to_numeric(df['value'], errors='coerce').round(1)
+        df = df.rename(columns={'value': value_col_name})
+
+    for col in df.columns:
+        if col == 'Andel' or (col.startswith('Andel (') and col.endswith(')')):
+            df[col] = df[col] / 100
+
+    if 'Kjønn' in df.columns and df['Kjønn'].nunique() > 1:
+        kjonn_sort = {"Kjønn samlet": 1, "Begge kjønn": 1, "Menn": 2, "Mann": 2, "Gutter": 2, "Kvinner": 3, "Kvinne": 3, "Jenter": 3}
+        df['SortKjonn'] = df['Kjønn'].map(kjonn_sort)
+
+    if 'Alder' in df.columns and df['Alder'].nunique() > 1:
+        unique_alder = df['Alder'].unique().tolist()
+        alder_sort = {}
+        sort_num = 1
+        if 'Alle aldre' in unique_alder:
+            alder_sort['Alle aldre'] = sort_num
+            sort_num += 1
+        if '0-74 år' in unique_alder:
+            alder_sort['0-74 år'] = sort_num
+            sort_num += 1
+        remaining = sorted([a for a in unique_alder if a not in alder_sort],
+                           key=lambda x: (int(x.split('-')[0].split(' ')[0]) if x[0].isdigit() else 999))
+        for a in remaining:
+            alder_sort[a] = sort_num
+            sort_num += 1
+        df['SortAlder'] = df['Alder'].map(alder_sort)
+
+    if 'Geografi' in df.columns:
+        df = df.rename(columns={'Geografi': 'Kommune'})
+
+    if 'Kommune' in df.columns:
+        unique_kommuner = df['Kommune'].unique().tolist()
+        sort_kommune = {"Telemark": 1, "Hele landet": 2}
+        regular = sorted([k for k in unique_kommuner if k not in ["Telemark", "Hele landet", "Bø", "Sauherad"]])
+        sort_num = 3
+        for k in regular:
+            sort_kommune[k] = sort_num
+            sort_num += 1
+        if "Bø" in unique_kommuner:
+            sort_kommune["Bø"] = sort_num
+            sort_num += 1
+        if "Sauherad" in unique_kommuner:
+            sort_kommune["Sauherad"] = sort_num
+            sort_num += 1
+        df['SortKommune'] = df['Kommune'].map(sort_kommune)
+
+    return df
+
+
+def find_largest_raw_outputs(data_folder, number_of_files):
+    """Find the largest CSV files that still have the raw FHI layout (Geografi + value column)."""
+    candidates = []
+    for root, dirs, files in os.walk(data_folder):
+        for file in files:
+            if not file.endswith(".csv"):
+                continue
+            path = os.path.join(root, file)
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                header = f.readline().strip().split(",")
+            if "Geografi" in header and ("value" in header or "Verdi" in header):
+                candidates.append((os.path.getsize(path), path))
+    return [path for size, path in sorted(candidates, reverse=True)[:number_of_files]]
+
+
+def best_time(func, df):
+    """Best wall time (seconds) of REPEATS runs."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    files = find_largest_raw_outputs(DATA_FOLDER, NUMBER_OF_FILES)
+    if not files:
+        print(f"No raw FHI outputs found in {DATA_FOLDER}")
+        return
+
+    print(f"{'Fil':<70} {'Rader':>9} {'Gammel (ms)':>12} {'Ny (ms)':>9} {'Faktor':>7}")
+    print("-" * 112)
+
+    for path in files:
+        df = pd.read_csv(path, dtype=str).rename(columns={"Verdi": "value"})
+
+        # Both implementations must give the same result. The old SortAlder logic crashes on
+        # open-ended age groups ("75+ år"), so those files are only timed for the new version.
+        try:
+            legacy_df = legacy_fhi_transformations(df)
+        except ValueError as e:
+            legacy_df = None
+            print(f"{os.path.relpath(path, DATA_FOLDER)[-70:]:<70}  Gammel versjon feiler: {e}")
+        if legacy_df is not None:
+            pd.testing.assert_frame_equal(
+                legacy_df.reset_index(drop=True),
+                standard_fhi_transformations(df).reset_index(drop=True),
+            )
+
+        for label, data in [("", df), (f" (x{SCALE_FACTOR})", pd.concat([df] * SCALE_FACTOR, ignore_index=True))]:
+            legacy = best_time(legacy_fhi_transformations, data) if legacy_df is not None else float("nan")
+            new = best_time(standard_fhi_transformations, data)
+            name = os.path.relpath(path, DATA_FOLDER) + label
+            print(f"{name[-70:]:<70} {len(data):>9} {legacy * 1000:>12.1f} {new * 1000:>9.1f} {legacy / new:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
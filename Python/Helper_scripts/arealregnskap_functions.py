@@ -0,0 +1,210 @@
+# arealregnskap_functions.py
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from Helper_scripts.cache_functions import (
+    get_cache_folder,
+    content_hash,
+    read_cache,
+    write_cache,
+    read_cached_frame,
+    write_cached_frame,
+)
+
+# Arealregnskap per kommune as one partitioned columnar dataset.
+#
+# Data/Arealregnskap/Arealregnskap_kommunefiler/ has one large workbook per kommune (Arealregnskap_3807.xlsx ...).
+# Parsing one of them with openpyxl takes several seconds. convert_arealregnskap() parses all workbooks once,
+# in a process pool, and stores each kommune as a typed parquet file in the local cache:
+#
+#     Cache/arealregnskap_kommuner/kommunenummer=3807/data.parquet
+#     Cache/arealregnskap_kommuner/manifest_v1.pkl   (source file, mtime, size, sha256 and rows per kommune)
+#
+# On later runs only workbooks whose mtime/size and content hash have changed are parsed again.
+# read_arealregnskap() loads the dataset (optionally only some kommuner / columns) for analysis across kommuner.
+
+SOURCE_FOLDER = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data", "Arealregnskap", "Arealregnskap_kommunefiler")
+)
+DATASET_NAME = "arealregnskap_kommuner"
+CONVERSION_VERSION = 1
+
+WORKBOOK_PATTERN = re.compile(r"^Arealregnskap_(\d{4})\.xlsx$")
+
+# Sheet with the data (some workbooks also have pivot sheets in front of it)
+SHEET_NAME = "Arealregnskap"
+
+# Code columns kept as text (leading zeros, mixed codes)
+TEXT_COLUMNS = ["Kommunenummer", "Planid", "Områdenavn"]
+
+
+def get_dataset_folder():
+    """Folder of the partitioned dataset in the local cache."""
+    return get_cache_folder(DATASET_NAME)
+
+
+def _partition_folder(dataset_folder, kommunenummer):
+    return os.path.join(dataset_folder, f"kommunenummer={kommunenummer}")
+
+
+## Funksjon for å lese én arbeidsbok (kjøres i egen prosess)
+
+
+def parse_workbook(path):
+    """
+    Reads one Arealregnskap workbook with consistent column types across kommuner: code columns and other
+    text as str, all numeric columns as float64 (so a column is the same type in every partition) and dates
+    as datetime.
+
+    Args:
+        path (str): Path to the workbook.
+
+    Returns:
+        pd.DataFrame: The sheet SHEET_NAME, or the first sheet if the workbook has no such sheet.
+    """
+    with pd.ExcelFile(path) as workbook:
+        sheet_name = SHEET_NAME if SHEET_NAME in workbook.sheet_names else 0
+        df = pd.read_excel(workbook, sheet_name=sheet_name, dtype={col: str for col in TEXT_COLUMNS})
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]) and col not in TEXT_COLUMNS:
+            df[col] = df[col].astype("float64")
+        else:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype("string")
+    return df
+
+
+def _convert_workbook(path, partition_folder):
+    """Parses one workbook and writes its partition. Returns (rows, seconds)."""
+    start = time.perf_counter()
+    df = parse_workbook(path)
+    os.makedirs(partition_folder, exist_ok=True)
+    write_cached_frame(partition_folder, "data", df)
+    return len(df), time.perf_counter() - start
+
+
+## Funksjon for å konvertere alle arbeidsbøkene (hopper over uendrede filer)
+
+
+def convert_arealregnskap(source_folder=SOURCE_FOLDER, max_workers=None, force=False):
+    """
+    Converts the kommune workbooks to the partitioned dataset, parsing workbooks in a process pool.
+
+    Workbooks are matched by name (Arealregnskap_<kommunenummer>.xlsx); other files in the folder are ignored.
+    A workbook is skipped if its mtime and size, or else its content hash, match the manifest.
+    Partitions for workbooks that no longer exist are removed.
+
+    Args:
+        source_folder (str): Folder with the workbooks.
+        max_workers (int or None): Number of processes (default: number of CPUs).
+        force (bool): Convert all workbooks, even unchanged ones.
+
+    Returns:
+        dict: The manifest, kommunenummer -> {"source", "mtime", "size", "sha256", "rows"}.
+    """
+    dataset_folder = get_dataset_folder()
+    manifest_key = f"manifest_v{CONVERSION_VERSION}"
+    manifest = {} if force else (read_cache(dataset_folder, manifest_key) or {})
+
+    workbooks = {}
+    for file in sorted(os.listdir(source_folder)):
+        match = WORKBOOK_PATTERN.match(file)
+        if match:
+            workbooks[match.group(1)] = os.path.join(source_folder, file)
+        elif file.lower().endswith(".xlsx"):
+            print(f"Skipping {file} (not named Arealregnskap_<kommunenummer>.xlsx)")
+
+    changed = {}
+    for kommunenummer, path in workbooks.items():
+        stat = os.stat(path)
+        entry = manifest.get(kommunenummer)
+        partition_exists = os.path.isdir(_partition_folder(dataset_folder, kommunenummer))
+        if entry and partition_exists and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            continue
+        with open(path, "rb") as f:
+            sha = content_hash(f.read())
+        if entry and partition_exists and entry["sha256"] == sha:
+            entry.update(mtime=stat.st_mtime, size=stat.st_size)
+            continue
+        changed[kommunenummer] = {"source": os.path.basename(path), "mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha}
+
+    print(f"Arealregnskap: {len(changed)} of {len(workbooks)} workbooks changed")
+
+    if changed:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                kommunenummer: executor.submit(
+                    _convert_workbook, workbooks[kommunenummer], _partition_folder(dataset_folder, kommunenummer)
+                )
+                for kommunenummer in changed
+            }
+            for kommunenummer, future in futures.items():
+                try:
+                    rows, seconds = future.result()
+                except Exception as e:
+                    print(f"Could not convert {changed[kommunenummer]['source']}: {e}")
+                    manifest.pop(kommunenummer, None)
+                    continue
+                manifest[kommunenummer] = {**changed[kommunenummer], "rows": rows}
+                print(f"Converted {changed[kommunenummer]['source']}: {rows} rows in {seconds:.1f} s")
+
+    # Remove partitions for workbooks that have been deleted
+    for kommunenummer in set(manifest) - set(workbooks):
+        manifest.pop(kommunenummer)
+        folder = _partition_folder(dataset_folder, kommunenummer)
+        if not os.path.isdir(folder):
+            continue
+        for file in os.listdir(folder):
+            os.remove(os.path.join(folder, file))
+        os.rmdir(folder)
+
+    write_cache(dataset_folder, manifest_key, manifest)
+    return manifest
+
+
+## Funksjon for å lese datasettet
+
+
+def read_arealregnskap(kommunenummer=None, columns=None):
+    """
+    Reads the converted Arealregnskap dataset (run convert_arealregnskap first).
+
+    Args:
+        kommunenummer (list or None): Kommuner to read, e.g. ["3807", "3806"]. Default: all.
+        columns (list or None): Columns to read. Default: all.
+
+    Returns:
+        pd.DataFrame: One row per area, all selected kommuner.
+    """
+    dataset_folder = get_dataset_folder()
+    manifest = read_cache(dataset_folder, f"manifest_v{CONVERSION_VERSION}") or {}
+    if kommunenummer is None:
+        kommunenummer = sorted(manifest)
+
+    frames = []
+    for knr in kommunenummer:
+        if knr not in manifest:
+            print(f"No converted Arealregnskap for kommune {knr}")
+            continue
+        # Empty workbooks (e.g. Arealregnskap_3800.xlsx) have neither rows nor the usual columns
+        if manifest[knr]["rows"] == 0:
+            continue
+
+        partition_folder = _partition_folder(dataset_folder, knr)
+        parquet_path = os.path.join(partition_folder, "data.parquet")
+        if os.path.exists(parquet_path):
+            # Only the requested columns are read from the parquet file
+            frames.append(pd.read_parquet(parquet_path, columns=columns))
+        else:
+            df = read_cached_frame(partition_folder, "data")
+            frames.append(df[columns] if columns else df)
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,131 @@
+# artifact_functions.py
+
+import os
+import re
+import json
+import shutil
+from datetime import datetime
+
+from Helper_scripts.cache_functions import read_cached_frame, write_cached_frame, content_hash
+
+# Run-scoped artifact store.
+#
+# handle_output_data stores every DataFrame it publishes here (typed, i.e. with the original dtypes), and
+# download_github_file(..., use_artifact_store=True) looks here before going to GitHub. Scripts later in the
+# same master_script run can then read what an earlier script just produced from local disk, instead of
+# downloading it again as an all-string CSV. Checks against the published version (the default) always read
+# GitHub.
+#
+# The store lives in the folder given by the ARTIFACT_RUN_FOLDER environment variable, which master_script.py
+# sets for the duration of a run (subprocesses inherit it). Within one process, artifacts are also kept in
+# memory. Without ARTIFACT_RUN_FOLDER (a script run on its own) only the in-memory store is used.
+#
+# The run folder also holds raw downloads shared within the run (get_run_download_path): fetch_data(...,
+# run_cache=True) saves the response there, so a national file used by several scripts is downloaded once per run.
+
+ARTIFACT_RUN_FOLDER_ENV = "ARTIFACT_RUN_FOLDER"
+
+_memory_store = {}
+
+
+def _artifact_key(github_path):
+    """File-system safe key for a GitHub path, e.g. "Data/01_Befolkning/x.csv" -> "Data__01_Befolkning__x.csv"."""
+    return re.sub(r'[<>:"\\|?*]', "_", github_path.strip("/").replace("/", "__"))
+
+
+## Funksjoner for å starte og avslutte en kjøring (brukes av master_script.py)
+
+
+def start_artifact_run(temp_folder):
+    """
+    Creates a new run folder for artifacts and exports it in ARTIFACT_RUN_FOLDER, so all scripts started
+    from this process (subprocesses) share it.
+
+    Args:
+        temp_folder (str): The Temp folder (TEMP_FOLDER). The run folder is created under Temp/artifacts.
+
+    Returns:
+        str: Path to the run folder.
+    """
+    run_folder = os.path.join(temp_folder, "artifacts", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(run_folder, exist_ok=True)
+    os.environ[ARTIFACT_RUN_FOLDER_ENV] = run_folder
+    print(f"Artifact store for this run: {run_folder}")
+    return run_folder
+
+
+def end_artifact_run():
+    """Deletes the run folder and unsets ARTIFACT_RUN_FOLDER."""
+    run_folder = os.environ.pop(ARTIFACT_RUN_FOLDER_ENV, None)
+    _memory_store.clear()
+    if run_folder and os.path.exists(run_folder):
+        shutil.rmtree(run_folder, ignore_errors=True)
+
+
+## Funksjoner for å lagre og hente artefakter
+
+
+def put_artifact(github_path, df):
+    """
+    Stores a DataFrame published to github_path in the run's artifact store.
+
+    Args:
+        github_path (str): Path of the file in the GitHub repository, e.g. "Data/.../file.csv".
+        df (pd.DataFrame): The published DataFrame.
+    """
+    key = _artifact_key(github_path)
+    _memory_store[key] = df.copy()
+
+    run_folder = os.environ.get(ARTIFACT_RUN_FOLDER_ENV)
+    if run_folder and os.path.isdir(run_folder):
+        write_cached_frame(run_folder, key, df)
+
+
+def get_artifact(github_path):
+    """
+    Returns the DataFrame published to github_path earlier in this run, or None.
+
+    Args:
+        github_path (str): Path of the file in the GitHub repository.
+
+    Returns:
+        pd.DataFrame: A copy of the stored DataFrame (original dtypes), or None if it was not produced in this run.
+    """
+    key = _artifact_key(github_path)
+    if key in _memory_store:
+        return _memory_store[key].copy()
+
+    run_folder = os.environ.get(ARTIFACT_RUN_FOLDER_ENV)
+    if not run_folder or not os.path.isdir(run_folder):
+        return None
+
+    df = read_cached_frame(run_folder, key)
+    if df is not None:
+        _memory_store[key] = df
+        return df.copy()
+    return None
+
+
+## Funksjon for nedlastinger som deles mellom skriptene i en kjøring
+
+
+def get_run_download_path(url, payload=None):
+    """
+    Returns the file a download is stored in for this run (the same path for the same URL and payload in every
+    script), or None if there is no run folder (ARTIFACT_RUN_FOLDER not set).
+
+    Args:
+        url (str): The URL.
+        payload (dict or None): The POST payload, if any.
+
+    Returns:
+        str or None: Path of the file (it may not exist yet).
+    """
+    run_folder = os.environ.get(ARTIFACT_RUN_FOLDER_ENV)
+    if not run_folder or not os.path.isdir(run_folder):
+        return None
+
+    folder = os.path.join(run_folder, "downloads")
+    os.makedirs(folder, exist_ok=True)
+    key = content_hash(json.dumps({"url": url, "payload": payload}, sort_keys=True))[:24]
+    return os.path.join(folder, f"{key}.download")
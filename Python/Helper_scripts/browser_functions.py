@@ -0,0 +1,193 @@
+# browser_functions.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Hjelpefunksjoner for scraping med headless Chrome (Selenium).
+#
+# - export_session_state / import_session_state: one browser goes through cookie banners, messages and language
+#   menus once; its cookies and local/session storage are then loaded into the other browsers, so they start
+#   from the same session instead of clicking through the same dialogs.
+# - wait_for_dom_condition: waits for a JavaScript condition that is re-checked by a MutationObserver every time
+#   the page changes (e.g. a table being re-rendered after a filter click), instead of sleeping a fixed time.
+# - map_in_browsers: runs one task per item, each in its own browser, in a small pool of parallel browsers.
+
+## Funksjoner for å starte nettleser og dele sesjon
+
+
+def create_driver(headless=True):
+    """
+    Starts a Chrome WebDriver.
+
+    Args:
+        headless (bool): Run without a window.
+
+    Returns:
+        webdriver.Chrome: The driver.
+    """
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--window-size=1600,1200")
+    return webdriver.Chrome(options=options)
+
+
+def export_session_state(driver):
+    """
+    Exports the session of a browser: current URL, cookies, localStorage and sessionStorage.
+
+    Args:
+        driver (webdriver.Chrome): A driver that has gone through login / cookie consent etc.
+
+    Returns:
+        dict: The session state (can be passed to import_session_state).
+    """
+    return {
+        "url": driver.current_url,
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script("return Object.assign({}, window.localStorage);"),
+        "session_storage": driver.execute_script("return Object.assign({}, window.sessionStorage);"),
+    }
+
+
+def import_session_state(driver, state, url=None):
+    """
+    Loads a session state into a browser and opens the page with it.
+
+    Args:
+        driver (webdriver.Chrome): The driver.
+        state (dict): State from export_session_state.
+        url (str or None): Page to open (default: the URL the state was exported from).
+    """
+    url = url or state["url"]
+    # Cookies and storage can only be set for the origin that is open
+    driver.get(url)
+    for cookie in state["cookies"]:
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException as e:
+            print(f"Could not set cookie {cookie.get('name')}: {e}")
+    driver.execute_script(
+        """
+        const [local, session] = arguments;
+        for (const [key, value] of Object.entries(local)) { window.localStorage.setItem(key, value); }
+        for (const [key, value] of Object.entries(session)) { window.sessionStorage.setItem(key, value); }
+        """,
+        state["local_storage"],
+        state["session_storage"],
+    )
+    driver.get(url)
+
+
+def click_if_present(driver, xpath, timeout=5):
+    """
+    Clicks an element if it becomes clickable within timeout (e.g. an optional cookie banner).
+
+    Returns:
+        bool: True if the element was clicked.
+    """
+    try:
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, xpath))).click()
+        return True
+    except TimeoutException:
+        return False
+
+
+## Funksjon for å vente på endringer i siden (MutationObserver i stedet for sleep)
+
+_WAIT_FOR_CONDITION_JS = """
+const [conditionSource, timeoutMs, done] = arguments;
+const condition = new Function(conditionSource);
+let finished = false;
+let timer = null;
+const observer = new MutationObserver(() => check());
+const finish = (value) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(value);
+};
+const check = () => {
+    try {
+        const value = condition();
+        if (value !== null && value !== undefined && value !== false) finish(value);
+    } catch (e) {}
+};
+observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+timer = setTimeout(() => finish(null), timeoutMs);
+check();
+"""
+
+
+def wait_for_dom_condition(driver, condition_js, timeout=15, description="condition"):
+    """
+    Waits until a JavaScript condition returns a value (not null/undefined/false).
+
+    The condition is checked immediately and then again every time the DOM changes, so the wait ends as soon
+    as the page has been updated.
+
+    Args:
+        driver (webdriver.Chrome): The driver.
+        condition_js (str): Function body that returns the value when the condition is met, e.g.
+            "return document.querySelectorAll('tbody tr').length > 3;".
+        timeout (float): Seconds to wait.
+        description (str): Used in the error message.
+
+    Returns:
+        object: The value returned by the condition.
+
+    Raises:
+        TimeoutException: If the condition is not met within timeout.
+    """
+    driver.set_script_timeout(timeout + 5)
+    value = driver.execute_async_script(_WAIT_FOR_CONDITION_JS, condition_js, int(timeout * 1000))
+    if value is None:
+        raise TimeoutException(f"Timed out after {timeout} s waiting for {description}")
+    return value
+
+
+## Funksjon for å kjøre oppgaver i flere nettlesere samtidig
+
+
+def map_in_browsers(function, items, session_state=None, url=None, max_browsers=3, headless=True):
+    """
+    Runs function(driver, item) for every item, each in its own browser, with up to max_browsers in parallel.
+
+    Args:
+        function (callable): Called as function(driver, item). The browser is closed afterwards.
+        items (list): One task per item.
+        session_state (dict or None): State from export_session_state, loaded into every browser.
+        url (str or None): Page to open in every browser (default: the URL in session_state).
+        max_browsers (int): Maximum number of browsers at the same time.
+        headless (bool): Run without windows.
+
+    Returns:
+        list: One result per item, in the same order: the return value, or the exception if the task failed.
+    """
+    def run(item):
+        driver = None
+        try:
+            driver = create_driver(headless=headless)
+            if session_state:
+                import_session_state(driver, session_state, url=url)
+            elif url:
+                driver.get(url)
+            return function(driver, item)
+        except Exception as e:
+            return e
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    print("Failed to quit driver, it may have already been closed")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_browsers, len(items)))) as executor:
+        return list(executor.map(run, items))
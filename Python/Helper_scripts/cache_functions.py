@@ -0,0 +1,168 @@
+# cache_functions.py
+
+import os
+import pickle
+import hashlib
+import tempfile
+
+## Funksjon for å finne (og opprette) mappen for lokal cache
+
+
+def get_cache_folder(*subfolders):
+    """
+    Returns a local cache folder, creating it if needed.
+
+    The base folder is taken from the CACHE_FOLDER environment variable. If it is not set, the cache
+    is placed in PYTHONPATH/Cache (ignored by git). The cache survives between runs, unlike the Temp folder.
+
+    Args:
+        *subfolders (str): Optional subfolders, e.g. get_cache_folder("sykepleierindeksen").
+
+    Returns:
+        str: Full path to the cache folder.
+    """
+    base = os.environ.get("CACHE_FOLDER")
+    if not base:
+        pythonpath = os.environ.get("PYTHONPATH") or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        base = os.path.join(pythonpath, "Cache")
+
+    folder = os.path.join(base, *subfolders)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+## Funksjon for å beregne en innholdshash (brukes som cache-nøkkel)
+
+
+def content_hash(content):
+    """
+    Returns the SHA-256 hex digest of bytes (or a str, encoded as UTF-8).
+
+    Args:
+        content (bytes or str): Content to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+## Funksjoner for å lese og skrive cache-filer
+
+
+def read_cache(cache_folder, key):
+    """
+    Reads a cached object.
+
+    Args:
+        cache_folder (str): Folder returned by get_cache_folder.
+        key (str): Cache key (used as file name).
+
+    Returns:
+        object: The cached object, or None if it does not exist or cannot be read.
+    """
+    path = os.path.join(cache_folder, f"{key}.pkl")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Could not read cache file {path}: {e}")
+        return None
+
+
+def write_cache(cache_folder, key, obj):
+    """
+    Writes an object to the cache. The file is written to a temporary file first and then moved
+    into place, so parallel runs never see a half-written cache file.
+
+    Args:
+        cache_folder (str): Folder returned by get_cache_folder.
+        key (str): Cache key (used as file name).
+        obj (object): Picklable object to store.
+    """
+    path = os.path.join(cache_folder, f"{key}.pkl")
+    fd, tmp_path = tempfile.mkstemp(dir=cache_folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not write cache file {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+## Funksjoner for å lese og skrive DataFrames som typede kolonnefiler (parquet)
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def read_cached_frame(cache_folder, key):
+    """
+    Reads a cached DataFrame written by write_cached_frame.
+
+    Looks for {key}.parquet first and falls back to {key}.pkl (used when pyarrow is missing or
+    the frame could not be stored as parquet).
+
+    Args:
+        cache_folder (str): Folder returned by get_cache_folder.
+        key (str): Cache key (used as file name).
+
+    Returns:
+        pd.DataFrame: The cached DataFrame, or None if it does not exist or cannot be read.
+    """
+    path = os.path.join(cache_folder, f"{key}.parquet")
+    if os.path.exists(path) and _parquet_available():
+        import pandas as pd
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Could not read cache file {path}: {e}")
+            return None
+    return read_cache(cache_folder, key)
+
+
+def write_cached_frame(cache_folder, key, df):
+    """
+    Writes a DataFrame to the cache as a typed columnar (parquet) file, so column types survive
+    the round trip. Falls back to pickle if pyarrow is not installed or the frame has columns
+    parquet cannot store (e.g. object columns with mixed types).
+
+    A key is only ever stored in one format: the file in the other format is removed, so a key rewritten with a
+    frame parquet cannot store never returns the earlier parquet data (read_cached_frame reads parquet first).
+
+    Args:
+        cache_folder (str): Folder returned by get_cache_folder.
+        key (str): Cache key (used as file name).
+        df (pd.DataFrame): DataFrame to store.
+    """
+    parquet_path = os.path.join(cache_folder, f"{key}.parquet")
+    pickle_path = os.path.join(cache_folder, f"{key}.pkl")
+    if _parquet_available():
+        fd, tmp_path = tempfile.mkstemp(dir=cache_folder, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, parquet_path)
+            if os.path.exists(pickle_path):
+                os.remove(pickle_path)
+            return
+        except Exception as e:
+            print(f"Could not write {parquet_path} as parquet ({e}), using pickle instead")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # Removed before the pickle is written: if writing fails, the key is missing rather than stale
+    if os.path.exists(parquet_path):
+        os.remove(parquet_path)
+    write_cache(cache_folder, key, df)
@@ -0,0 +1,344 @@
+# catalog_functions.py
+
+import os
+import re
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from Helper_scripts.cache_functions import get_cache_folder, content_hash, read_cached_frame, write_cached_frame
+
+# Katalog og SQL-motor for datasettene i Data/.
+#
+# build_catalog() indexes every CSV file and every Excel sheet under Data/ (schema, dtypes, row count, key
+# columns and time coverage) and loads each one as a table in an embedded SQLite database in the local cache.
+# Excel sheets are also stored as typed columnar (parquet) tables, so a workbook is only parsed again when it
+# changes. Files are only re-ingested when their mtime/size and content hash change.
+#
+# Tables are named after the file's path relative to Data/ (Excel sheets: "path.xlsx#Sheet"), so queries
+# can refer to them directly:
+#
+#     from Helper_scripts.catalog_functions import query
+#     query('SELECT MAX("År") FROM "01_Befolkning/Befolkningsframskrivinger/befolkningsframskrivinger_historiske.csv"')
+#
+# Only the query result is loaded into pandas.
+
+DATA_FOLDER = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Data"))
+CATALOG_VERSION = 1
+
+DATASET_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# Column names (lower case) treated as keys / time columns
+KEY_COLUMN_NAMES = [
+    "kommune", "kommunenummer", "kommunenr", "knr", "fylke", "fylkesnummer", "region", "geografi",
+    "label", "kjønn", "alder", "nace", "næring", "sektor", "org.nr.", "anleggid",
+]
+TIME_COLUMN_NAMES = ["år", "aar", "year", "tid", "dato", "date", "periode", "skoleår", "måned", "uke"]
+
+_YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+
+def get_catalog_path():
+    """Path to the SQLite database with the catalog and the tables."""
+    return os.path.join(get_cache_folder("data_catalog"), f"catalog_v{CATALOG_VERSION}.sqlite")
+
+
+def connect():
+    """
+    Opens the catalog database.
+
+    Returns:
+        sqlite3.Connection: Connection to the catalog database.
+    """
+    con = sqlite3.connect(get_catalog_path())
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS _catalog (
+            table_name TEXT PRIMARY KEY,
+            source_path TEXT,
+            sheet TEXT,
+            mtime REAL,
+            size INTEGER,
+            sha256 TEXT,
+            rows INTEGER,
+            columns TEXT,
+            key_columns TEXT,
+            time_column TEXT,
+            first_year INTEGER,
+            last_year INTEGER,
+            error TEXT,
+            indexed_at TEXT
+        )
+        """
+    )
+    return con
+
+
+## Hjelpefunksjoner for innlesing og beskrivelse av datasett
+
+
+def _quote(identifier):
+    """Quotes an SQL identifier (table or column name)."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _read_csv(path):
+    """Reads a CSV file, guessing delimiter (, ; or tab) and encoding (UTF-8 or latin-1)."""
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                header = f.readline()
+            delimiter = max([",", ";", "\t"], key=header.count)
+            return pd.read_csv(path, sep=delimiter, encoding=encoding, low_memory=False)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {path}")
+
+
+def _read_excel_sheets(path, sha):
+    """Reads all sheets of a workbook, using the columnar cache keyed by content hash."""
+    cache_folder = get_cache_folder("data_catalog", "sheets")
+    sheet_names = read_cached_frame(cache_folder, f"{sha}_sheets")
+    if sheet_names is not None:
+        sheets = {}
+        for i, name in enumerate(sheet_names["sheet"]):
+            df = read_cached_frame(cache_folder, f"{sha}_{i}")
+            if df is None:
+                break
+            sheets[name] = df
+        else:
+            return sheets
+
+    sheets = pd.read_excel(path, sheet_name=None)
+    for i, (name, df) in enumerate(sheets.items()):
+        sheets[name] = df = _clean_frame(df)
+        write_cached_frame(cache_folder, f"{sha}_{i}", df)
+    write_cached_frame(cache_folder, f"{sha}_sheets", pd.DataFrame({"sheet": list(sheets)}))
+    return sheets
+
+
+def _clean_frame(df):
+    """String column names, and object columns with mixed types stored as text (for parquet and SQLite)."""
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        if not values.map(lambda v: isinstance(v, str)).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def describe_frame(df):
+    """
+    Describes a dataset: columns with dtypes, key columns and time coverage.
+
+    Args:
+        df (pd.DataFrame): The dataset.
+
+    Returns:
+        dict: columns (name -> dtype), key_columns, time_column, first_year, last_year.
+    """
+    key_columns = [col for col in df.columns if col.strip().lower() in KEY_COLUMN_NAMES]
+
+    time_column, first_year, last_year = None, None, None
+    for col in df.columns:
+        if col.strip().lower() not in TIME_COLUMN_NAMES:
+            continue
+        values = df[col].dropna()
+        if pd.api.types.is_datetime64_any_dtype(values):
+            years = values.dt.year
+        else:
+            years = values.drop_duplicates().astype(str).str.findall(_YEAR_PATTERN).explode().dropna().astype(int)
+        if not years.empty:
+            time_column, first_year, last_year = col, int(years.min()), int(years.max())
+            break
+
+    if time_column and time_column not in key_columns:
+        key_columns.append(time_column)
+
+    return {
+        "columns": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "key_columns": key_columns,
+        "time_column": time_column,
+        "first_year": first_year,
+        "last_year": last_year,
+    }
+
+
+## Funksjon for å bygge (oppdatere) katalogen
+
+
+def build_catalog(data_folder=DATA_FOLDER, verbose=True):
+    """
+    Indexes all CSV files and Excel sheets under data_folder and loads them into the catalog database.
+
+    Unchanged files (same mtime and size, or same content hash) are skipped. Tables for deleted files
+    are dropped.
+
+    Args:
+        data_folder (str): The Data folder.
+        verbose (bool): Print progress.
+
+    Returns:
+        pd.DataFrame: The catalog (see get_catalog).
+    """
+    con = connect()
+    known = {
+        row[0]: row[1:]
+        for row in con.execute("SELECT source_path, mtime, size, sha256 FROM _catalog GROUP BY source_path")
+    }
+
+    seen = set()
+    counts = {"unchanged": 0, "indexed": 0, "failed": 0}
+    for root, dirs, files in os.walk(data_folder):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.lower().endswith(DATASET_EXTENSIONS) or file.startswith("~$"):
+                continue
+            path = os.path.join(root, file)
+            source = os.path.relpath(path, data_folder).replace(os.sep, "/")
+            seen.add(source)
+
+            stat = os.stat(path)
+            previous = known.get(source)
+            if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                counts["unchanged"] += 1
+                continue
+
+            with open(path, "rb") as f:
+                sha = content_hash(f.read())
+            if previous and previous[2] == sha:
+                con.execute("UPDATE _catalog SET mtime = ?, size = ? WHERE source_path = ?", (stat.st_mtime, stat.st_size, source))
+                counts["unchanged"] += 1
+                continue
+
+            status = _index_file(con, path, source, stat, sha)
+            counts[status] += 1
+            if verbose:
+                print(f"{'Indexed' if status == 'indexed' else 'FAILED '}: {source}")
+            con.commit()
+
+    # Drop tables for files that no longer exist
+    for source in set(known) - seen:
+        for (table_name,) in con.execute("SELECT table_name FROM _catalog WHERE source_path = ?", (source,)).fetchall():
+            con.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+        con.execute("DELETE FROM _catalog WHERE source_path = ?", (source,))
+    con.commit()
+    con.close()
+
+    if verbose:
+        print(f"Catalog: {counts['indexed']} files indexed, {counts['unchanged']} unchanged, {counts['failed']} failed, "
+              f"{len(set(known) - seen)} removed")
+    return get_catalog()
+
+
+def _index_file(con, path, source, stat, sha):
+    """(Re)loads one file into the catalog database. Returns "indexed" or "failed"."""
+    for (table_name,) in con.execute("SELECT table_name FROM _catalog WHERE source_path = ?", (source,)).fetchall():
+        con.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+    con.execute("DELETE FROM _catalog WHERE source_path = ?", (source,))
+
+    indexed_at = datetime.now().isoformat(timespec="seconds")
+    try:
+        if source.lower().endswith(".csv"):
+            tables = {None: _clean_frame(_read_csv(path))}
+        else:
+            tables = _read_excel_sheets(path, sha)
+    except Exception as e:
+        con.execute(
+            "INSERT INTO _catalog (table_name, source_path, mtime, size, sha256, error, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, source, stat.st_mtime, stat.st_size, sha, str(e), indexed_at),
+        )
+        return "failed"
+
+    failed = False
+    for sheet, df in tables.items():
+        table_name = source if sheet is None else f"{source}#{sheet}"
+        if len(df.columns) == 0:
+            # Empty sheets (no columns) cannot be stored as SQL tables
+            continue
+        try:
+            df.to_sql(table_name, con, if_exists="replace", index=False, chunksize=10000)
+            info = describe_frame(df)
+        except Exception as e:
+            # One bad sheet does not stop the rest of the file (or the build)
+            con.execute(f"DROP TABLE IF EXISTS {_quote(table_name)}")
+            con.execute(
+                "INSERT OR REPLACE INTO _catalog (table_name, source_path, sheet, mtime, size, sha256, error, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (table_name, source, sheet, stat.st_mtime, stat.st_size, sha, str(e), indexed_at),
+            )
+            failed = True
+            continue
+        con.execute(
+            "INSERT OR REPLACE INTO _catalog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                table_name, source, sheet, stat.st_mtime, stat.st_size, sha, len(df),
+                json.dumps(info["columns"], ensure_ascii=False), json.dumps(info["key_columns"], ensure_ascii=False),
+                info["time_column"], info["first_year"], info["last_year"], None, indexed_at,
+            ),
+        )
+    return "failed" if failed else "indexed"
+
+
+## Funksjoner for å bruke katalogen
+
+
+def get_catalog():
+    """
+    Returns the catalog: one row per table (CSV file or Excel sheet).
+
+    Returns:
+        pd.DataFrame: table_name, source_path, sheet, rows, columns, key_columns, time_column,
+        first_year, last_year, error, ...
+    """
+    con = connect()
+    try:
+        return pd.read_sql_query("SELECT * FROM _catalog ORDER BY table_name", con)
+    finally:
+        con.close()
+
+
+def find_datasets(text=None, column=None):
+    """
+    Searches the catalog by path/sheet and/or column name (case-insensitive substrings).
+
+    Args:
+        text (str or None): Substring of the table name, e.g. "Befolkningsframskrivinger".
+        column (str or None): Substring of a column name, e.g. "Kommunenummer".
+
+    Returns:
+        pd.DataFrame: Matching catalog rows.
+    """
+    catalog = get_catalog()
+    mask = pd.Series(True, index=catalog.index)
+    if text:
+        mask &= catalog["table_name"].str.contains(text, case=False, regex=False)
+    if column:
+        mask &= catalog["columns"].fillna("").str.contains(column, case=False, regex=False)
+    return catalog[mask]
+
+
+def query(sql, params=None):
+    """
+    Runs an SQL query against the catalog database (SQLite) and returns the result.
+
+    Args:
+        sql (str): The query. Table names are paths relative to Data/, quoted, e.g. "01_Befolkning/x.csv".
+        params (tuple or dict or None): Query parameters.
+
+    Returns:
+        pd.DataFrame: The result.
+    """
+    con = connect()
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    catalog = build_catalog()
+    print(catalog[["table_name", "rows", "time_column", "first_year", "last_year"]].to_string(index=False))
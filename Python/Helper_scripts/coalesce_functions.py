@@ -0,0 +1,403 @@
+# coalesce_functions.py
+
+import os
+import re
+import json
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, parse_qsl
+
+from Helper_scripts.artifact_functions import ARTIFACT_RUN_FOLDER_ENV
+from Helper_scripts.pxweb_functions import fetch_jsonstat_parts
+from Helper_scripts.cache_functions import get_cache_folder, content_hash, read_cached_frame, write_cached_frame
+
+# Samordning av like SSB-spørringer i en master_script-kjøring.
+#
+# fetch_data sends every SSB JSON-stat request (API v0 POST payloads and PxWeb v2 GET URLs) through
+# fetch_ssb_coalesced. The request is first rewritten to a canonical form (table, language, and per dimension the
+# filter/codelist and the selected codes), so two requests that ask for the same data are recognised even if the
+# payload is formatted differently or the URL parameters come in another order.
+#
+# - Every decoded response is kept in the run folder (ARTIFACT_RUN_FOLDER, see artifact_functions.py). A later
+#   request in the run (in the same script or another) whose selection is covered by a stored response, e.g. the
+#   same query, or a subset of the codes in one dimension, is served as a slice of the stored frame without a
+#   request to SSB.
+# - Requests for the same table that only differ in the codes of one dimension (e.g. ContentsCode "Personer" and
+#   "PersonerProsent" of 09429, with everything else equal) are recorded in a plan (Cache/ssb_coalescer). In the
+#   next runs the first of them fetches the union of the codes (a superset query) once, and the others are
+#   sliced from it. Members not requested for PLAN_MAX_AGE_DAYS are dropped from the plan.
+#
+# The requests are sent with pxweb_functions.fetch_jsonstat_parts, so they share the rate limiter with the other
+# SSB requests, and queries (superset queries in particular) over SSB's cell limit are split.
+#
+# Only selections with explicit codes are merged or sliced; "top", "all", wildcards and from(...) must match
+# exactly. If a superset query fails (e.g. it is too large, or it is not in the HTTP fixtures) the original request
+# is sent instead. Outside a master_script run, only identical requests within the script are shared.
+
+SSB_HOST = "data.ssb.no"
+PLAN_FILE = "plan.json"
+PLAN_MAX_AGE_DAYS = 14
+MAX_MERGED_VALUES = 500
+JSONSTAT_FORMAT = "json-stat2"
+
+# Decoded responses of this process, keyed by the canonical key of the request that was sent
+_memory_store = {}
+
+## Kanonisk form av en spørring
+
+
+def _v0_spec(url, payload):
+    match = re.search(r"/api/v0/(\w+)/table/(\w+)/?$", urlsplit(url).path)
+    if not match or not isinstance(payload, dict) or "query" not in payload:
+        return None
+    response = payload.get("response", {})
+    if str(response.get("format", "")).lower() != JSONSTAT_FORMAT:
+        return None
+
+    dims = {}
+    for item in payload["query"]:
+        selection = item["selection"]
+        dims[item["code"]] = {"filter": selection["filter"], "values": [str(v) for v in selection.get("values", [])]}
+    options = {key: value for key, value in payload.items() if key != "query"}
+    return {"api": "v0", "lang": match.group(1), "table": match.group(2), "options": options, "dims": dims}
+
+
+def _v2_spec(url):
+    parts = urlsplit(url)
+    match = re.search(r"/api/pxwebapi/v2/tables/(\w+)/data/?$", parts.path)
+    if not match:
+        return None
+
+    lang = "no"
+    dims = {}
+    options = {}
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        param = re.fullmatch(r"(valuecodes|codelist|outputValues)\[(.+)\]", key)
+        if key == "lang":
+            lang = value
+        elif param:
+            kind, code = param.groups()
+            dim = dims.setdefault(code, {"filter": "", "values": []})
+            if kind == "valuecodes":
+                dim["values"] = value.split(",")
+            else:
+                dim["filter"] = (dim["filter"] + f" {kind}={value}").strip()
+        else:
+            options[key] = value
+    for dim in dims.values():
+        dim["filter"] = " ".join(sorted(dim["filter"].split()))
+    if options.get("outputFormat", "").lower() != JSONSTAT_FORMAT:
+        return None
+    return {"api": "v2", "lang": lang, "table": match.group(1), "options": options, "dims": dims}
+
+
+def canonical_query(url, payload=None):
+    """
+    Returns the canonical form of an SSB JSON-stat request, or None if the request is not one.
+
+    Args:
+        url (str): API v0 table URL (POST) or PxWeb v2 data URL (GET).
+        payload (dict or None): The v0 POST payload.
+
+    Returns:
+        dict: {"api", "lang", "table", "options", "dims": {code: {"filter", "values"}}}.
+    """
+    if urlsplit(url).hostname != SSB_HOST:
+        return None
+    if payload is not None:
+        return _v0_spec(url, payload)
+    return _v2_spec(url)
+
+
+def _is_explicit(spec, dim):
+    """True if the selection of a dimension is a list of codes (not top/all/wildcards/from(...))."""
+    selection = spec["dims"][dim]
+    if not selection["values"]:
+        return False
+    if spec["api"] == "v0":
+        return selection["filter"] not in ("all", "top") and "*" not in selection["values"]
+    return all(re.fullmatch(r"[^*?()\[\]]+", value) for value in selection["values"])
+
+
+def _key(spec, without=None):
+    """Canonical key of a request (code order does not matter); without leaves out the codes of one dimension."""
+    dims = {
+        code: {"filter": dim["filter"], "values": None if code == without else sorted(dim["values"])}
+        for code, dim in spec["dims"].items()
+    }
+    canonical = {key: spec[key] for key in ("api", "lang", "table", "options")}
+    canonical["dims"] = dims
+    canonical["without"] = without
+    return content_hash(json.dumps(canonical, sort_keys=True, ensure_ascii=False))[:24]
+
+
+def build_request(spec):
+    """Returns (url, payload) for a canonical request (used for superset queries)."""
+    if spec["api"] == "v0":
+        payload = {
+            "query": [
+                {"code": code, "selection": {"filter": dim["filter"], "values": dim["values"]}}
+                for code, dim in spec["dims"].items()
+            ],
+            **spec["options"],
+        }
+        return f"https://{SSB_HOST}/api/v0/{spec['lang']}/table/{spec['table']}/", payload
+
+    params = [f"lang={spec['lang']}"]
+    for code, dim in spec["dims"].items():
+        if dim["values"]:
+            params.append(f"valuecodes[{code}]={','.join(dim['values'])}")
+        params += [f"{part.split('=', 1)[0]}[{code}]={part.split('=', 1)[1]}" for part in dim["filter"].split()]
+    params += [f"{key}={value}" for key, value in spec["options"].items()]
+    return f"https://{SSB_HOST}/api/pxwebapi/v2/tables/{spec['table']}/data?" + "&".join(params), None
+
+
+## Lager for svar i kjøringen
+
+
+def _run_folder():
+    run_folder = os.environ.get(ARTIFACT_RUN_FOLDER_ENV)
+    if not run_folder or not os.path.isdir(run_folder):
+        return None
+    folder = os.path.join(run_folder, "ssb")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _read_index(folder):
+    path = os.path.join(folder, "index.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _store(spec, df, dims):
+    """Keeps a decoded response (with the code -> label mapping of its dimensions) for the rest of the run."""
+    key = _key(spec)
+    entry = {"spec": spec, "dims": dims}
+    _memory_store[key] = (entry, df)
+
+    folder = _run_folder()
+    if folder:
+        write_cached_frame(folder, key, df)
+        index = _read_index(folder)
+        index[key] = entry
+        with open(os.path.join(folder, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+
+
+def _stored_entries(table):
+    """Yields (key, entry) for the stored responses of a table (this process first, then the run folder)."""
+    for key, (entry, _) in _memory_store.items():
+        if entry["spec"]["table"] == table:
+            yield key, entry
+    folder = _run_folder()
+    if folder:
+        for key, entry in _read_index(folder).items():
+            if key not in _memory_store and entry["spec"]["table"] == table:
+                yield key, entry
+
+
+def _load_frame(key):
+    if key in _memory_store:
+        return _memory_store[key][1]
+    folder = _run_folder()
+    return read_cached_frame(folder, key) if folder else None
+
+
+def _sliced_dims(stored, spec):
+    """
+    The dimensions a request must be sliced on to be served from a stored response, or None if the stored
+    response does not cover the request.
+    """
+    if any(stored[key] != spec[key] for key in ("api", "lang", "table", "options")):
+        return None
+    if set(stored["dims"]) != set(spec["dims"]):
+        return None
+
+    sliced = []
+    for code, dim in spec["dims"].items():
+        stored_dim = stored["dims"][code]
+        if stored_dim["filter"] != dim["filter"]:
+            return None
+        if sorted(stored_dim["values"]) == sorted(dim["values"]):
+            continue
+        if not (_is_explicit(spec, code) and _is_explicit(stored, code)):
+            return None
+        if not set(dim["values"]) <= set(stored_dim["values"]):
+            return None
+        sliced.append(code)
+    return sliced
+
+
+def _slice(df, entry, spec, sliced):
+    """Rows of a stored response for the codes of the request, or None if the labels are ambiguous."""
+    mask = None
+    for code in sliced:
+        column = entry["dims"][code]["column"]
+        labels = entry["dims"][code]["labels"]
+        wanted = set(spec["dims"][code]["values"])
+        if not wanted <= set(labels):
+            return None
+        wanted_labels = {labels[c] for c in wanted}
+        # Two codes with the same label cannot be told apart in the frame
+        if any(label in wanted_labels for c, label in labels.items() if c not in wanted):
+            return None
+        dim_mask = df[column].isin(wanted_labels)
+        mask = dim_mask if mask is None else mask & dim_mask
+    result = df if mask is None else df[mask]
+    return result.reset_index(drop=True)
+
+
+def _from_store(spec):
+    for key, entry in _stored_entries(spec["table"]):
+        sliced = _sliced_dims(entry["spec"], spec)
+        if sliced is None:
+            continue
+        df = _load_frame(key)
+        if df is None:
+            continue
+        result = _slice(df, entry, spec, sliced)
+        if result is not None:
+            return result.copy()
+    return None
+
+
+## Plan for sammenslåtte spørringer (lært fra tidligere kjøringer)
+
+
+def _read_plan():
+    path = os.path.join(get_cache_folder("ssb_coalescer"), PLAN_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_plan(plan):
+    path = os.path.join(get_cache_folder("ssb_coalescer"), PLAN_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def record_and_plan(spec):
+    """
+    Records a request in the plan and returns the superset request to send instead and the dimension it merges,
+    or (None, None).
+
+    A request belongs to one group per explicit dimension: the requests for the same table with everything else
+    equal. The superset of the group with most members is returned, if the group has other members than this
+    request (requested within PLAN_MAX_AGE_DAYS) and the union is at most MAX_MERGED_VALUES codes.
+    """
+    plan = _read_plan()
+    now = datetime.now()
+    cutoff = (now - timedelta(days=PLAN_MAX_AGE_DAYS)).isoformat()
+
+    best = None
+    for code in spec["dims"]:
+        if not _is_explicit(spec, code):
+            continue
+        group = plan.setdefault(_key(spec, without=code), {"table": spec["table"], "dim": code, "members": {}})
+        members = {m: seen for m, seen in group["members"].items() if seen >= cutoff}
+        members[json.dumps(spec["dims"][code]["values"], ensure_ascii=False)] = now.isoformat()
+        group["members"] = members
+
+        union = []
+        for member in members:
+            union += [value for value in json.loads(member) if value not in union]
+        if set(union) == set(spec["dims"][code]["values"]) or len(union) > MAX_MERGED_VALUES:
+            continue
+        if best is None or len(members) > best[0]:
+            superset = json.loads(json.dumps(spec))
+            superset["dims"][code]["values"] = union
+            best = (len(members), superset, code)
+
+    _write_plan(plan)
+    return (best[1], best[2]) if best else (None, None)
+
+
+## Henting
+
+
+def _decode(datasets):
+    """
+    Puts the decoded responses of a query (one per request if it was split) together to one DataFrame and the
+    code -> label mapping of each dimension.
+    """
+    dims = {}
+    for dataset in datasets:
+        for code in dataset["id"]:
+            dimension = dataset["dimension"][code]
+            category = dimension["category"]
+            labels = category.get("label") or {c: c for c in category.get("index", [])}
+            dim = dims.setdefault(code, {"column": dimension.get("label", code), "labels": {}})
+            dim["labels"].update(labels)
+
+    frames = [dataset.write("dataframe") for dataset in datasets]
+    if len(frames) == 1:
+        return frames[0], dims
+
+    import pandas as pd
+
+    return pd.concat(frames, ignore_index=True), dims
+
+
+def _send(url, payload, query_name):
+    """Sends a request through pxweb_functions (shared rate limiter, split at SSB's cell limit) and decodes it."""
+    return _decode(fetch_jsonstat_parts(url, payload, query_name=query_name))
+
+
+def fetch_ssb_coalesced(url, payload=None, query_name="Query"):
+    """
+    Fetches an SSB JSON-stat2 request, sharing responses with the other requests of the run (see above).
+
+    Args:
+        url (str): The request URL.
+        payload (dict or None): The v0 POST payload.
+        query_name (str): A name to identify the query in messages.
+
+    Returns:
+        DataFrame: The response data (as pyjstat returns it), or None if the request is not an SSB JSON-stat
+        request (the caller then sends it as usual).
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails.
+        ValueError: If the response cannot be decoded.
+    """
+    spec = canonical_query(url, payload)
+    if spec is None:
+        return None
+
+    df = _from_store(spec)
+    if df is not None:
+        print(f"{query_name} served from an earlier SSB request in this run ({len(df)} rows).")
+        return df
+
+    superset, merged_dim = record_and_plan(spec) if _run_folder() else (None, None)
+    # Only the first request of a group in the run sends the superset (later ones would fetch codes again)
+    group = _key(spec, without=merged_dim)
+    if superset is not None and any(
+        _key(entry["spec"], without=merged_dim) == group for _, entry in _stored_entries(spec["table"])
+    ):
+        superset = None
+    if superset is not None:
+        try:
+            superset_url, superset_payload = build_request(superset)
+            frame, dims = _send(superset_url, superset_payload, f"{query_name} (merged)")
+            _store(superset, frame, dims)
+            df = _from_store(spec)
+            if df is not None:
+                print(f"{query_name} JSON-stat data loaded successfully (merged SSB request, {len(df)} rows).")
+                return df
+        except Exception as e:
+            print(f"{query_name}: merged SSB request failed ({e}), sending the original request.")
+
+    frame, dims = _send(url, payload, query_name)
+    _store(spec, frame, dims)
+    print(f"{query_name} JSON-stat data loaded successfully.")
+    return frame.copy()
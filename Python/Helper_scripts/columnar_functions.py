@@ -0,0 +1,109 @@
+# columnar_functions.py
+
+import os
+import hashlib
+from io import BytesIO
+
+# Typed columnar siblings of published CSV files.
+#
+# For every CSV published with handle_output_data (e.g. "befolkning.csv") a compressed parquet file with the
+# same data and dtypes is published next to it ("befolkning.parquet"). The CSV is still the format used by the
+# website; the parquet file is what internal readers (download_github_file(..., typed=True)) and the diff in
+# compare_to_github load, so they do not have to parse all-string CSVs and re-cast columns.
+#
+# The parquet file records the git blob SHA of the CSV it was written together with. A sibling whose SHA does
+# not match the CSV currently on GitHub (e.g. the CSV was edited by hand) is ignored, and the CSV is used.
+#
+# Requires pyarrow. Without it no siblings are written, and readers always use the CSV.
+
+CSV_SHA_METADATA_KEY = b"csv_git_sha"
+COMPRESSION = "zstd"
+
+
+def parquet_available():
+    """True if pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def typed_sibling_name(file_name):
+    """
+    Name of the typed sibling of a CSV file, e.g. "Data/x/befolkning.csv" -> "Data/x/befolkning.parquet".
+
+    Returns:
+        str: The sibling path, or None if file_name is not a CSV file.
+    """
+    stem, extension = os.path.splitext(file_name)
+    if extension.lower() != ".csv":
+        return None
+    return f"{stem}.parquet"
+
+
+def git_blob_sha(content):
+    """
+    Git blob SHA-1 of bytes, i.e. the "sha" GitHub reports for a file with this content.
+
+    Args:
+        content (bytes): File content.
+
+    Returns:
+        str: Hex digest.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def csv_upload_sha(local_csv_path):
+    """
+    Git blob SHA of a local CSV file as upload_github_file uploads it (read as UTF-8 text, so line endings
+    are normalized to \\n).
+    """
+    with open(local_csv_path, "r", encoding="utf-8") as file:
+        return git_blob_sha(file.read().encode("utf-8"))
+
+
+def write_typed_sibling(df, local_csv_path, local_parquet_path):
+    """
+    Writes df as a compressed parquet file, recording the git blob SHA of the CSV written from the same df.
+
+    Args:
+        df (pd.DataFrame): The published DataFrame.
+        local_csv_path (str): The CSV written from df (as uploaded to GitHub).
+        local_parquet_path (str): Where to write the parquet file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CSV_SHA_METADATA_KEY] = csv_upload_sha(local_csv_path).encode("ascii")
+    pq.write_table(table.replace_schema_metadata(metadata), local_parquet_path, compression=COMPRESSION)
+
+
+def read_typed_sibling(content, expected_csv_sha=None):
+    """
+    Reads a typed sibling.
+
+    Args:
+        content (bytes): The parquet file content.
+        expected_csv_sha (str or None): Git blob SHA of the CSV currently published. If given and it does not
+            match the SHA recorded in the parquet file, the sibling is considered stale.
+
+    Returns:
+        pd.DataFrame: The typed data, or None if the sibling is stale or cannot be read.
+    """
+    import pyarrow.parquet as pq
+
+    try:
+        table = pq.read_table(BytesIO(content))
+    except Exception as e:
+        print(f"Could not read typed sibling: {e}")
+        return None
+
+    recorded_sha = (table.schema.metadata or {}).get(CSV_SHA_METADATA_KEY, b"").decode("ascii")
+    if expected_csv_sha and recorded_sha != expected_csv_sha:
+        print("Typed sibling does not match the published CSV, using the CSV instead")
+        return None
+    return table.to_pandas()
@@ -0,0 +1,394 @@
+# fixture_functions.py
+
+import os
+import re
+import sys
+import json
+import time
+import base64
+import pickle
+import shutil
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from Helper_scripts.cache_functions import get_cache_folder, content_hash
+from Helper_scripts.columnar_functions import git_blob_sha
+
+# Opptak og avspilling av HTTP-trafikk, for å kjøre skriptene uten nett (f.eks. for å måle kjøretid).
+#
+# Set HTTP_FIXTURE_MODE before a script starts (github_functions.py calls install_http_fixtures() on import, so
+# every script using fetch_data or the GitHub helpers is covered, as is any other use of requests in the process):
+#
+#     HTTP_FIXTURE_MODE=record   Requests go to the real services. Every response is saved in the fixture store,
+#                                and files read from the GitHub contents API are saved as the fake GitHub seed.
+#     HTTP_FIXTURE_MODE=replay   Nothing leaves the machine. Responses are served from the fixture store, and
+#                                GitHub (contents and commits API) is served by FakeGitHub from a local folder.
+#
+# Other settings (environment variables):
+#
+#     HTTP_FIXTURE_FOLDER    The fixture store (default: Cache/http_fixtures). One subfolder per script.
+#     HTTP_FIXTURE_SCRIPT    Name of the subfolder for this script (default: from the path of the script).
+#     HTTP_FIXTURE_LATENCY   Replay only: seconds added to every response, or "recorded" to wait as long as the
+#                            request took when it was recorded (default: 0).
+#     FAKE_GITHUB_FOLDER     Replay only: the folder FakeGitHub reads and writes (default: the seed folder).
+#                            Point it to a copy of the seed (see copy_github_seed) to keep the seed unchanged.
+#
+# Requests are matched on method, URL (with query string) and body. A request made several times in one script
+# replays the recorded responses in order (the last one is repeated). A request without a fixture raises
+# requests.exceptions.ConnectionError, like a request without network would.
+#
+# Helper_scripts/Benchmark/benchmark_pipeline.py runs the master_script.py scripts in either mode.
+
+FIXTURE_MODE_ENV = "HTTP_FIXTURE_MODE"
+FIXTURE_FOLDER_ENV = "HTTP_FIXTURE_FOLDER"
+FIXTURE_SCRIPT_ENV = "HTTP_FIXTURE_SCRIPT"
+FIXTURE_LATENCY_ENV = "HTTP_FIXTURE_LATENCY"
+FAKE_GITHUB_FOLDER_ENV = "FAKE_GITHUB_FOLDER"
+
+GITHUB_SEED_FOLDER = "_github"
+GITHUB_API_HOST = "api.github.com"
+GITHUB_REPO = "evensrii/Telemark"
+
+_original_send = requests.Session.send
+_installed_mode = None
+_lock = threading.Lock()
+# Number of times each request has been seen in this process, keyed by request key
+_calls = {}
+
+## Funksjoner for innstillinger og nøkler
+
+
+def get_fixture_mode():
+    """Returns "record", "replay" or None (HTTP_FIXTURE_MODE)."""
+    mode = (os.environ.get(FIXTURE_MODE_ENV) or "").strip().lower()
+    return mode if mode in ("record", "replay") else None
+
+
+def is_replaying():
+    """True if HTTP requests are replayed from fixtures (no network)."""
+    return get_fixture_mode() == "replay"
+
+
+def get_fixture_folder():
+    """Returns the fixture store (HTTP_FIXTURE_FOLDER, default Cache/http_fixtures)."""
+    folder = os.environ.get(FIXTURE_FOLDER_ENV)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+        return folder
+    return get_cache_folder("http_fixtures")
+
+
+def script_key(script_path):
+    """
+    File-system safe fixture name for a script, from its path relative to PYTHONPATH,
+    e.g. "Queries/01_Befolkning/Befolkningsutvikling/folketall.py" -> "Queries__01_Befolkning__Befolkningsutvikling__folketall".
+    """
+    path = os.path.abspath(script_path)
+    pythonpath = os.environ.get("PYTHONPATH")
+    if pythonpath:
+        relative = os.path.relpath(path, os.path.abspath(pythonpath))
+        if not relative.startswith(".."):
+            path = relative
+    path = os.path.splitext(path)[0].replace("\\", "/").strip("/")
+    return re.sub(r'[<>:"|?*\s]', "_", path.replace("/", "__"))
+
+
+def _current_script_key():
+    name = os.environ.get(FIXTURE_SCRIPT_ENV)
+    if name:
+        return name
+    main = sys.argv[0] if sys.argv and sys.argv[0] else "interactive"
+    return script_key(main)
+
+
+def request_key(method, url, body):
+    """Key identifying a request: hash of method, URL and body (headers such as Authorization are not included)."""
+    if body is None:
+        body = b""
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    return content_hash(method.upper().encode("utf-8") + b"\n" + url.encode("utf-8") + b"\n" + body)[:24]
+
+
+def _build_response(request, status_code, content, headers=None, reason=None):
+    """Builds a requests.Response as if it came from the server."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    # The body is already read, so iter_content (stream=True) yields it from memory
+    response._content_consumed = True
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.url = request.url
+    response.request = request
+    response.reason = reason or ("OK" if status_code < 400 else "Error")
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+## Fake GitHub (contents og commits API) fra en lokal mappe
+
+
+class FakeGitHub:
+    """
+    The parts of the GitHub REST API used by github_functions.py, backed by a local folder that stands in for
+    the repository (file "Data/x.csv" in the repository is folder/Data/x.csv).
+
+    Supported: GET contents (raw, JSON for files, listing for folders), PUT and DELETE contents (with the sha
+    check GitHub does) and GET commits?path= (the file's modification time as commit date).
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _local_path(self, repo_path):
+        return os.path.join(self.folder, *[part for part in unquote(repo_path).split("/") if part])
+
+    @staticmethod
+    def _json(request, status_code, data):
+        return _build_response(
+            request, status_code, json.dumps(data).encode("utf-8"), {"Content-Type": "application/json; charset=utf-8"}
+        )
+
+    def handle(self, request):
+        parts = urlsplit(request.url)
+        prefix = f"/repos/{GITHUB_REPO}/"
+        if not parts.path.startswith(prefix):
+            return self._json(request, 404, {"message": "Not Found"})
+        endpoint = parts.path[len(prefix):]
+
+        if endpoint.startswith("contents"):
+            repo_path = endpoint[len("contents"):].strip("/")
+            if request.method == "GET":
+                return self._get_contents(request, repo_path)
+            if request.method == "PUT":
+                return self._put_contents(request, repo_path)
+            if request.method == "DELETE":
+                return self._delete_contents(request, repo_path)
+        elif endpoint == "commits" and request.method == "GET":
+            return self._get_commits(request, parse_qs(parts.query).get("path", [""])[0])
+        return self._json(request, 404, {"message": "Not Found"})
+
+    def _item(self, repo_path, local_path):
+        item = {"name": os.path.basename(local_path), "path": repo_path}
+        if os.path.isdir(local_path):
+            item.update({"type": "dir", "sha": content_hash(repo_path)[:40]})
+        else:
+            with open(local_path, "rb") as f:
+                content = f.read()
+            item.update({"type": "file", "sha": git_blob_sha(content), "size": len(content)})
+        return item
+
+    def _get_contents(self, request, repo_path):
+        local_path = self._local_path(repo_path)
+        raw = "raw" in (request.headers.get("Accept") or "")
+
+        if os.path.isfile(local_path):
+            with open(local_path, "rb") as f:
+                content = f.read()
+            if raw:
+                return _build_response(request, 200, content, {"Content-Type": "application/octet-stream"})
+            item = self._item(repo_path, local_path)
+            item.update({"encoding": "base64", "content": base64.b64encode(content).decode("ascii")})
+            return self._json(request, 200, item)
+
+        if os.path.isdir(local_path) and not raw:
+            listing = [
+                self._item(f"{repo_path}/{name}".strip("/"), os.path.join(local_path, name))
+                for name in sorted(os.listdir(local_path))
+            ]
+            return self._json(request, 200, listing)
+
+        return self._json(request, 404, {"message": "Not Found"})
+
+    def _put_contents(self, request, repo_path):
+        payload = json.loads(request.body or b"{}")
+        local_path = self._local_path(repo_path)
+        content = base64.b64decode(payload.get("content", ""))
+
+        exists = os.path.isfile(local_path)
+        if exists:
+            with open(local_path, "rb") as f:
+                current_sha = git_blob_sha(f.read())
+            if payload.get("sha") != current_sha:
+                return self._json(request, 409, {"message": f"{repo_path} does not match {payload.get('sha')}"})
+        elif payload.get("sha"):
+            return self._json(request, 422, {"message": "sha given for a file that does not exist"})
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "wb") as f:
+            f.write(content)
+        item = self._item(repo_path, local_path)
+        return self._json(request, 200 if exists else 201, {"content": item, "commit": {"message": payload.get("message")}})
+
+    def _delete_contents(self, request, repo_path):
+        payload = json.loads(request.body or b"{}")
+        local_path = self._local_path(repo_path)
+        if not os.path.isfile(local_path):
+            return self._json(request, 404, {"message": "Not Found"})
+        with open(local_path, "rb") as f:
+            if payload.get("sha") != git_blob_sha(f.read()):
+                return self._json(request, 409, {"message": f"{repo_path} does not match {payload.get('sha')}"})
+        os.remove(local_path)
+        return self._json(request, 200, {"content": None, "commit": {"message": payload.get("message")}})
+
+    def _get_commits(self, request, repo_path):
+        local_path = self._local_path(repo_path)
+        if not os.path.exists(local_path):
+            return self._json(request, 200, [])
+        modified = datetime.fromtimestamp(os.path.getmtime(local_path), tz=timezone.utc)
+        date = modified.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return self._json(request, 200, [{"commit": {"committer": {"date": date}, "message": "fake"}}])
+
+
+def get_github_seed_folder():
+    """Folder with the GitHub files saved while recording (the starting state of FakeGitHub)."""
+    return os.path.join(get_fixture_folder(), GITHUB_SEED_FOLDER)
+
+
+def copy_github_seed(destination):
+    """
+    Copies the GitHub seed to a new folder (replaces it if it exists), so a replay run can upload to FakeGitHub
+    without changing the seed.
+
+    Returns:
+        str: The destination folder.
+    """
+    if os.path.exists(destination):
+        shutil.rmtree(destination)
+    seed = get_github_seed_folder()
+    if os.path.isdir(seed):
+        shutil.copytree(seed, destination)
+    else:
+        os.makedirs(destination)
+    return destination
+
+
+def _save_github_seed(response):
+    """While recording: saves files read from the GitHub contents API as the FakeGitHub seed."""
+    parts = urlsplit(response.request.url)
+    prefix = f"/repos/{GITHUB_REPO}/contents/"
+    if response.request.method != "GET" or response.status_code != 200 or not parts.path.startswith(prefix):
+        return
+
+    content = None
+    if "raw" in (response.request.headers.get("Accept") or ""):
+        content = response.content
+    else:
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        if isinstance(data, dict) and data.get("type") == "file" and data.get("content"):
+            content = base64.b64decode(data["content"])
+    if content is None:
+        return
+
+    local_path = FakeGitHub(get_github_seed_folder())._local_path(parts.path[len(prefix):])
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    with open(local_path, "wb") as f:
+        f.write(content)
+
+
+## Opptak og avspilling
+
+
+def _fixture_path(key):
+    folder = os.path.join(get_fixture_folder(), _current_script_key())
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{key}.pkl")
+
+
+def _next_call(key):
+    with _lock:
+        count = _calls.get(key, 0)
+        _calls[key] = count + 1
+    return count
+
+
+def _record_send(session, request, **kwargs):
+    start = time.perf_counter()
+    response = _original_send(session, request, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    exchange = {
+        "method": request.method,
+        "url": request.url,
+        "status_code": response.status_code,
+        "headers": dict(response.headers),
+        "content": response.content,
+        "reason": response.reason,
+        "elapsed": elapsed,
+    }
+    key = request_key(request.method, request.url, request.body)
+    path = _fixture_path(key)
+    # The first call in a process starts a new recording, later calls are appended
+    exchanges = []
+    if _next_call(key) > 0 and os.path.exists(path):
+        with open(path, "rb") as f:
+            exchanges = pickle.load(f)
+    exchanges.append(exchange)
+    with open(path, "wb") as f:
+        pickle.dump(exchanges, f)
+
+    if urlsplit(request.url).hostname == GITHUB_API_HOST:
+        _save_github_seed(response)
+    return response
+
+
+def _replay_latency(exchange=None):
+    latency = os.environ.get(FIXTURE_LATENCY_ENV, "0").strip().lower()
+    if latency == "recorded":
+        return exchange["elapsed"] if exchange else 0.0
+    try:
+        return max(0.0, float(latency))
+    except ValueError:
+        return 0.0
+
+
+def _replay_send(session, request, **kwargs):
+    if urlsplit(request.url).hostname == GITHUB_API_HOST:
+        time.sleep(_replay_latency())
+        folder = os.environ.get(FAKE_GITHUB_FOLDER_ENV) or get_github_seed_folder()
+        return FakeGitHub(folder).handle(request)
+
+    key = request_key(request.method, request.url, request.body)
+    path = _fixture_path(key)
+    if not os.path.exists(path):
+        print(f"No HTTP fixture for {request.method} {request.url}")
+        raise requests.exceptions.ConnectionError(f"No HTTP fixture for {request.method} {request.url}", request=request)
+
+    with open(path, "rb") as f:
+        exchanges = pickle.load(f)
+    exchange = exchanges[min(_next_call(key), len(exchanges) - 1)]
+    time.sleep(_replay_latency(exchange))
+    return _build_response(request, exchange["status_code"], exchange["content"], exchange["headers"], exchange["reason"])
+
+
+def install_http_fixtures():
+    """
+    Routes all requests made with the requests library through the fixture store, according to
+    HTTP_FIXTURE_MODE. Does nothing if the mode is not set. Safe to call several times.
+
+    Returns:
+        str or None: The active mode ("record" or "replay"), or None.
+    """
+    global _installed_mode
+    mode = get_fixture_mode()
+    if mode == _installed_mode:
+        return mode
+
+    if mode == "record":
+        requests.Session.send = _record_send
+    elif mode == "replay":
+        requests.Session.send = _replay_send
+    else:
+        requests.Session.send = _original_send
+    _installed_mode = mode
+    if mode:
+        print(f"HTTP fixtures: {mode} ({os.path.join(get_fixture_folder(), _current_script_key())})")
+    return mode
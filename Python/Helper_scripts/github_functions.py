@@ -3,12 +3,24 @@
 import requests
 import os
 import sys
-from dotenv import load_dotenv
 from datetime import datetime
 import base64
-import pandas as pd
 import re
 from io import BytesIO
+from Helper_scripts.artifact_functions import get_artifact, put_artifact
+from Helper_scripts.columnar_functions import (
+    parquet_available,
+    typed_sibling_name,
+    write_typed_sibling,
+    read_typed_sibling,
+)
+from Helper_scripts.fixture_functions import install_http_fixtures, is_replaying
+from Helper_scripts.telemetry_functions import start_script_telemetry, track_phase
+
+# Record/replay of HTTP requests for offline runs (HTTP_FIXTURE_MODE, see fixture_functions.py)
+install_http_fixtures()
+# Per-script telemetry when started from master_script.py (SCRIPT_TELEMETRY_FILE, see telemetry_functions.py)
+start_script_telemetry()
 
 # Track the current file being processed
 _current_file = None
@@ -34,6 +46,10 @@ def get_github_token():
     Raises:
         ValueError: If PYTHONPATH is not set, token.env is not found, or GITHUB_TOKEN is not in the .env file.
     """
+    # Replayed runs never reach GitHub, so no real token is needed
+    if is_replaying():
+        return os.getenv("GITHUB_TOKEN") or "fixture-token"
+
     # Retrieve PYTHONPATH environment variable
     pythonpath = os.environ.get("PYTHONPATH")
     if not pythonpath:
@@ -45,6 +61,8 @@ def get_github_token():
         raise ValueError(f"token.env file not found in: {env_file_path}")
 
     # Load the .env file
+    from dotenv import load_dotenv
+
     load_dotenv(env_file_path)
     print(f"Loaded .env file from: {env_file_path}")
 
@@ -57,23 +75,61 @@ def get_github_token():
     return github_token
 
 
-GITHUB_TOKEN = get_github_token()
+# The token is only loaded when the first GitHub request is made, so importing this module has no side effects
+# (no token.env is needed to import it, e.g. for get_current_file or in tests)
+_github_token = None
+
+
+def github_token():
+    """Returns the GITHUB_TOKEN, loaded with get_github_token on first use."""
+    global _github_token
+    if _github_token is None:
+        _github_token = get_github_token()
+    return _github_token
+
+
+def __getattr__(name):
+    # Scripts importing GITHUB_TOKEN from this module load it when they import it
+    if name == "GITHUB_TOKEN":
+        return github_token()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 ## Function to download a file from GitHub
-def download_github_file(file_path):
-    """Download a file from GitHub."""
+def download_github_file(file_path, use_artifact_store=False, typed=False):
+    """
+    Download a file from GitHub.
+
+    With use_artifact_store=True, a file published earlier in the same run (see artifact_functions.py) is
+    returned from the artifact store instead, with its original dtypes. Only scripts that should read this run's
+    output set it (e.g. kombiner_historisk_og_framskrevet.py); the default reads the version published on
+    GitHub, which is what checks comparing new data with the existing file need.
+
+    With typed=True the typed parquet sibling of the CSV is loaded if it exists and matches the CSV (see
+    columnar_functions.py). Otherwise the CSV is downloaded and all columns are strings.
+    """
+    if use_artifact_store:
+        df = get_artifact(file_path)
+        if df is not None:
+            print(f"Using {file_path} produced earlier in this run (artifact store)")
+            return df
+
+    if typed:
+        df = download_typed_github_file(file_path)
+        if df is not None:
+            return df
+
     url = f"https://api.github.com/repos/evensrii/Telemark/contents/{file_path}?ref=main"
     headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Authorization": f"Bearer {github_token()}",
         "Accept": "application/vnd.github.v3.raw",
     }
     response = requests.get(url, headers=headers)
 
     if response.status_code == 200:
         # Return the content as a Pandas DataFrame
-        from io import StringIO
-        
+        import pandas as pd
+
         df = pd.read_csv(BytesIO(response.content), dtype=str)
         
         # Clean up the data - ensure consistent string format for comparison
@@ -95,12 +151,99 @@ def download_github_file(file_path):
         return None
 
 
+## Function to get the git blob SHA of a file on GitHub (without downloading it)
+def get_github_file_sha(file_path):
+    """
+    Return the git blob SHA of a file on GitHub, or None if it does not exist (404).
+
+    Only the metadata of the file itself is requested (not a listing of its folder, which the contents API
+    limits to 1000 entries).
+
+    Raises:
+        requests.exceptions.HTTPError: If the SHA could not be checked (e.g. 403 rate limit, 5xx).
+    """
+    url = f"https://api.github.com/repos/evensrii/Telemark/contents/{file_path}?ref=main"
+    headers = {
+        "Authorization": f"Bearer {github_token()}",
+        "Accept": "application/vnd.github.v3+json",
+    }
+    response = requests.get(url, headers=headers)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json().get("sha")
+
+
+## Function to download the raw content of a file from GitHub (e.g. parquet or JSON)
+def download_github_content(file_path):
+    """
+    Download the raw content of a file from GitHub.
+
+    Returns:
+        bytes: The file content, or None if the file does not exist (404).
+
+    Raises:
+        requests.exceptions.HTTPError: If the download failed for another reason (e.g. 403 rate limit, 5xx).
+    """
+    url = f"https://api.github.com/repos/evensrii/Telemark/contents/{file_path}?ref=main"
+    headers = {
+        "Authorization": f"Bearer {github_token()}",
+        "Accept": "application/vnd.github.v3.raw",
+    }
+    response = requests.get(url, headers=headers)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        print(f"Failed to download file: {file_path}, Status Code: {response.status_code}")
+        response.raise_for_status()
+    return response.content
+
+
+## Function to download the typed (parquet) sibling of a CSV file from GitHub
+def download_typed_github_file(file_path):
+    """
+    Download the typed parquet sibling of a CSV file on GitHub.
+
+    Returns:
+        pd.DataFrame: The data with its original dtypes, or None if there is no sibling, it does not match
+        the published CSV (or that cannot be checked), or pyarrow is not installed. The caller then reads the CSV.
+    """
+    sibling_path = typed_sibling_name(file_path)
+    if sibling_path is None or not parquet_available():
+        return None
+
+    url = f"https://api.github.com/repos/evensrii/Telemark/contents/{sibling_path}?ref=main"
+    headers = {
+        "Authorization": f"Bearer {github_token()}",
+        "Accept": "application/vnd.github.v3.raw",
+    }
+    response = requests.get(url, headers=headers)
+    if response.status_code != 200:
+        return None
+
+    # The sibling is only trusted when it can be checked against the published CSV
+    try:
+        csv_sha = get_github_file_sha(file_path)
+    except requests.exceptions.RequestException as e:
+        print(f"Could not check {file_path} against its typed sibling ({e}), using the CSV instead")
+        return None
+    if csv_sha is None:
+        return None
+    return read_typed_sibling(response.content, expected_csv_sha=csv_sha)
+
+
 ## Function to upload a file to GitHub
-def upload_github_file(local_file_path, github_file_path, message="Updating data"):
-    """Upload a new or updated file to GitHub."""
+@track_phase("upload")
+def upload_github_file(local_file_path, github_file_path, message="Updating data", raise_on_error=False):
+    """
+    Upload a new or updated file to GitHub.
+
+    With raise_on_error=True a failed check or upload raises requests.exceptions.HTTPError instead of only being
+    printed, for callers that must not go on as if the file was published (e.g. partition_functions.py).
+    """
     url = f"https://api.github.com/repos/evensrii/Telemark/contents/{github_file_path}"
     headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Authorization": f"Bearer {github_token()}",
         "Accept": "application/vnd.github.v3+json",
     }
 
@@ -127,6 +270,8 @@ def upload_github_file(local_file_path, github_file_path, message="Updating data
             print(f"Failed to check file on GitHub: {response.status_code} {response.json()}")
         except Exception:
             print(f"Failed to check file on GitHub: {response.status_code} {response.text}")
+        if raise_on_error:
+            response.raise_for_status()
         return
 
     # Prepare the payload
@@ -148,9 +293,116 @@ def upload_github_file(local_file_path, github_file_path, message="Updating data
             print(f"Failed to upload file ({response.status_code}): {response.json()}")
         except Exception:
             print(f"Failed to upload file ({response.status_code}): {response.text}")
+        if raise_on_error:
+            response.raise_for_status()
+
+
+## Function to upload a binary file (e.g. parquet) to GitHub
+@track_phase("upload")
+def upload_github_binary_file(local_file_path, github_file_path, message="Updating data", raise_on_error=False):
+    """
+    Upload a new or updated binary file to GitHub. Skips the upload if the content is unchanged.
+
+    With raise_on_error=True a failed check or upload raises requests.exceptions.HTTPError (see upload_github_file).
+    """
+    url = f"https://api.github.com/repos/evensrii/Telemark/contents/{github_file_path}"
+    headers = {
+        "Authorization": f"Bearer {github_token()}",
+        "Accept": "application/vnd.github.v3+json",
+    }
+
+    with open(local_file_path, "rb") as file:
+        local_content = file.read()
+
+    sha = None
+    response = requests.get(url, headers=headers)
+    if response.status_code == 200:
+        sha = response.json()["sha"]
+        content = response.json().get("content")
+        if content and base64.b64decode(content) == local_content:
+            return
+    elif response.status_code != 404:
+        print(f"Failed to check file on GitHub: {response.status_code}")
+        if raise_on_error:
+            response.raise_for_status()
+        return
+
+    payload = {
+        "message": message,
+        "content": base64.b64encode(local_content).decode("utf-8"),
+        "branch": "main",
+    }
+    if sha:
+        payload["sha"] = sha
+
+    response = requests.put(url, json=payload, headers=headers)
+    if response.status_code in [201, 200]:
+        print(f"File uploaded successfully: {github_file_path}")
+    else:
+        print(f"Failed to upload file ({response.status_code}): {response.text}")
+        if raise_on_error:
+            response.raise_for_status()
+
+
+## Function to delete a file on GitHub
+@track_phase("upload")
+def delete_github_file(github_file_path, message="Deleting data"):
+    """Delete a file on GitHub. Does nothing if the file does not exist."""
+    url = f"https://api.github.com/repos/evensrii/Telemark/contents/{github_file_path}"
+    headers = {
+        "Authorization": f"Bearer {github_token()}",
+        "Accept": "application/vnd.github.v3+json",
+    }
+
+    response = requests.get(url, headers=headers)
+    if response.status_code == 404:
+        return
+    if response.status_code != 200:
+        print(f"Failed to check file on GitHub: {response.status_code}")
+        return
+
+    payload = {"message": message, "sha": response.json()["sha"], "branch": "main"}
+    response = requests.delete(url, json=payload, headers=headers)
+    if response.status_code == 200:
+        print(f"File deleted: {github_file_path}")
+    else:
+        print(f"Failed to delete file ({response.status_code}): {response.text}")
+
+
+## Function to publish the typed (parquet) sibling of a CSV file
+@track_phase("upload")
+def upload_typed_sibling(df, file_name, github_folder, temp_folder, force=False):
+    """
+    Writes df as a typed parquet sibling of the CSV file_name (already saved in temp_folder) and uploads it.
+
+    Args:
+        df (pd.DataFrame): The published DataFrame.
+        file_name (str): Name of the CSV file.
+        github_folder (str): GitHub folder of the CSV file.
+        temp_folder (str): Temporary folder where the CSV was saved.
+        force (bool): Upload even if a sibling already exists (use when the CSV was updated).
+            Otherwise the sibling is only uploaded if it is missing on GitHub.
+    """
+    sibling_name = typed_sibling_name(file_name)
+    if sibling_name is None or not parquet_available():
+        return
+
+    github_path = f"{github_folder}/{sibling_name}"
+    local_path = os.path.join(temp_folder, sibling_name)
+    try:
+        if not force and get_github_file_sha(github_path) is not None:
+            return
+        write_typed_sibling(df, os.path.join(temp_folder, file_name), local_path)
+        upload_github_binary_file(local_path, github_path, message=f"Updated {sibling_name}")
+    except Exception as e:
+        print(f"Could not publish typed sibling {sibling_name}: {e}")
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
 
 
 ## Function to compare file to GitHub
+@track_phase("compare", result_as="new_data")
 def compare_to_github(input_df, file_name, github_folder, temp_folder, value_columns=None, ignore_patterns=None):
     """
     Compares a DataFrame to an existing file on GitHub, and uploads the file if changes are detected.
@@ -172,12 +424,15 @@ def compare_to_github(input_df, file_name, github_folder, temp_folder, value_col
     Returns:
         bool: True if new data is uploaded or detected, False otherwise.
     """
+    import pandas as pd
+
     # Set the current file being processed
     set_current_file(file_name)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Get existing data from GitHub
-    existing_data = download_github_file(f"{github_folder}/{file_name}")
+    # Prefer the typed parquet sibling, so both sides of the comparison have the same dtypes
+    existing_data = download_github_file(f"{github_folder}/{file_name}", use_artifact_store=False, typed=True)
     
     if existing_data is None:
         print(f"[{timestamp}] Uploading new file: {file_name}")
@@ -513,7 +768,9 @@ def handle_output_data(df, file_name, github_folder, temp_folder, keepcsv=False,
     1. Saves the DataFrame to the temp folder.
     2. Compares it with GitHub data.
     3. Pushes to GitHub if new data is detected.
-    4. Deletes the local temp file unless 'keepcsv' is True.
+    4. Publishes a typed parquet sibling of the CSV (see columnar_functions.py).
+    5. Stores the DataFrame in the run's artifact store, for scripts later in the same run.
+    6. Deletes the local temp file unless 'keepcsv' is True.
 
     Args:
         df (pd.DataFrame): DataFrame to save and compare.
@@ -545,6 +802,12 @@ def handle_output_data(df, file_name, github_folder, temp_folder, keepcsv=False,
         ignore_patterns=ignore_patterns
     )
 
+    # Publish the typed sibling when the CSV was updated (or if the sibling does not exist yet)
+    upload_typed_sibling(df, file_name, github_folder, temp_folder, force=is_new_data)
+
+    # Make the typed DataFrame available to later scripts in the same run (download_github_file reads it)
+    put_artifact(f"{github_folder}/{file_name}", df)
+
     # Optionally delete the temporary file after processing
     if not keepcsv:
         try:
@@ -570,7 +833,7 @@ def get_last_commit_time(file_path):
     """
     url = f"https://api.github.com/repos/evensrii/Telemark/commits"
     headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Authorization": f"Bearer {github_token()}",
         "Accept": "application/vnd.github.v3+json"
     }
     params = {
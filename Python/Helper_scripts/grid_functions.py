@@ -0,0 +1,251 @@
+# grid_functions.py
+
+import numpy as np
+import pandas as pd
+
+# SSBs 250 m rutenett (ssbid) og kobling til soner i Grenland.
+#
+# The SSB grid id of a cell is computed from the lower-left corner of the cell in UTM33 (EPSG:25833/32633):
+#
+#     ssbid = (2 000 000 + x_ll) * 10 000 000 + y_ll        e.g. 21700006570250 for x_ll=170000, y_ll=6570250
+#
+# so any point in UTM33 can be placed in its cell with integer arithmetic, without a lookup table of cells.
+#
+# A grid index is a DataFrame indexed by ssbid (int64), with one column per zone definition (0/1 flags as in
+# geografiske_definisjoner_250m_ruter.csv, or zone names from zones_from_geojson). Assigning points or filtering
+# SSB exports is then one vectorized hash lookup per row:
+#
+#     grid_index = read_grid_definitions(BytesIO(content))
+#     df = df[in_grid(df["SSBID250M"], grid_index)]
+#     companies = assign_cells(companies, "X (UTM33)", "Y (UTM33)", grid_index)
+#
+# New zones drawn as polygons (GeoJSON) are added with add_zones, which assigns each cell by its center point, so
+# the definitions file does not have to be exported again from GIS.
+
+CELL_SIZE = 250
+X_OFFSET = 2_000_000
+Y_FACTOR = 10_000_000
+UTM33_CRS = "EPSG:25833"
+
+## Beregning av ssbid
+
+
+def ssbid_from_utm(x, y, size=CELL_SIZE):
+    """
+    Returns the SSB grid id of the cells containing points (vectorized).
+
+    Args:
+        x (array-like): East coordinates in UTM33.
+        y (array-like): North coordinates in UTM33.
+        size (int): Cell size in meters (250 for SSBID250M, 1000 for SSBID1000M).
+
+    Returns:
+        np.ndarray: ssbid as int64 (-1 where a coordinate is missing).
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x_ll = np.floor(np.where(valid, x, 0) / size).astype("int64") * size
+    y_ll = np.floor(np.where(valid, y, 0) / size).astype("int64") * size
+    return np.where(valid, (X_OFFSET + x_ll) * Y_FACTOR + y_ll, -1)
+
+
+def cell_origin(ssbid):
+    """
+    Returns the lower-left corner of cells (vectorized).
+
+    Args:
+        ssbid (array-like): Grid ids (int or str).
+
+    Returns:
+        tuple: (x_ll, y_ll) as int64 arrays in UTM33.
+    """
+    ssbid = parse_ssbid(ssbid)
+    return ssbid // Y_FACTOR - X_OFFSET, ssbid % Y_FACTOR
+
+
+def cell_center(ssbid, size=CELL_SIZE):
+    """Returns the center of cells as (x, y) float arrays in UTM33."""
+    x_ll, y_ll = cell_origin(ssbid)
+    return x_ll + size / 2, y_ll + size / 2
+
+
+def parse_ssbid(values):
+    """
+    Parses grid ids as written in SSB exports and CSV files ("21700006570250", " 21700006570250", 2.170000657025e13)
+    to int64. Missing or invalid ids become -1.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(np.asarray(values, dtype=object))
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series.astype("string").str.strip(), errors="coerce")
+    return series.fillna(-1).astype("int64").to_numpy()
+
+
+## Rutenettindeks med soner
+
+
+def read_grid_definitions(source, sep=";"):
+    """
+    Reads geografiske_definisjoner_250m_ruter.csv into a grid index.
+
+    Args:
+        source (str or file-like): Path or file object.
+        sep (str): Separator.
+
+    Returns:
+        pd.DataFrame: Indexed by ssbid (int64), with Kommune and the zone columns (X/Y, coordinates and shape
+        columns are dropped, they follow from the id).
+    """
+    df = pd.read_csv(source, sep=sep, dtype={"ssbid": str}, encoding="utf-8-sig")
+    df.index = pd.Index(parse_ssbid(df.pop("ssbid")), name="ssbid")
+    drop = [col for col in df.columns if col in ("X", "Y", "Shape_Length", "Shape_Area") or col.endswith("_decimaldegrees")]
+    return df.drop(columns=drop)
+
+
+def in_grid(ssbid, grid_index, zone=None):
+    """
+    Boolean mask of the ids that are cells in the grid index (optionally only cells in a zone).
+
+    Args:
+        ssbid (array-like): Grid ids (int or str), e.g. df["SSBID250M"].
+        grid_index (pd.DataFrame): From read_grid_definitions.
+        zone (str or None): Zone column; cells with a value other than 0/empty count as in the zone.
+
+    Returns:
+        np.ndarray: The mask.
+    """
+    ids = parse_ssbid(ssbid)
+    cells = grid_index.index
+    if zone is not None:
+        cells = grid_index.index[_zone_mask(grid_index[zone])]
+    return pd.Series(ids).isin(cells).to_numpy()
+
+
+def _zone_mask(values):
+    """
+    Boolean mask of the cells in a zone column.
+
+    Flag columns (0/1) are compared as numbers, so a column that became float (e.g. 1.0/NaN after add_zones
+    added cells) gives the same cells as before. Name columns (zones_from_geojson) count where they have a value.
+    """
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().sum() == values.notna().sum():
+        return (numbers.fillna(0) != 0).to_numpy()
+    return values.notna().to_numpy()
+
+
+def _numeric(series):
+    """Coordinates as floats (strings with decimal comma, as written by geodata_bedrifter.py, are converted)."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.to_numeric(series.astype("string").str.replace(",", "."), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def assign_cells(df, x_column, y_column, grid_index=None, zones=None, size=CELL_SIZE):
+    """
+    Adds the grid id (ssbid_250) and, if a grid index is given, its zone columns to point data.
+
+    Args:
+        df (pd.DataFrame): Points, e.g. companies with "X (UTM33)" and "Y (UTM33)".
+        x_column (str): East coordinate column (UTM33, numbers or strings with decimal comma).
+        y_column (str): North coordinate column.
+        grid_index (pd.DataFrame or None): From read_grid_definitions/add_zones.
+        zones (list or None): Zone columns to add (default: all columns of the grid index).
+        size (int): Cell size in meters.
+
+    Returns:
+        pd.DataFrame: A copy of df with "ssbid_250" (Int64) and the zone columns (missing outside the grid).
+    """
+    ids = ssbid_from_utm(_numeric(df[x_column]), _numeric(df[y_column]), size)
+
+    result = df.copy()
+    result["ssbid_250"] = pd.arrays.IntegerArray(ids, ids < 0)
+    if grid_index is not None:
+        zone_values = grid_index[zones or list(grid_index.columns)].reindex(ids)
+        for column in zone_values.columns:
+            result[column] = zone_values[column].to_numpy()
+    return result
+
+
+## Soner fra polygoner (GeoJSON)
+
+
+def _to_utm(coordinates, source_crs):
+    """Projects [[lon, lat], ...] to UTM33 (pyproj is only needed when the source is not UTM33)."""
+    points = np.asarray(coordinates, dtype="float64")[:, :2]
+    if source_crs in (UTM33_CRS, "EPSG:32633"):
+        return points
+    from pyproj import Transformer
+
+    transformer = Transformer.from_crs(source_crs, UTM33_CRS, always_xy=True)
+    x, y = transformer.transform(points[:, 0], points[:, 1])
+    return np.column_stack([x, y])
+
+
+def _points_in_ring(x, y, ring):
+    """Ray casting point-in-polygon for many points against one ring (vectorized over the points)."""
+    inside = np.zeros(len(x), dtype=bool)
+    x1, y1 = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        crosses = (ay > y) != (by > y)
+        if not crosses.any():
+            continue
+        x_cross = ax + (y - ay) * (bx - ax) / np.where(by == ay, np.inf, by - ay)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def zones_from_geojson(feature_collection, zone_property, source_crs="EPSG:4326", size=CELL_SIZE):
+    """
+    Assigns grid cells to polygon zones by the cell center.
+
+    Only cells within each polygon's bounding box are tested, so the cost follows the area of the zones, not the
+    number of cells in the fylke.
+
+    Args:
+        feature_collection (dict): GeoJSON with Polygon/MultiPolygon features.
+        zone_property (str): Property with the zone name, e.g. "levekaarssone_navn".
+        source_crs (str): CRS of the coordinates (GeoJSON is normally WGS84).
+        size (int): Cell size in meters.
+
+    Returns:
+        pd.Series: Zone name indexed by ssbid (cells in several zones keep the first).
+    """
+    zones = {}
+    for feature in feature_collection["features"]:
+        geometry = feature["geometry"]
+        polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for polygon in polygons:
+            rings = [_to_utm(ring, source_crs) for ring in polygon]
+            exterior = rings[0]
+            x_min, y_min = np.floor(exterior.min(axis=0) / size) * size
+            x_max, y_max = np.ceil(exterior.max(axis=0) / size) * size
+            xs, ys = np.meshgrid(np.arange(x_min, x_max, size) + size / 2, np.arange(y_min, y_max, size) + size / 2)
+            x, y = xs.ravel(), ys.ravel()
+
+            inside = _points_in_ring(x, y, exterior)
+            for hole in rings[1:]:
+                inside &= ~_points_in_ring(x, y, hole)
+
+            for cell in ssbid_from_utm(x[inside], y[inside], size):
+                zones.setdefault(int(cell), feature["properties"].get(zone_property))
+
+    return pd.Series(zones, name=zone_property, dtype=object).rename_axis("ssbid")
+
+
+def add_zones(grid_index, zones, column=None):
+    """
+    Adds a zone column (from zones_from_geojson) to a grid index. Cells of the zones that are not in the index yet
+    are added.
+
+    Args:
+        grid_index (pd.DataFrame): From read_grid_definitions.
+        zones (pd.Series): Zone per ssbid.
+        column (str or None): Column name (default: the name of the series).
+
+    Returns:
+        pd.DataFrame: The extended grid index.
+    """
+    column = column or zones.name
+    return grid_index.join(zones.rename(column), how="outer")
@@ -0,0 +1,283 @@
+# klass_functions.py
+
+import os
+import re
+import glob
+from datetime import date
+
+import pandas as pd
+
+# Oppslag av kommune- og fylkesnummer/-navn fra KLASS-snapshots i Python/Metadata.
+#
+# Snapshots (KLASS codes.csv, one file per vintage):
+#     Metadata/ssb_klass_kommuneinndeling_<år>.csv    (KLASS 131, valid from 1 January <år>)
+#     Metadata/ssb_klass_fylkesinndeling_<år>.csv     (KLASS 104)
+#     Metadata/ssb_klass_kommuneendringer.csv         (old -> new kommunenummer, e.g. Bø/Sauherad -> Midt-Telemark)
+#
+# A validity date (default: today) selects the newest snapshot valid on that date. Each snapshot is read once per
+# process and kept in memory with dict indexes for code -> name and name -> code, so lookups for whole Series
+# are plain Series.map calls:
+#
+#     from Helper_scripts.klass_functions import telemark_kommuner, map_kommune_names, update_kommune_codes
+#     TELEMARK_KOMMUNER = telemark_kommuner()                  # {"4001": "Porsgrunn", ...}
+#     df["Kommune"] = map_kommune_names(df["Kommunenummer"])
+#     df["Kommunenummer"] = update_kommune_codes(df["Kommunenummer"])   # "0821" -> "4020"
+
+METADATA_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Metadata")
+CHANGES_FILE = os.path.join(METADATA_FOLDER, "ssb_klass_kommuneendringer.csv")
+
+SNAPSHOT_PATTERNS = {
+    "kommune": "ssb_klass_kommuneinndeling_{year}.csv",
+    "fylke": "ssb_klass_fylkesinndeling_{year}.csv",
+}
+
+TELEMARK_FYLKESNUMMER = "40"
+
+# Multilingual SSB/KLASS kommune names -> Norwegian name
+SIMPLIFIED_NAMES = {
+    # Keep first part
+    "Oslo - Oslove": "Oslo",
+    "Trondheim - Tråante": "Trondheim",
+    "Sortland - Suortá": "Sortland",
+    "Nordreisa - Ráisa - Raisi": "Nordreisa",
+    "Hammerfest - Hámmerfeasta": "Hammerfest",
+    "Steinkjer - Stïentje": "Steinkjer",
+    "Namsos - Nåavmesjenjaelmie": "Namsos",
+    "Rana - Raane": "Rana",
+    "Fauske - Fuossko": "Fauske",
+    "Evenes - Evenássi": "Evenes",
+    "Harstad - Hárstták": "Harstad",
+    "Levanger - Levangke": "Levanger",
+    "Porsanger - Porsángu - Porsanki": "Porsanger",
+    "Gratangen - Rivtták": "Gratangen",
+    "Røros - Rosse": "Røros",
+    "Sørfold - Fuolldá": "Sørfold",
+    "Lyngen - Ivgu - Yykeä": "Lyngen",
+    "Storfjord - Omasvuotna - Omasvuono": "Storfjord",
+    # Keep last part
+    "Dielddanuorri - Tjeldsund": "Tjeldsund",
+    "Deatnu - Tana": "Tana",
+    "Guovdageaidnu - Kautokeino": "Kautokeino",
+    "Aarborte - Hattfjelldal": "Hattfjelldal",
+    "Hábmer - Hamarøy": "Hamarøy",
+    "Kárásjohka - Karasjok": "Karasjok",
+    "Kárá?johka - Karasjok": "Karasjok",
+    "Loabák - Lavangen": "Lavangen",
+    "Raarvihke - Røyrvik": "Røyrvik",
+    "Snåase - Snåsa": "Snåsa",
+    "Unjárga - Nesseby": "Nesseby",
+    # Keep middle part
+    "Gáivuotna - Kåfjord - Kaivuono": "Kåfjord",
+}
+
+# Snapshots read in this process, keyed by (kind, year)
+_snapshots = {}
+_changes = None
+
+## Hjelpefunksjoner for innlesing
+
+
+def _read_klass_csv(path):
+    """Reads a KLASS CSV file as strings (the snapshots are saved as either UTF-8 or latin-1)."""
+    try:
+        return pd.read_csv(path, sep=";", dtype=str, encoding="utf-8-sig", keep_default_na=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, sep=";", dtype=str, encoding="latin-1", keep_default_na=False)
+
+
+def _to_date(validity_date):
+    if validity_date is None:
+        return date.today()
+    return pd.Timestamp(validity_date).date()
+
+
+def simplify_name(name):
+    """
+    Multilingual kommune names shortened to the Norwegian name, e.g. "Oslo - Oslove" -> "Oslo" and
+    "Deatnu - Tana" -> "Tana" (SIMPLIFIED_NAMES). Other names with " - " keep the first part.
+    """
+    if name in SIMPLIFIED_NAMES:
+        return SIMPLIFIED_NAMES[name]
+    return name.split(" - ")[0].strip()
+
+
+def get_snapshot(kind="kommune", validity_date=None):
+    """
+    Returns the KLASS snapshot valid on a date, with its indexes.
+
+    Args:
+        kind (str): "kommune" or "fylke".
+        validity_date (str, date or None): The date the codes should be valid on. Default: today.
+
+    Returns:
+        dict: "year" (vintage), "codes" (DataFrame with code, name, simple_name), "code_to_name" and
+        "name_to_code" (dicts; names are indexed both in full and simplified).
+    """
+    pattern = SNAPSHOT_PATTERNS[kind]
+    years = sorted(
+        int(re.search(r"_(\d{4})\.csv$", path).group(1))
+        for path in glob.glob(os.path.join(METADATA_FOLDER, pattern.format(year="[0-9][0-9][0-9][0-9]")))
+    )
+    if not years:
+        raise FileNotFoundError(f"No KLASS snapshot {pattern.format(year='<år>')} in {METADATA_FOLDER}")
+
+    target = _to_date(validity_date)
+    valid = [year for year in years if date(year, 1, 1) <= target]
+    if valid:
+        year = valid[-1]
+    else:
+        year = years[0]
+        print(f"No {kind} snapshot valid on {target}, using the oldest ({year}).")
+
+    if (kind, year) not in _snapshots:
+        df = _read_klass_csv(os.path.join(METADATA_FOLDER, pattern.format(year=year)))
+        df = df[["code", "name"]].copy()
+        df["simple_name"] = df["name"].map(simplify_name)
+
+        name_to_code = dict(zip(df["simple_name"], df["code"]))
+        name_to_code.update(zip(df["name"], df["code"]))
+        _snapshots[(kind, year)] = {
+            "year": year,
+            "codes": df,
+            "code_to_name": dict(zip(df["code"], df["simple_name"])),
+            "name_to_code": name_to_code,
+        }
+    return _snapshots[(kind, year)]
+
+
+def get_kommune_changes():
+    """
+    Returns the kommune changes (old -> new kommunenummer).
+
+    Returns:
+        pd.DataFrame: oldCode, oldName, newCode, newName, changeOccurred (as Timestamp).
+    """
+    global _changes
+    if _changes is None:
+        _changes = _read_klass_csv(CHANGES_FILE)
+        _changes["changeOccurred"] = pd.to_datetime(_changes["changeOccurred"])
+    return _changes
+
+
+## Oppslag for kommuner
+
+
+def telemark_kommuner(validity_date=None):
+    """
+    Returns the kommuner in Telemark on a date.
+
+    Args:
+        validity_date (str, date or None): Default: today.
+
+    Returns:
+        dict: kommunenummer -> kommunenavn, in code order, e.g. {"4001": "Porsgrunn", ..., "4036": "Vinje"}.
+    """
+    snapshot = get_snapshot("kommune", validity_date)
+    codes = snapshot["codes"]
+    telemark = codes[codes["code"].str.startswith(TELEMARK_FYLKESNUMMER)].sort_values("code")
+    return dict(zip(telemark["code"], telemark["simple_name"]))
+
+
+def map_kommune_names(codes, validity_date=None):
+    """
+    Maps a Series of kommunenummer to kommunenavn.
+
+    Codes not in the snapshot (e.g. "0821" Bø) get their name from the kommune changes.
+
+    Args:
+        codes (pd.Series): Kommunenummer as strings.
+        validity_date (str, date or None): Default: today.
+
+    Returns:
+        pd.Series: Kommunenavn (NaN for unknown codes).
+    """
+    names = codes.map(get_snapshot("kommune", validity_date)["code_to_name"])
+    unknown = names.isna() & codes.notna()
+    if unknown.any():
+        changes = get_kommune_changes()
+        historical = dict(zip(changes["oldCode"], changes["oldName"]))
+        names = names.where(~unknown, codes.map(historical))
+    return names
+
+
+def map_kommune_codes(names, validity_date=None):
+    """
+    Maps a Series of kommunenavn (full or simplified, e.g. "Oslo" or "Oslo - Oslove") to kommunenummer.
+
+    Args:
+        names (pd.Series): Kommunenavn.
+        validity_date (str, date or None): Default: today.
+
+    Returns:
+        pd.Series: Kommunenummer (NaN for names not in the snapshot).
+    """
+    return names.map(get_snapshot("kommune", validity_date)["name_to_code"])
+
+
+def kommune_name(code, validity_date=None):
+    """Kommunenavn for one kommunenummer (None if unknown)."""
+    name = map_kommune_names(pd.Series([code], dtype=object), validity_date).iloc[0]
+    return None if pd.isna(name) else name
+
+
+def kommune_code(name, validity_date=None):
+    """Kommunenummer for one kommunenavn (None if unknown)."""
+    return get_snapshot("kommune", validity_date)["name_to_code"].get(name)
+
+
+def update_kommune_codes(codes, validity_date=None):
+    """
+    Updates old kommunenummer to the ones valid on a date, following all changes up to that date
+    (e.g. "0821" Bø -> "3817" Midt-Telemark (2020) -> "4020" Midt-Telemark (2024)).
+
+    Args:
+        codes (pd.Series): Kommunenummer as strings.
+        validity_date (str, date or None): Default: today.
+
+    Returns:
+        pd.Series: Kommunenummer valid on the date. Codes without changes are returned unchanged.
+    """
+    changes = get_kommune_changes()
+    changes = changes[changes["changeOccurred"] <= pd.Timestamp(_to_date(validity_date))]
+    direct = dict(zip(changes["oldCode"], changes["newCode"]))
+
+    # Resolve chains once per old code, so the Series is mapped in one pass. A code can come back in a later
+    # change (reused codes, or a change that was reverted), so the chain stops at the first code already visited
+    # instead of looping (e.g. "a" -> "b" -> "a" resolves to "a")
+    resolved = {}
+    for old in direct:
+        new = direct[old]
+        visited = {old}
+        while new in direct and new not in visited:
+            visited.add(new)
+            new = direct[new]
+        resolved[old] = new
+
+    return codes.map(resolved).fillna(codes)
+
+
+## Oppslag for fylker
+
+
+def map_fylke_names(codes, validity_date=None):
+    """
+    Maps a Series of fylkesnummer (or kommunenummer, using the first two digits) to fylkesnavn.
+
+    Args:
+        codes (pd.Series): Fylkesnummer or kommunenummer as strings.
+        validity_date (str, date or None): Default: today.
+
+    Returns:
+        pd.Series: Fylkesnavn (NaN for unknown codes).
+    """
+    return codes.str[:2].map(get_snapshot("fylke", validity_date)["code_to_name"])
+
+
+def fylke_names(validity_date=None):
+    """
+    Returns all fylker on a date.
+
+    Returns:
+        dict: fylkesnummer -> fylkesnavn, e.g. {"03": "Oslo", ..., "40": "Telemark", ...}.
+    """
+    return dict(get_snapshot("fylke", validity_date)["code_to_name"])
@@ -0,0 +1,203 @@
+# miljodirektoratet_functions.py
+
+import os
+from io import BytesIO
+
+import requests
+import pandas as pd
+
+from Helper_scripts.utility_functions import download_to_file
+from Helper_scripts.cache_functions import (
+    get_cache_folder,
+    content_hash,
+    read_cache,
+    write_cache,
+    read_cached_frame,
+    write_cached_frame,
+)
+
+# Innlesing av Miljødirektoratets utslippsregneark (felles for utslippsskriptene).
+#
+# The kommune workbook (klimagassutslipp for alle kommuner) has one sheet per view ("Oversikt - detaljert",
+# "Veitrafikk", ...). It is downloaded once per master_script run (shared with later scripts through the run
+# folder, see artifact_functions.get_run_download_path), all sheets are parsed in one pass, and the data sheets
+# are stacked into one long table with the sheet name in "Ark":
+#
+#     Ark | Fylke | Kommunenummer ("0805") | Kommune | År (Int64) | Sektor | ... | Utslipp (tonn CO2-ekvivalenter)
+#
+# The table is cached per content hash of the workbook, so it is only parsed again when Miljødirektoratet
+# publishes a new file. Scripts just filter:
+#
+#     df = get_kommune_emissions("Veitrafikk", fylke="Telemark")
+#
+# The norskeutslipp.no export (industry emissions per plant) is read with the same Excel engine.
+#
+# The Excel engine is python-calamine if it is installed (much faster), otherwise openpyxl.
+
+KOMMUNE_WORKBOOK_URL = "https://www.miljodirektoratet.no/sharepoint/downloaditem/?id=01FM3LD2WOT7QL4D6Y5FC3JYADXGI6A3FA"
+
+NORSKEUTSLIPP_PAGE_URL = "https://www.norskeutslipp.no/no/Komponenter/Utslipp/Klimagasser-CO2-ekvivalenter/?ComponentType=utslipp&ComponentPageID=1166&SectorID=600"
+NORSKEUTSLIPP_EXPORT_URL = "https://www.norskeutslipp.no/Templates/NorskeUtslipp/Pages/exportTableData.aspx?PageID=1166&ComponentType=utslipp&exportType=temaexcel&epslanguage=no"
+
+TABLE_VERSION = 1
+KEY_COLUMNS = ["Kommunenummer", "År"]
+
+# Tables read in this process, keyed by content hash
+_tables = {}
+
+## Hjelpefunksjoner for Excel
+
+
+def excel_engine():
+    """Returns the fastest installed Excel engine for pandas: "calamine" or "openpyxl"."""
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        return "openpyxl"
+
+
+def read_workbook(source, header=0):
+    """
+    Reads all sheets of a workbook in one pass.
+
+    Args:
+        source (str or file-like): Path or file object.
+        header (int or None): Header row, as in pd.read_excel.
+
+    Returns:
+        dict: Sheet name -> DataFrame, in workbook order.
+    """
+    return pd.read_excel(source, sheet_name=None, header=header, engine=excel_engine())
+
+
+## Miljødirektoratet: klimagassutslipp for alle kommuner
+
+
+def normalize_kommune_workbook(sheets):
+    """
+    Stacks the data sheets of the kommune workbook into one long table.
+
+    Sheets without Kommunenummer and År (info sheets) are skipped. Kommunenummer becomes a 4-digit string
+    and År a nullable integer; other columns keep the dtype they were read with.
+
+    Args:
+        sheets (dict): Sheet name -> DataFrame, from read_workbook.
+
+    Returns:
+        tuple: (table, columns), where columns maps each sheet to its original column order.
+    """
+    frames = []
+    columns = {}
+    for sheet_name, df in sheets.items():
+        if not set(KEY_COLUMNS) <= set(df.columns):
+            print(f"Skipping sheet '{sheet_name}' (no {' and '.join(KEY_COLUMNS)} columns)")
+            continue
+        columns[sheet_name] = list(df.columns)
+        frames.append(df.assign(Ark=sheet_name))
+
+    if not frames:
+        raise ValueError("No data sheets with Kommunenummer and År found in the workbook.")
+
+    table = pd.concat(frames, ignore_index=True)
+    table = table[["Ark"] + [col for col in table.columns if col != "Ark"]]
+
+    kommunenummer = pd.to_numeric(table["Kommunenummer"], errors="coerce")
+    table["Kommunenummer"] = (
+        kommunenummer.astype("Int64").astype("string").str.zfill(4)
+        .fillna(table["Kommunenummer"].astype("string"))
+    )
+    table["År"] = pd.to_numeric(table["År"], errors="coerce").astype("Int64")
+    return table, columns
+
+
+def load_kommune_workbook(url=KOMMUNE_WORKBOOK_URL):
+    """
+    Returns the kommune workbook as a long table (see normalize_kommune_workbook), downloading it at most once
+    per run and parsing it only when its content has changed.
+
+    Args:
+        url (str): URL of the workbook.
+
+    Returns:
+        tuple: (table, columns).
+    """
+    path, is_temporary = download_to_file(url, run_cache=True)
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    finally:
+        if is_temporary:
+            os.remove(path)
+
+    key = f"kommuner_v{TABLE_VERSION}_{content_hash(content)[:16]}"
+    if key in _tables:
+        return _tables[key]
+
+    cache_folder = get_cache_folder("miljodirektoratet")
+    table = read_cached_frame(cache_folder, key)
+    columns = read_cache(cache_folder, f"{key}_columns")
+    if table is None or columns is None:
+        print("New Miljødirektoratet workbook, parsing all sheets.")
+        table, columns = normalize_kommune_workbook(read_workbook(BytesIO(content)))
+        write_cached_frame(cache_folder, key, table)
+        write_cache(cache_folder, f"{key}_columns", columns)
+    else:
+        print("Miljødirektoratet workbook unchanged, using cached table.")
+
+    _tables[key] = (table, columns)
+    return table, columns
+
+
+def get_kommune_emissions(sheet, fylke=None, url=KOMMUNE_WORKBOOK_URL):
+    """
+    Returns the rows of one sheet of the kommune workbook, with the sheet's own columns in their original order.
+
+    Args:
+        sheet (str): Sheet name, e.g. "Oversikt - detaljert" or "Veitrafikk".
+        fylke (str or None): Only rows for this fylke (column "Fylke"), e.g. "Telemark".
+        url (str): URL of the workbook.
+
+    Returns:
+        pd.DataFrame: The rows.
+
+    Raises:
+        KeyError: If the workbook has no data sheet with that name.
+    """
+    table, columns = load_kommune_workbook(url)
+    if sheet not in columns:
+        raise KeyError(f"Sheet '{sheet}' not found in the Excel file.")
+
+    mask = table["Ark"] == sheet
+    if fylke is not None:
+        mask &= table["Fylke"] == fylke
+    return table.loc[mask, columns[sheet]].reset_index(drop=True)
+
+
+## norskeutslipp.no: utslipp fra landbasert industri (eksport av tabell)
+
+
+def read_norskeutslipp_export():
+    """
+    Downloads the norskeutslipp.no table export (klimagasser, all plants) and returns its first sheet as it
+    appears in the workbook (the header is in the first non-empty row, see norskeutslipp.py).
+
+    The page is visited first so the export is served with the session cookies.
+
+    Returns:
+        pd.DataFrame: The first sheet.
+    """
+    # Create a session object to persist cookies (the export requires a visit to the page first)
+    session = requests.Session()
+    initial_response = session.get(NORSKEUTSLIPP_PAGE_URL)
+    if initial_response.status_code != 200:
+        raise ValueError(f"Failed to access the initial page. Status code: {initial_response.status_code}")
+
+    response = session.get(NORSKEUTSLIPP_EXPORT_URL)
+    if response.status_code != 200:
+        raise ValueError(f"Failed to download the file. Status code: {response.status_code}")
+
+    try:
+        return pd.read_excel(BytesIO(response.content), engine=excel_engine())
+    except Exception as e:
+        raise ValueError(f"Error reading Excel file: {e}")
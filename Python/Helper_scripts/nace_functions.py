@@ -0,0 +1,222 @@
+# nace_functions.py
+
+import json
+
+import requests
+import pandas as pd
+
+from Helper_scripts.utility_functions import fetch_data
+from Helper_scripts.cache_functions import get_cache_folder, content_hash, read_cached_frame, write_cached_frame
+
+# NACE (Standard for næringsgruppering, SSB KLASS classification 6) as a wide hierarchy table.
+#
+# get_nace_hierarchy() returns one row per 5-digit code with all its ancestors:
+#
+#     Nace_1_nr | Nace_1_navn | Nace_1_nr_navn | ... | Nace_5_nr | Nace_5_navn | Nace_5_nr_navn
+#     A         | Jordbruk... | A - Jordbruk...| ... | 01.110    | Dyrking ... | 01.110 Dyrking ...
+#
+# The table is cached locally per KLASS version of the classification (lastModified and versions), so it is
+# only downloaded and rebuilt when SSB has changed the classification. Scripts that join on NACE codes can use
+# add_nace_hierarchy(df, "Nace_5_nr") to add the parent levels.
+
+KLASS_URL = "https://data.ssb.no/api/klass/v1/classifications"
+NACE_CLASSIFICATION_ID = 6
+HIERARCHY_VERSION = 1
+
+LEVELS = [1, 2, 3, 4, 5]
+HIERARCHY_COLUMNS = [f"Nace_{level}_{suffix}" for level in LEVELS for suffix in ("nr", "navn", "nr_navn")]
+
+## Funksjoner for å hente klassifikasjonen fra KLASS
+
+
+def get_klass_version_stamp(classification_id=NACE_CLASSIFICATION_ID):
+    """
+    Returns a short stamp identifying the current version of a KLASS classification.
+
+    Only the small classification description is requested. The stamp changes when SSB modifies the
+    classification or publishes a new version.
+
+    Args:
+        classification_id (int): KLASS classification id.
+
+    Returns:
+        str: The stamp (hash of lastModified and the list of versions).
+    """
+    response = requests.get(f"{KLASS_URL}/{classification_id}", headers={"Accept": "application/json"})
+    response.raise_for_status()
+    data = response.json()
+    versions = [
+        {key: version.get(key) for key in ("id", "validFrom", "validTo", "lastModified")}
+        for version in data.get("versions", [])
+    ]
+    return content_hash(json.dumps({"lastModified": data.get("lastModified"), "versions": versions}, sort_keys=True))[:16]
+
+
+def download_nace_codes(
+    classification_id=NACE_CLASSIFICATION_ID,
+    from_date="2009-01-01",
+    language="nb",
+    csv_separator=";",
+    error_messages=None,
+):
+    """
+    Downloads the codes of the NACE classification from the SSB KLASS API.
+
+    Args:
+        classification_id (int): KLASS classification id (6 = Standard for næringsgruppering).
+        from_date (str): Start date for valid codes (YYYY-MM-DD).
+        language (str): Language code (nb = Norwegian Bokmål).
+        csv_separator (str): CSV delimiter used by the API.
+        error_messages (list or None): A list to append error messages to (optional).
+
+    Returns:
+        pd.DataFrame: Raw codes (code, parentCode, level, name, ...), all columns as stripped strings.
+    """
+    url = (
+        f"{KLASS_URL}/{classification_id}/codes.csv?from={from_date}"
+        f"&language={language}"
+        f"&csvSeparator={csv_separator}"
+    )
+
+    # ISO-8859-1 encoding for Norwegian characters
+    df = fetch_data(
+        url=url,
+        payload=None,
+        error_messages=error_messages,
+        query_name="SSB Klass - Standard for næringsgruppering",
+        response_type="csv",
+        delimiter=csv_separator,
+        encoding="ISO-8859-1",
+    )
+
+    df = df.copy()
+    for col in df.columns:
+        df[col] = df[col].astype(str).str.strip().replace("nan", "")
+    return df
+
+
+## Funksjon for å bygge hierarkiet (én rad per 5-sifret kode)
+
+
+def build_nace_hierarchy(df):
+    """
+    Builds the wide hierarchy table from the raw KLASS codes.
+
+    Every 5-digit code is walked up its ancestors with one vectorized lookup on parentCode per level.
+    Codes that appear in several versions are looked up by their last occurrence. Exact duplicates are
+    dropped, and for codes with several names (different versions) the first row is kept.
+
+    Args:
+        df (pd.DataFrame): Raw codes from download_nace_codes.
+
+    Returns:
+        pd.DataFrame: One row per 5-digit code, columns HIERARCHY_COLUMNS.
+    """
+    lookup = df.drop_duplicates(subset="code", keep="last").set_index("code")
+    level_5 = df[df["level"] == "5"]
+
+    result = {5: (level_5["code"].reset_index(drop=True), level_5["name"].reset_index(drop=True))}
+    parent = level_5["parentCode"].reset_index(drop=True)
+    for level in [4, 3, 2, 1]:
+        found = parent.isin(lookup.index)
+        result[level] = (
+            parent.where(found, ""),
+            parent.map(lookup["name"]).where(found, ""),
+        )
+        parent = parent.map(lookup["parentCode"]).where(found, "")
+
+    df_result = pd.DataFrame(index=result[5][0].index)
+    for level in LEVELS:
+        nr = result[level][0].astype(str).str.strip().replace("nan", "")
+        navn = result[level][1].astype(str).str.strip().replace("nan", "")
+        # Level 1 uses " - " as separator, levels 2-5 a space
+        separator = " - " if level == 1 else " "
+        df_result[f"Nace_{level}_nr"] = nr
+        df_result[f"Nace_{level}_navn"] = navn
+        df_result[f"Nace_{level}_nr_navn"] = (nr + separator + navn).where((nr != "") & (navn != ""), "")
+    df_result = df_result[HIERARCHY_COLUMNS]
+
+    # Remove exact duplicates (all columns identical)
+    rows_before = len(df_result)
+    df_result = df_result.drop_duplicates()
+    duplicates_removed = rows_before - len(df_result)
+    if duplicates_removed > 0:
+        print(f"Removed {duplicates_removed} exact duplicate rows.")
+    else:
+        print("No exact duplicate rows found.")
+
+    # Remove near-duplicates (same Nace_5_nr but different Nace_5_navn, i.e. several versions of the same code)
+    duplicate_mask = df_result.duplicated(subset=["Nace_5_nr"], keep="first")
+    near_duplicates = int(duplicate_mask.sum())
+    if near_duplicates > 0:
+        print(f"Found {near_duplicates} near-duplicate rows with same Nace_5_nr but different Nace_5_navn.")
+        print("\nTop 10 near-duplicate rows being removed:")
+        print(df_result.loc[duplicate_mask, ["Nace_5_nr", "Nace_5_navn"]].head(10).to_string(index=False))
+        df_result = df_result[~duplicate_mask]
+        print(f"\nKept first instance of each Nace_5_nr, removed {near_duplicates} near-duplicates.")
+    else:
+        print("No near-duplicates found based on Nace_5_nr.")
+
+    df_result = df_result.reset_index(drop=True)
+    print(f"Final dataset: {len(df_result)} rows with {df_result['Nace_5_nr'].nunique()} unique Nace_5_nr values.")
+    return df_result
+
+
+## Funksjoner for å hente hierarkiet (med cache per KLASS-versjon) og bruke det som oppslag
+
+
+def get_nace_hierarchy(from_date="2009-01-01", error_messages=None):
+    """
+    Returns the NACE hierarchy table, from the local cache if the KLASS classification is unchanged.
+
+    Args:
+        from_date (str): Start date for valid codes (YYYY-MM-DD).
+        error_messages (list or None): A list to append error messages to (optional).
+
+    Returns:
+        pd.DataFrame: One row per 5-digit code, columns HIERARCHY_COLUMNS.
+    """
+    cache_folder = get_cache_folder("nace")
+    try:
+        key = f"hierarchy_v{HIERARCHY_VERSION}_{from_date}_{get_klass_version_stamp()}"
+    except requests.exceptions.RequestException as e:
+        # Without the version stamp the cache cannot be trusted, so the codes are downloaded
+        print(f"Could not get the KLASS version of the NACE classification ({e}), rebuilding the hierarchy.")
+        key = None
+
+    if key:
+        df = read_cached_frame(cache_folder, key)
+        if df is not None:
+            print("NACE classification unchanged in KLASS, using cached hierarchy.")
+            return df
+
+    df = build_nace_hierarchy(download_nace_codes(from_date=from_date, error_messages=error_messages))
+    if key:
+        write_cached_frame(cache_folder, key, df)
+    return df
+
+
+def add_nace_hierarchy(df, code_column="Nace_5_nr", levels=(1, 2, 3, 4), hierarchy=None):
+    """
+    Adds NACE parent levels to a DataFrame with 5-digit NACE codes (format "01.110").
+
+    Args:
+        df (pd.DataFrame): The data.
+        code_column (str): Column with the 5-digit codes.
+        levels (tuple): Levels to add (nr, navn and nr_navn columns). Columns already in df are not overwritten.
+        hierarchy (pd.DataFrame or None): Hierarchy table (default: get_nace_hierarchy()).
+
+    Returns:
+        pd.DataFrame: df with the added columns. Codes not in the classification get empty values.
+    """
+    if hierarchy is None:
+        hierarchy = get_nace_hierarchy()
+
+    columns = [
+        col for level in levels for col in (f"Nace_{level}_nr", f"Nace_{level}_navn", f"Nace_{level}_nr_navn")
+        if col not in df.columns
+    ]
+    lookup = hierarchy.set_index("Nace_5_nr")[columns]
+    df = df.join(lookup, on=code_column)
+    df[columns] = df[columns].fillna("")
+    return df
@@ -0,0 +1,269 @@
+# od_functions.py
+
+import requests
+import numpy as np
+import pandas as pd
+
+# Origin-destination (OD) matrices, e.g. flytting fra kommune x til kommune (SSB table 13864).
+#
+# An OD matrix is kept as a sparse COO structure: a dict of equally long numpy arrays with one element per
+# non-zero flow, keyed by region code (kommunenummer):
+#
+#     {
+#         "origin": array(["4001", "4001", ...]),       # region code, origin
+#         "destination": array(["0301", "4003", ...]),  # region code, destination
+#         "value": array([12, 345, ...]),               # flow
+#         "labels": {"4001": "Porsgrunn", ...},         # region code -> name
+#         "time": "2024",                               # Tid label
+#     }
+
+PXWEB_V2_URL = "https://data.ssb.no/api/pxwebapi/v2/tables/{table_id}/data?lang=no&outputFormat=json-stat2"
+
+## Hjelpefunksjoner for JSON-stat2
+
+
+def _category_codes(data, dimension):
+    """Category codes of a JSON-stat2 dimension, in cube order."""
+    index = data["dimension"][dimension]["category"]["index"]
+    if isinstance(index, list):
+        return index
+    return sorted(index, key=index.get)
+
+
+def jsonstat_to_od(data, origin_dimension, destination_dimension):
+    """
+    Converts a JSON-stat2 response to a sparse OD structure (see top of file).
+
+    All dimensions other than the origin and destination dimension must have exactly one category
+    (e.g. one ContentsCode and one Tid). Missing values (null) are treated as 0, and zero flows are dropped.
+
+    Args:
+        data (dict): Parsed JSON-stat2 response.
+        origin_dimension (str): Dimension id of the origin, e.g. "Fraflyttingsregion".
+        destination_dimension (str): Dimension id of the destination, e.g. "TilflyttRegion".
+
+    Returns:
+        dict: Sparse OD structure.
+
+    Raises:
+        ValueError: If another dimension has more than one category.
+    """
+    ids = data["id"]
+    sizes = data["size"]
+    for dimension, size in zip(ids, sizes):
+        if dimension not in (origin_dimension, destination_dimension) and size != 1:
+            raise ValueError(f"Dimension '{dimension}' has {size} categories, expected 1 for an OD matrix.")
+
+    # The value array is either dense (list) or sparse (dict of position -> value)
+    values = data["value"]
+    flat = np.zeros(int(np.prod(sizes)), dtype="float64")
+    if isinstance(values, dict):
+        for position, value in values.items():
+            if value is not None:
+                flat[int(position)] = value
+    else:
+        flat[:] = [0 if value is None else value for value in values]
+
+    o_axis = ids.index(origin_dimension)
+    d_axis = ids.index(destination_dimension)
+    block = np.moveaxis(flat.reshape(sizes), [o_axis, d_axis], [0, 1]).reshape(sizes[o_axis], sizes[d_axis])
+
+    o_index, d_index = np.nonzero(block)
+    value = block[o_index, d_index]
+    if np.all(value == np.round(value)):
+        value = value.astype("int64")
+
+    labels = {}
+    for dimension in (origin_dimension, destination_dimension):
+        labels.update(data["dimension"][dimension]["category"].get("label", {}))
+
+    time_dimension = next((d for d in ids if d.lower() == "tid"), None)
+    time = None
+    if time_dimension:
+        time_category = data["dimension"][time_dimension]["category"]
+        time_code = _category_codes(data, time_dimension)[0]
+        time = time_category.get("label", {}).get(time_code, time_code)
+
+    return {
+        "origin": np.asarray(_category_codes(data, origin_dimension), dtype=str)[o_index],
+        "destination": np.asarray(_category_codes(data, destination_dimension), dtype=str)[d_index],
+        "value": value,
+        "labels": labels,
+        "time": time,
+    }
+
+
+## Funksjon for å hente en OD-matrise begrenset til et sett regioner (to smale spørringer)
+
+
+def fetch_od_matrix(
+    table_id,
+    origin_dimension,
+    destination_dimension,
+    region_codes,
+    codelist=None,
+    valuecodes=None,
+    error_messages=None,
+    query_name="OD query",
+):
+    """
+    Fetches all flows that start or end in one of region_codes from a PxWeb v2 table.
+
+    Instead of requesting the full region x region matrix and filtering locally, two narrow queries are sent:
+    region_codes x all destinations, and all origins x region_codes. The results are merged into one sparse
+    OD structure (flows within region_codes are returned by both queries and are only kept once).
+
+    Args:
+        table_id (str): SSB table id, e.g. "13864".
+        origin_dimension (str): Dimension id of the origin, e.g. "Fraflyttingsregion".
+        destination_dimension (str): Dimension id of the destination, e.g. "TilflyttRegion".
+        region_codes (list): Region codes to keep, e.g. the kommunenummer of the Telemark municipalities.
+        codelist (str or None): Codelist used for both region dimensions, e.g. "agg_KommGjeldende".
+        valuecodes (dict or None): Selection for the remaining dimensions, each must select one category.
+            Default: {"ContentsCode": "*", "Tid": "top(1)"}.
+        error_messages (list or None): A list to append error messages to (optional).
+        query_name (str): A name to identify the query in error messages.
+
+    Returns:
+        dict: Sparse OD structure (see top of file), sorted by origin and destination.
+    """
+    if valuecodes is None:
+        valuecodes = {"ContentsCode": "*", "Tid": "top(1)"}
+
+    selected = ",".join(region_codes)
+    queries = [
+        (f"{query_name} (fra)", selected, "*"),
+        (f"{query_name} (til)", "*", selected),
+    ]
+
+    parts = []
+    for name, origin_codes, destination_codes in queries:
+        url = PXWEB_V2_URL.format(table_id=table_id)
+        for dimension, codes in valuecodes.items():
+            url += f"&valuecodes[{dimension}]={codes}"
+        url += f"&valuecodes[{origin_dimension}]={origin_codes}"
+        url += f"&valuecodes[{destination_dimension}]={destination_codes}"
+        if codelist:
+            url += f"&codelist[{origin_dimension}]={codelist}&codelist[{destination_dimension}]={codelist}"
+
+        try:
+            response = requests.get(url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            error_message = f"Request error in {name}: {str(e)}"
+            print(error_message)
+            if error_messages is not None:
+                error_messages.append(error_message)
+            raise
+
+        od = jsonstat_to_od(response.json(), origin_dimension, destination_dimension)
+        print(f"{name} loaded successfully: {len(od['value'])} non-zero flows.")
+        parts.append(od)
+
+    return merge_od(parts)
+
+
+## Funksjoner for å slå sammen, aggregere og konvertere OD-strukturer
+
+
+def merge_od(parts):
+    """
+    Merges sparse OD structures. Flows present in several parts (same origin and destination) are kept once.
+
+    Args:
+        parts (list): Sparse OD structures.
+
+    Returns:
+        dict: Sparse OD structure, sorted by origin and destination.
+    """
+    df = pd.DataFrame({
+        "origin": np.concatenate([od["origin"] for od in parts]),
+        "destination": np.concatenate([od["destination"] for od in parts]),
+        "value": np.concatenate([od["value"] for od in parts]),
+    })
+    df = df.drop_duplicates(subset=["origin", "destination"]).sort_values(["origin", "destination"])
+
+    labels = {}
+    for od in parts:
+        labels.update(od["labels"])
+
+    return {
+        "origin": df["origin"].to_numpy(dtype=str),
+        "destination": df["destination"].to_numpy(dtype=str),
+        "value": df["value"].to_numpy(),
+        "labels": labels,
+        "time": parts[0]["time"],
+    }
+
+
+def aggregate_od(od, key_function, labels=None):
+    """
+    Aggregates a sparse OD structure to coarser regions, e.g. kommune -> fylke.
+
+    Args:
+        od (dict): Sparse OD structure.
+        key_function (callable): Maps an array of region codes to an array of group codes.
+        labels (dict or None): Group code -> name for the result (optional).
+
+    Returns:
+        dict: Sparse OD structure with group codes, sorted by origin and destination.
+    """
+    origin_keys, origin_index = np.unique(key_function(od["origin"]), return_inverse=True)
+    destination_keys, destination_index = np.unique(key_function(od["destination"]), return_inverse=True)
+
+    # Sum all flows per (origin group, destination group) cell in one pass
+    n_destinations = len(destination_keys)
+    totals = np.bincount(
+        origin_index * n_destinations + destination_index,
+        weights=od["value"],
+        minlength=len(origin_keys) * n_destinations,
+    )
+    cells = np.nonzero(totals)[0]
+
+    return {
+        "origin": origin_keys[cells // n_destinations],
+        "destination": destination_keys[cells % n_destinations],
+        "value": totals[cells].astype(od["value"].dtype),
+        "labels": labels or {},
+        "time": od["time"],
+    }
+
+
+def aggregate_od_to_fylke(od, fylke_names=None):
+    """
+    Aggregates a kommune-level OD structure to fylke level (first two digits of the kommunenummer).
+
+    Args:
+        od (dict): Sparse OD structure keyed by kommunenummer.
+        fylke_names (dict or None): Fylkesnummer -> fylkesnavn (optional).
+
+    Returns:
+        dict: Sparse OD structure keyed by fylkesnummer.
+    """
+    # Casting to a two-character string dtype keeps the first two characters
+    return aggregate_od(od, lambda codes: np.asarray(codes, dtype=str).astype("U2"), labels=fylke_names)
+
+
+def od_to_dataframe(od, origin_column="Fra", destination_column="Til", value_column="Antall"):
+    """
+    Converts a sparse OD structure to a long DataFrame.
+
+    Args:
+        od (dict): Sparse OD structure.
+        origin_column (str): Name of the origin column. The code column gets the suffix "nummer".
+        destination_column (str): Name of the destination column. The code column gets the suffix "nummer".
+        value_column (str): Name of the value column.
+
+    Returns:
+        DataFrame: One row per non-zero flow, with names (from labels), codes and value.
+    """
+    labels = pd.Series(od["labels"], dtype=object)
+    origin = pd.Series(od["origin"])
+    destination = pd.Series(od["destination"])
+    return pd.DataFrame({
+        origin_column: origin.map(labels).fillna(origin),
+        f"{origin_column}nummer": origin,
+        destination_column: destination.map(labels).fillna(destination),
+        f"{destination_column}nummer": destination,
+        value_column: od["value"],
+    })
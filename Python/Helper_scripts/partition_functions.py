@@ -0,0 +1,244 @@
+# partition_functions.py
+
+import os
+import json
+import hashlib
+from io import BytesIO
+from datetime import datetime
+
+import pandas as pd
+
+from Helper_scripts.columnar_functions import COMPRESSION, parquet_available
+from Helper_scripts.github_functions import (
+    download_github_content,
+    upload_github_file,
+    upload_github_binary_file,
+    delete_github_file,
+)
+
+# Append-only partisjonering av store tidsserier på GitHub (brukes av elhub.py).
+#
+# New rows are written as new parquet files, one per month they cover, instead of downloading, merging and
+# re-uploading a whole yearly CSV:
+#
+#     <github_folder>/partitions/2025/03/20250301-20250317.parquet     one file per ingest (typed, zstd)
+#     <github_folder>/partitions/2025/02/month-3f9c0a1b2d4e.parquet    a closed month, compacted to one file
+#     <github_folder>/partitions/manifest.json                         the partitions and their date ranges
+#
+# Timestamps are stored as typed UTC timestamps and text columns with few values as dictionary columns
+# (pandas category), so the files are a fraction of the CSV size.
+#
+# The manifest is the only file read to find the latest ingested date. It also stores a signature (hash of the
+# partition list) for every derived file, e.g. the yearly CSV used by the website, so a derived file is only
+# rebuilt and uploaded when the partitions of its year have changed.
+#
+# Requires pyarrow (see partitions_available). Without it, callers keep using their CSV-only path.
+
+PARTITION_FOLDER = "partitions"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+MONTH_FILE = "month"
+
+## Manifest
+
+
+def partitions_available():
+    """True if partitions can be written (pyarrow is installed)."""
+    return parquet_available()
+
+
+def new_manifest():
+    """An empty manifest."""
+    return {"version": MANIFEST_VERSION, "partitions": [], "derived": {}}
+
+
+def read_manifest(github_folder):
+    """
+    Reads the partition manifest from GitHub.
+
+    Returns:
+        dict: The manifest, or None if the folder has no partitions yet (the manifest does not exist).
+
+    Raises:
+        requests.exceptions.HTTPError: If the manifest could not be read (e.g. rate limit or server error), so a
+        failed download is never taken for "no partitions yet".
+    """
+    content = download_github_content(f"{github_folder}/{PARTITION_FOLDER}/{MANIFEST_NAME}")
+    if content is None:
+        return None
+    return json.loads(content.decode("utf-8"))
+
+
+def write_manifest(manifest, github_folder, temp_folder):
+    """Uploads the manifest (written last, after the partitions it lists). Raises if the upload fails."""
+    local_path = os.path.join(temp_folder, MANIFEST_NAME)
+    with open(local_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    try:
+        upload_github_file(
+            local_path, f"{github_folder}/{PARTITION_FOLDER}/{MANIFEST_NAME}", message="Updated partitions", raise_on_error=True
+        )
+    finally:
+        os.remove(local_path)
+
+
+def latest_partition_time(manifest):
+    """The latest timestamp in any partition (pd.Timestamp, UTC), or None if there are no partitions."""
+    ends = [partition["end"] for partition in manifest["partitions"]]
+    return max(pd.Timestamp(end) for end in ends) if ends else None
+
+
+def year_signature(manifest, year):
+    """Hash of the partitions of a year; changes whenever a partition of that year is added or replaced."""
+    entries = sorted(
+        f"{partition['path']}:{partition['sha256']}" for partition in manifest["partitions"] if partition["year"] == year
+    )
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()[:16]
+
+
+def derived_is_current(manifest, name, year):
+    """True if the derived file name (e.g. "2025.csv") was built from the current partitions of its year."""
+    return manifest["derived"].get(name) == year_signature(manifest, year)
+
+
+def mark_derived(manifest, name, year):
+    """Records that the derived file name was built from the current partitions of its year."""
+    manifest["derived"][name] = year_signature(manifest, year)
+
+
+## Skriving og lesing av partisjoner
+
+
+def _to_parquet_bytes(df):
+    buffer = BytesIO()
+    df.to_parquet(buffer, index=False, compression=COMPRESSION)
+    return buffer.getvalue()
+
+
+def _upload_partition(df, path, github_folder, temp_folder):
+    """
+    Writes and uploads one partition file and returns its manifest entry (without year/month). Raises if the
+    upload fails, so a partition is only added to the manifest once it is on GitHub.
+    """
+    content = _to_parquet_bytes(df)
+    local_path = os.path.join(temp_folder, os.path.basename(path))
+    with open(local_path, "wb") as f:
+        f.write(content)
+    try:
+        upload_github_binary_file(local_path, f"{github_folder}/{path}", message=f"Added {path}", raise_on_error=True)
+    finally:
+        os.remove(local_path)
+    return {"path": path, "rows": len(df), "sha256": hashlib.sha256(content).hexdigest()}
+
+
+def append_partitions(df, manifest, github_folder, temp_folder, time_column, name=None):
+    """
+    Writes new rows as new partitions, one file per (year, month) they cover, and adds them to the manifest.
+
+    The caller is responsible for only passing rows that are not in the store yet (e.g. days after
+    latest_partition_time); the manifest is not uploaded here (see write_manifest).
+
+    Args:
+        df (pd.DataFrame): Typed rows, with time_column as UTC timestamps.
+        manifest (dict): The manifest (updated in place).
+        github_folder (str): GitHub folder of the data set.
+        temp_folder (str): Folder for temporary files.
+        time_column (str): Timestamp column used for partitioning.
+        name (str or None): File name of the partitions (default: "<first day>-<last day>" of each month's rows).
+            Writing a partition with the same path replaces the earlier one.
+
+    Returns:
+        list: The (year, month) partitions that were written.
+    """
+    os.makedirs(temp_folder, exist_ok=True)
+    written = []
+    times = df[time_column]
+    for (year, month), rows in df.groupby([times.dt.year, times.dt.month], sort=True):
+        start, end = rows[time_column].min(), rows[time_column].max()
+        file_name = name or f"{start:%Y%m%d}-{end:%Y%m%d}"
+        path = f"{PARTITION_FOLDER}/{year:04d}/{month:02d}/{file_name}.parquet"
+
+        entry = _upload_partition(rows.reset_index(drop=True), path, github_folder, temp_folder)
+        entry.update({"year": int(year), "month": int(month), "start": start.isoformat(), "end": end.isoformat()})
+        manifest["partitions"] = [p for p in manifest["partitions"] if p["path"] != path] + [entry]
+        written.append((int(year), int(month)))
+
+    manifest["partitions"].sort(key=lambda p: (p["year"], p["month"], p["start"]))
+    return written
+
+
+def read_partitions(manifest, github_folder, year=None, month=None):
+    """
+    Reads partitions from GitHub and returns them as one DataFrame.
+
+    Args:
+        manifest (dict): The manifest.
+        github_folder (str): GitHub folder of the data set.
+        year (int or None): Only this year.
+        month (int or None): Only this month (with year).
+
+    Returns:
+        pd.DataFrame: The rows (empty if there are no partitions).
+    """
+    frames = []
+    for partition in manifest["partitions"]:
+        if year is not None and partition["year"] != year:
+            continue
+        if month is not None and partition["month"] != month:
+            continue
+        content = download_github_content(f"{github_folder}/{partition['path']}")
+        if content is None:
+            raise FileNotFoundError(f"Partition listed in the manifest is missing: {partition['path']}")
+        frames.append(pd.read_parquet(BytesIO(content)))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def compact_closed_months(manifest, github_folder, temp_folder, time_column, before):
+    """
+    Merges the partitions of each month that ended before a timestamp into one month file and deletes the
+    partitions it replaces, so reading a year needs at most one file per closed month.
+
+    The merged file gets a new name (month-<hash of the partitions it replaces>.parquet), so no file listed in
+    the published manifest is overwritten. The manifest is uploaded before the replaced files are deleted: if the run stops in between,
+    the published manifest still lists only files that exist (at worst a few unlisted files are left).
+
+    Args:
+        manifest (dict): The manifest (updated in place).
+        github_folder (str): GitHub folder of the data set.
+        temp_folder (str): Folder for temporary files.
+        time_column (str): Timestamp column.
+        before (pd.Timestamp): Months that start before the month of this timestamp are closed.
+
+    Returns:
+        list: The (year, month) partitions that were compacted.
+    """
+    by_month = {}
+    for partition in manifest["partitions"]:
+        by_month.setdefault((partition["year"], partition["month"]), []).append(partition)
+
+    compacted = []
+    replaced = []
+    for (year, month), partitions in sorted(by_month.items()):
+        if (year, month) >= (before.year, before.month) or len(partitions) < 2:
+            continue
+        # Named after the partitions it replaces, so it never has the name of one of them
+        inputs = "\n".join(f"{partition['path']}:{partition['sha256']}" for partition in partitions)
+        month_name = f"{MONTH_FILE}-{hashlib.sha256(inputs.encode('utf-8')).hexdigest()[:12]}"
+        rows = read_partitions(manifest, github_folder, year=year, month=month)
+        rows = rows.sort_values(time_column, kind="stable").reset_index(drop=True)
+        append_partitions(rows, manifest, github_folder, temp_folder, time_column, name=month_name)
+        month_path = f"{PARTITION_FOLDER}/{year:04d}/{month:02d}/{month_name}.parquet"
+        manifest["partitions"] = [
+            p for p in manifest["partitions"] if (p["year"], p["month"]) != (year, month) or p["path"] == month_path
+        ]
+        replaced += [(partition["path"], month_name) for partition in partitions if partition["path"] != month_path]
+        compacted.append((year, month))
+        print(f"{datetime.now().strftime('[%Y-%m-%d %H:%M:%S]')} Compacted {len(partitions)} partitions of {year}-{month:02d}")
+
+    if replaced:
+        write_manifest(manifest, github_folder, temp_folder)
+        for path, name in replaced:
+            delete_github_file(f"{github_folder}/{path}", message=f"Compacted into {name}.parquet")
+    return compacted
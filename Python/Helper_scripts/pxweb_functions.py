@@ -0,0 +1,663 @@
+# pxweb_functions.py
+
+import os
+import re
+import copy
+import glob
+import math
+import time
+import fnmatch
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from Helper_scripts.cache_functions import get_cache_folder, read_cache, write_cache
+
+# Klient for SSB sitt PxWeb v2-API (https://data.ssb.no/api/pxwebapi/v2).
+#
+# - All requests go through one shared rate limiter. SSB allows 30 requests per 60 seconds per IP; the limiter
+#   starts there, adjusts itself from rate limit headers in the responses, and backs off on 429 instead of
+#   sleeping a fixed amount between every request.
+# - Table metadata is cached locally per table id and "updated" timestamp, so unchanged tables are not
+#   requested again on the next run.
+# - fetch_many runs several data queries concurrently, still within the rate limit.
+# - Queries larger than SSB's limit of cells per request are split automatically (plan_query, and plan_payload
+#   for API v0 payloads): the number of cells is computed from the query and the table metadata, the query is
+#   split along the dimension that needs the fewest requests, and the parts are fetched concurrently and put
+#   together to one DataFrame. fetch_data sends its SSB JSON-stat requests this way too (coalesce_functions.py).
+# - clamp_tid_in_payload / clamp_tid_in_url limit an explicit Tid selection to the periods that exist in the
+#   table, so a query asking for a year SSB has not published yet succeeds instead of returning 400. If none of
+#   the requested periods exist, they raise ValueError (another period is never queried instead).
+
+PXWEB_V2_BASE_URL = "https://data.ssb.no/api/pxwebapi/v2"
+MAX_RETRIES = 5
+CELL_LIMIT = 800_000
+
+## Adaptiv rate limiter
+
+
+class AdaptiveRateLimiter:
+    """
+    Sliding-window rate limiter shared by all threads.
+
+    Allows at most max_requests requests per period seconds. The limit is adjusted from X-RateLimit-*
+    headers when the server sends them, and a 429 response blocks all requests until Retry-After
+    (or a full period) has passed and lowers the limit slightly.
+    """
+
+    def __init__(self, max_requests=30, period=60.0):
+        self.max_requests = max_requests
+        self.period = period
+        self._sent = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent, and registers it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.period:
+                    self._sent.popleft()
+
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if len(self._sent) < self.max_requests:
+                        self._sent.append(now)
+                        return
+                    wait = self.period - (now - self._sent[0])
+            time.sleep(max(wait, 0.05))
+
+    def update(self, response):
+        """Adjusts the limiter from a response (rate limit headers and 429)."""
+        headers = response.headers
+        with self._lock:
+            now = time.monotonic()
+
+            limit = _header_number(headers, "X-RateLimit-Limit")
+            if limit:
+                self.max_requests = max(1, int(limit))
+
+            remaining = _header_number(headers, "X-RateLimit-Remaining")
+            reset = _header_number(headers, "X-RateLimit-Reset")
+            if remaining == 0 and reset:
+                # Reset is either seconds until reset or a unix timestamp
+                seconds = reset - time.time() if reset > 1e9 else reset
+                self._blocked_until = max(self._blocked_until, now + max(seconds, 0))
+
+            if response.status_code == 429:
+                retry_after = _retry_after_seconds(headers.get("Retry-After"))
+                self._blocked_until = max(self._blocked_until, now + (retry_after or self.period))
+                self.max_requests = max(1, int(self.max_requests * 0.8))
+                print(f"429 Too Many Requests: pausing, limit lowered to {self.max_requests} requests per {self.period:.0f} s")
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _retry_after_seconds(value):
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+
+RATE_LIMITER = AdaptiveRateLimiter()
+
+## Funksjoner for å kjøre requests mot SSB (med rate limiting og nye forsøk ved 429)
+
+
+def pxweb_get(url, params=None):
+    """
+    Sends a GET request through the shared rate limiter. Retries on 429 and 503.
+
+    Args:
+        url (str): Full URL, or a path relative to PXWEB_V2_BASE_URL (e.g. "tables/13864/metadata").
+        params (dict or None): Query parameters.
+
+    Returns:
+        requests.Response: The successful response.
+
+    Raises:
+        requests.exceptions.HTTPError: If the request fails, or is still rate limited after MAX_RETRIES attempts.
+    """
+    if not url.startswith("http"):
+        url = f"{PXWEB_V2_BASE_URL}/{url.lstrip('/')}"
+    return _send_limited("GET", url, params=params)
+
+
+def pxweb_post(url, payload):
+    """
+    Sends a POST request (e.g. a PxWeb API v0 query) through the shared rate limiter. Retries on 429 and 503.
+
+    SSB's rate limit is per IP address, so API v0 and v2 requests share the limiter.
+
+    Args:
+        url (str): Full URL, e.g. "https://data.ssb.no/api/v0/no/table/09429/".
+        payload (dict): The JSON payload.
+
+    Returns:
+        requests.Response: The successful response.
+
+    Raises:
+        requests.exceptions.HTTPError: If the request fails, or is still rate limited after MAX_RETRIES attempts.
+    """
+    return _send_limited("POST", url, json=payload)
+
+
+def _send_limited(method, url, **kwargs):
+    for attempt in range(1, MAX_RETRIES + 1):
+        RATE_LIMITER.acquire()
+        response = requests.request(method, url, **kwargs)
+        RATE_LIMITER.update(response)
+        if response.status_code not in (429, 503) or attempt == MAX_RETRIES:
+            break
+        if response.status_code == 503:
+            time.sleep(2 ** attempt)
+
+    response.raise_for_status()
+    return response
+
+
+## Funksjon for å søke etter tabeller
+
+
+def search_tables(query, include_discontinued=True, lang="no"):
+    """
+    Searches for SSB tables (all pages).
+
+    Args:
+        query (str): Search query, e.g. "title:Framskrevet folkemengde".
+        include_discontinued (bool): Include discontinued tables.
+        lang (str): Language.
+
+    Returns:
+        list: Table dicts as returned by the API (id, label, updated, firstPeriod, ...).
+    """
+    results = []
+    page = 1
+    while True:
+        params = {
+            "query": query,
+            "lang": lang,
+            "pagesize": 50,
+            "pageNumber": page,
+            "includeDiscontinued": str(include_discontinued).lower(),
+        }
+        data = pxweb_get("tables", params=params).json()
+        results.extend(data["tables"])
+        if page >= data["page"]["totalPages"]:
+            break
+        page += 1
+    return results
+
+
+## Funksjon for å hente metadata for en tabell (med lokal cache)
+
+
+def get_table_metadata(table_id, updated=None, lang="no"):
+    """
+    Returns the metadata (JSON-stat2) for a table.
+
+    The metadata is cached locally per table id and updated timestamp (from search_tables), so it is
+    only requested again when SSB has updated the table. Without updated the cache is not used.
+
+    Args:
+        table_id (str): SSB table id.
+        updated (str or None): The table's "updated" timestamp, e.g. "2024-06-13T06:00:00Z".
+        lang (str): Language.
+
+    Returns:
+        dict: Table metadata.
+    """
+    cache_folder = get_cache_folder("pxweb_metadata")
+    key = None
+    if updated:
+        key = f"{table_id}_{lang}_{re.sub(r'[^0-9A-Za-z]', '', updated)}"
+        meta = read_cache(cache_folder, key)
+        if meta is not None:
+            return meta
+
+    meta = pxweb_get(f"tables/{table_id}/metadata", params={"lang": lang}).json()
+
+    if key:
+        # Remove metadata cached for older versions of the table
+        for old_file in glob.glob(os.path.join(cache_folder, f"{table_id}_{lang}_*.pkl")):
+            os.remove(old_file)
+        write_cache(cache_folder, key, meta)
+    return meta
+
+
+_current_metadata = {}
+
+
+def get_current_metadata(table_id, lang="no"):
+    """
+    Returns the metadata of the current version of a table.
+
+    Only the small table info (with its "updated" timestamp) is requested; the metadata itself comes from
+    the local cache unless the table has been updated. The result is also kept in memory for the rest of the run.
+    """
+    if (table_id, lang) not in _current_metadata:
+        updated = pxweb_get(f"tables/{table_id}", params={"lang": lang}).json().get("updated")
+        _current_metadata[(table_id, lang)] = get_table_metadata(table_id, updated, lang=lang)
+    return _current_metadata[(table_id, lang)]
+
+
+def get_dimension_codes(meta, dimension):
+    """Returns the codes of a dimension in the metadata, in table order."""
+    index = meta["dimension"][dimension]["category"]["index"]
+    return index if isinstance(index, list) else sorted(index, key=index.get)
+
+
+_codelist_values = {}
+
+
+def get_codelist_values(codelist_id, lang="no"):
+    """
+    Returns the codes of a codelist (e.g. "agg_KommSummer"), kept in memory for the rest of the run.
+
+    Args:
+        codelist_id (str): Codelist id, as used in codelist[...] in a data URL.
+        lang (str): Language.
+
+    Returns:
+        list: The codes, in codelist order.
+    """
+    if (codelist_id, lang) not in _codelist_values:
+        data = pxweb_get(f"codelists/{codelist_id}", params={"lang": lang}).json()
+        _codelist_values[(codelist_id, lang)] = [value["code"] for value in data.get("values", [])]
+    return _codelist_values[(codelist_id, lang)]
+
+
+## Funksjoner for å begrense Tid-utvalget til perioder som finnes i tabellen
+
+
+def get_time_values(table_id, lang="no"):
+    """
+    Returns the Tid codes available in a table, in table order (see get_current_metadata).
+
+    Args:
+        table_id (str): SSB table id, e.g. "09429".
+        lang (str): Language.
+
+    Returns:
+        list: Tid codes, e.g. ["1980", ..., "2024"].
+    """
+    return get_dimension_codes(get_current_metadata(table_id, lang), "Tid")
+
+
+def _table_id_from_url(url):
+    """Table id from a v0 (.../table/09429/) or v2 (.../tables/09429/data) URL."""
+    match = re.search(r"/tables?/([^/?]+)", url)
+    if not match:
+        raise ValueError(f"Could not find a table id in {url}")
+    return match.group(1)
+
+
+def _clamp_values(requested, available, table_id):
+    """Keeps the requested periods that exist. Raises ValueError if none exist (no other period is substituted)."""
+    available_set = set(available)
+    kept = [value for value in requested if value in available_set]
+    dropped = [value for value in requested if value not in available_set]
+    if dropped and kept:
+        print(f"Table {table_id}: Tid {', '.join(dropped)} not available (yet), querying {', '.join(kept)}.")
+    if not kept:
+        raise ValueError(f"Table {table_id}: none of the requested periods ({', '.join(requested)}) are available.")
+    return kept
+
+
+def clamp_tid_in_payload(url, payload):
+    """
+    Limits an explicit Tid selection ("filter": "item") in a PxWeb v0 payload to the periods in the table.
+    Other filters (e.g. "top") are left unchanged.
+
+    Args:
+        url (str): The v0 table URL, e.g. "https://data.ssb.no/api/v0/no/table/09429/".
+        payload (dict): The v0 JSON payload.
+
+    Returns:
+        dict: A copy of the payload with the Tid values clamped.
+
+    Raises:
+        ValueError: If none of the requested periods exist in the table.
+    """
+    payload = copy.deepcopy(payload)
+    for query in payload.get("query", []):
+        selection = query.get("selection", {})
+        if query.get("code") == "Tid" and selection.get("filter") == "item":
+            table_id = _table_id_from_url(url)
+            selection["values"] = _clamp_values(selection["values"], get_time_values(table_id), table_id)
+    return payload
+
+
+def clamp_tid_in_url(url):
+    """
+    Limits an explicit Tid selection (valuecodes[Tid]=2023,2024,...) in a PxWeb v2 data URL to the periods
+    in the table. Selection expressions (*, top(n), from(...), ...) are left unchanged.
+
+    Args:
+        url (str): The v2 data URL.
+
+    Returns:
+        str: The URL with the Tid values clamped.
+
+    Raises:
+        ValueError: If none of the requested periods exist in the table.
+    """
+    match = re.search(r"valuecodes\[Tid\]=([^&]*)", url)
+    if not match or re.search(r"[*()\[\]]", match.group(1)):
+        return url
+
+    table_id = _table_id_from_url(url)
+    values = _clamp_values(match.group(1).split(","), get_time_values(table_id), table_id)
+    return url[:match.start(1)] + ",".join(values) + url[match.end(1):]
+
+
+## Planlegging av store spørringer (SSBs grense for antall celler per spørring)
+
+
+def _is_expression(selection):
+    """True if a valuecodes selection is an expression (*, top(n), from(x), wildcards, ...), not a list of codes."""
+    return bool(re.search(r"[*?()\[\]]", selection))
+
+
+def _resolve_selection(selection, codes):
+    """
+    Resolves a valuecodes expression against the codes of a dimension.
+
+    Returns:
+        tuple: (number of selected codes, the codes or None if only the number is known).
+    """
+    expression = selection.strip().strip("[]")
+    if expression == "*":
+        return len(codes), list(codes)
+
+    match = re.fullmatch(r"(top|bottom)\((\d+)(?:,\s*(\d+))?\)", expression)
+    if match:
+        # Which end of the table top/bottom count from does not matter for the number of cells
+        return min(int(match.group(2)), len(codes)), None
+
+    match = re.fullmatch(r"(from|to)\((.+)\)", expression)
+    if match and match.group(2) in codes:
+        position = codes.index(match.group(2))
+        selected = codes[position:] if match.group(1) == "from" else codes[:position + 1]
+        return len(selected), selected
+
+    match = re.fullmatch(r"range\((.+),\s*(.+)\)", expression)
+    if match and match.group(1) in codes and match.group(2) in codes:
+        selected = codes[codes.index(match.group(1)):codes.index(match.group(2)) + 1]
+        return len(selected), selected
+
+    if "(" not in expression:
+        patterns = expression.split(",")
+        selected = [code for code in codes if any(fnmatch.fnmatchcase(code, pattern) for pattern in patterns)]
+        return len(selected), selected
+
+    # Unknown expression: count the whole dimension, so the estimate errs on the safe side
+    return len(codes), None
+
+
+def _split_selection(sizes, codes, max_cells):
+    """
+    Splits a selection into parts of at most max_cells cells.
+
+    Args:
+        sizes (dict): Number of selected codes per dimension.
+        codes (dict): The selected codes of the dimensions that can be split.
+        max_cells (int): Cell limit.
+
+    Returns:
+        list: One dict per part, with the codes to select for each split dimension.
+    """
+    cells = math.prod(sizes.values())
+    if cells <= max_cells:
+        return [{}]
+
+    candidates = [dim for dim, values in codes.items() if len(values) > 1]
+    if not candidates:
+        raise ValueError(f"The query selects {cells:,} cells and cannot be split below {max_cells:,}.")
+
+    def codes_per_part(dim):
+        return max(1, max_cells // (cells // sizes[dim]))
+
+    def number_of_parts(dim):
+        return math.ceil(sizes[dim] / codes_per_part(dim))
+
+    # Fewest requests first; Tid is preferred when it is as good, since year ranges are the natural split
+    best = min(candidates, key=lambda dim: (number_of_parts(dim), dim != "Tid", -sizes[dim]))
+    step = codes_per_part(best)
+    rest = {dim: values for dim, values in codes.items() if dim != best}
+
+    parts = []
+    for i in range(0, len(codes[best]), step):
+        chunk = codes[best][i:i + step]
+        for part in _split_selection({**sizes, best: len(chunk)}, rest, max_cells):
+            parts.append({best: chunk, **part})
+    return parts
+
+
+def plan_query(url, max_cells=CELL_LIMIT):
+    """
+    Splits a PxWeb v2 data URL into URLs that each select at most max_cells cells.
+
+    The number of selected codes per dimension is taken from the URL when the codes are listed, and from the
+    table metadata (or the codelist, with codelist[...]) when the selection is an expression such as * or
+    from(2000). Metadata is only requested when needed, and is cached (see get_current_metadata).
+
+    Args:
+        url (str): The data URL.
+        max_cells (int): Cell limit per request.
+
+    Returns:
+        list: The URLs to fetch (only url itself if the query is within the limit).
+    """
+    query = dict(parse_qsl(urlsplit(url).query, keep_blank_values=True))
+    lang = query.get("lang", "no")
+    selections = {key[11:-1]: value for key, value in query.items() if key.startswith("valuecodes[")}
+    codelists = {key[9:-1]: value for key, value in query.items() if key.startswith("codelist[")}
+
+    meta = None
+    sizes = {}
+    codes = {}
+    for dim, selection in selections.items():
+        if not _is_expression(selection):
+            codes[dim] = selection.split(",")
+            sizes[dim] = len(codes[dim])
+            continue
+        if dim in codelists:
+            available = get_codelist_values(codelists[dim], lang)
+        else:
+            meta = meta or get_current_metadata(_table_id_from_url(url), lang)
+            available = get_dimension_codes(meta, dim)
+        sizes[dim], resolved = _resolve_selection(selection, available)
+        if resolved is not None:
+            codes[dim] = resolved
+
+    parts = _split_selection(sizes, codes, max_cells)
+    if len(parts) == 1:
+        return [url]
+
+    # The part URLs are built from the parsed query, so percent-encoded URLs (valuecodes%5BTid%5D=...) are split too
+    split_url = urlsplit(url)
+    params = parse_qsl(split_url.query, keep_blank_values=True)
+    urls = []
+    for part in parts:
+        part_params = [
+            (key, ",".join(part[key[11:-1]]) if key.startswith("valuecodes[") and key[11:-1] in part else value)
+            for key, value in params
+        ]
+        urls.append(split_url._replace(query=urlencode(part_params, safe="[],*()")).geturl())
+    print(f"Query of {math.prod(sizes.values()):,} cells split into {len(urls)} requests of at most {max_cells:,} cells.")
+    return urls
+
+
+def plan_payload(url, payload, max_cells=CELL_LIMIT):
+    """
+    Splits a PxWeb API v0 query (POST payload) into payloads that each select at most max_cells cells.
+
+    Dimensions with a list of codes ("item" and agg/vs filters) are counted from the payload and can be split;
+    "top" counts its number, and "all" is counted from the table metadata (see get_current_metadata).
+
+    Args:
+        url (str): The v0 table URL.
+        payload (dict): The v0 JSON payload.
+        max_cells (int): Cell limit per request.
+
+    Returns:
+        list: The payloads to send (only payload itself if the query is within the limit).
+    """
+    meta = None
+    sizes = {}
+    codes = {}
+    for query in payload.get("query", []):
+        dim = query["code"]
+        selection = query["selection"]
+        values = [str(value) for value in selection.get("values", [])]
+        if selection["filter"] == "top":
+            sizes[dim] = int(values[0]) if values else 1
+        elif selection["filter"] == "all" or any("*" in value for value in values):
+            meta = meta or get_current_metadata(_table_id_from_url(url))
+            available = get_dimension_codes(meta, dim)
+            sizes[dim] = len(available) if selection["filter"] == "all" else _resolve_selection(",".join(values), available)[0]
+        else:
+            codes[dim] = values
+            sizes[dim] = len(values)
+
+    parts = _split_selection(sizes, codes, max_cells)
+    if len(parts) == 1:
+        return [payload]
+
+    payloads = []
+    for part in parts:
+        part_payload = copy.deepcopy(payload)
+        for query in part_payload["query"]:
+            if query["code"] in part:
+                query["selection"]["values"] = part[query["code"]]
+        payloads.append(part_payload)
+    print(f"Query of {math.prod(sizes.values()):,} cells split into {len(payloads)} requests of at most {max_cells:,} cells.")
+    return payloads
+
+
+## Funksjoner for å hente data (én eller flere spørringer samtidig)
+
+
+def _fetch_one(url, payload, error_messages, query_name):
+    try:
+        response = pxweb_get(url) if payload is None else pxweb_post(url, payload)
+    except requests.exceptions.RequestException as e:
+        error_message = f"Request error in {query_name}: {str(e)}"
+        print(error_message)
+        if error_messages is not None:
+            error_messages.append(error_message)
+        raise
+
+    # pyjstat (and pandas) are only imported when data is fetched, not when the module is imported
+    from pyjstat import pyjstat
+
+    try:
+        return pyjstat.Dataset.read(response.text)
+    except Exception as e:
+        raise ValueError(f"Error processing JSON response for {query_name}: {e}")
+
+
+def fetch_jsonstat_parts(url, payload=None, error_messages=None, query_name="Query", max_cells=CELL_LIMIT, max_workers=4):
+    """
+    Fetches a JSON-stat2 query, split into requests of at most max_cells cells (plan_query for v2 URLs,
+    plan_payload for v0 payloads), and returns the decoded responses. All requests go through the rate limiter.
+
+    Args:
+        url (str): The v2 data URL, or the v0 table URL when payload is given.
+        payload (dict or None): The v0 POST payload.
+        error_messages (list or None): A list to append error messages to (optional).
+        query_name (str): A name to identify the query in messages.
+        max_cells (int): Cell limit per request.
+        max_workers (int): Number of concurrent requests for the parts.
+
+    Returns:
+        list: One pyjstat Dataset per request, in order.
+    """
+    try:
+        if payload is None:
+            parts = [(part_url, None) for part_url in plan_query(url, max_cells)]
+        else:
+            parts = [(url, part_payload) for part_payload in plan_payload(url, payload, max_cells)]
+    except (requests.exceptions.RequestException, KeyError) as e:
+        # Without metadata the query is sent as it is, as before
+        print(f"{query_name}: could not plan the query ({e}), sending it as one request.")
+        parts = [(url, payload)]
+
+    if len(parts) == 1:
+        return [_fetch_one(parts[0][0], parts[0][1], error_messages, query_name)]
+
+    names = [f"{query_name} (part {i + 1}/{len(parts)})" for i in range(len(parts))]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda args: _fetch_one(*args[0], error_messages, args[1]), zip(parts, names)))
+
+
+def fetch_jsonstat(url, error_messages=None, query_name="Query", max_cells=CELL_LIMIT, max_workers=4):
+    """
+    Fetches a PxWeb v2 data URL (outputFormat=json-stat2) and returns it as a DataFrame (labels).
+
+    A query selecting more than max_cells cells is split (see plan_query); the parts are fetched concurrently
+    and concatenated, so the result has the same rows as one request would have had (grouped by part).
+
+    Args:
+        url (str): The data URL.
+        error_messages (list or None): A list to append error messages to (optional).
+        query_name (str): A name to identify the query in messages.
+        max_cells (int): Cell limit per request.
+        max_workers (int): Number of concurrent requests for the parts.
+
+    Returns:
+        DataFrame: The response data.
+    """
+    datasets = fetch_jsonstat_parts(url, None, error_messages, query_name, max_cells, max_workers)
+    if len(datasets) == 1:
+        df = datasets[0].write("dataframe")
+    else:
+        import pandas as pd
+
+        df = pd.concat([dataset.write("dataframe") for dataset in datasets], ignore_index=True)
+
+    print(f"{query_name} JSON-stat data loaded successfully.")
+    return df
+
+
+def fetch_many(queries, error_messages=None, max_workers=4):
+    """
+    Runs several data queries concurrently. The shared rate limiter keeps the total request rate allowed.
+
+    Args:
+        queries (list): Dicts with "name" and "url".
+        error_messages (list or None): A list to append error messages to (optional), one per failed query.
+            The caller should not add the returned exceptions to it again.
+        max_workers (int): Number of concurrent requests.
+
+    Returns:
+        list: One result per query, in the same order: a DataFrame, or the exception if the query failed.
+    """
+    def run(query):
+        try:
+            return fetch_jsonstat(query["url"], query_name=query["name"])
+        except Exception as e:
+            if error_messages is not None:
+                error_messages.append(f"Error in {query['name']}: {e}")
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run, queries))
@@ -0,0 +1,295 @@
+# telemetry_functions.py
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import functools
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+
+from Helper_scripts.cache_functions import get_cache_folder
+
+# Ytelsesmåling per skript i master-kjøringen.
+#
+# master_script.py sets SCRIPT_TELEMETRY_FILE for each script it starts. When it is set, github_functions.py calls
+# start_script_telemetry() on import, and when the script exits (also after an error) a JSON summary is written to
+# that file:
+#
+#     cpu_seconds, peak_rss_mb       CPU time and peak memory of the script process
+#     bytes_downloaded               Response bodies received with requests (Content-Length for streamed responses)
+#     http_requests                  Number of requests per host, e.g. {"data.ssb.no": 3, "api.github.com": 4}
+#     phases                         Seconds spent in fetch / transform / compare / upload
+#     new_data                       True/False from compare_to_github (None if the script never compared)
+#
+# Phases are exclusive: time inside upload_github_file called from compare_to_github counts as upload, not
+# compare. "fetch" is fetch_data plus any other HTTP request made outside compare/upload, and "transform" is the
+# rest of the time from the import of the helpers until the script exits.
+#
+# master_script.py adds wall time, status and task name and appends one JSON line per script to
+# logs/00_master_run_telemetry.jsonl, and to a history file in Cache/telemetry that email_when_run_completed.py
+# uses for trends.
+
+TELEMETRY_FILE_ENV = "SCRIPT_TELEMETRY_FILE"
+PHASES = ["fetch", "transform", "compare", "upload"]
+HISTORY_FILE_NAME = "master_run_history.jsonl"
+
+_lock = threading.Lock()
+_state = None
+_original_send = None
+
+## Måling i skriptet (fases, HTTP og ressursbruk)
+
+
+def _now():
+    return time.perf_counter()
+
+
+def _enter_phase(name):
+    """Starts a phase. The time of the enclosing phase (if any) is paused until this one ends."""
+    now = _now()
+    stack = _state["stack"]
+    if stack:
+        parent = stack[-1]
+        _state["phases"][parent[0]] += now - parent[1]
+    stack.append([name, now])
+
+
+def _exit_phase():
+    now = _now()
+    stack = _state["stack"]
+    name, started = stack.pop()
+    _state["phases"][name] += now - started
+    if stack:
+        stack[-1][1] = now
+
+
+def track_phase(name, result_as=None):
+    """
+    Decorator that counts the time spent in a function as the phase name (when telemetry is active, and only in
+    the main thread).
+
+    Args:
+        name (str): "fetch", "compare" or "upload".
+        result_as (str or None): If given, the return value is also recorded under this key (e.g. "new_data").
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _state is None or threading.current_thread() is not threading.main_thread():
+                return function(*args, **kwargs)
+            _enter_phase(name)
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                _exit_phase()
+            if result_as:
+                _state[result_as] = bool(_state.get(result_as)) or bool(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def _telemetry_send(session, request, **kwargs):
+    """requests.Session.send with request counting, byte counting and the "fetch" phase."""
+    outside_phase = threading.current_thread() is threading.main_thread() and not _state["stack"]
+    if outside_phase:
+        _enter_phase("fetch")
+    try:
+        response = _original_send(session, request, **kwargs)
+    finally:
+        if outside_phase:
+            _exit_phase()
+
+    if kwargs.get("stream"):
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        size = len(response.content or b"")
+    host = urlsplit(request.url).hostname or "unknown"
+    with _lock:
+        _state["bytes_downloaded"] += size
+        _state["http_requests"][host] = _state["http_requests"].get(host, 0) + 1
+    return response
+
+
+def _peak_rss_mb():
+    """Peak memory of this process in MB, or None if it cannot be measured."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def get_script_telemetry():
+    """
+    Returns the telemetry of this process so far (see the top of this file), or None if it is not active.
+    """
+    if _state is None:
+        return None
+    total = _now() - _state["started"]
+    phases = {name: round(_state["phases"].get(name, 0.0), 3) for name in PHASES if name != "transform"}
+    phases["transform"] = round(max(0.0, total - sum(phases.values())), 3)
+    return {
+        "cpu_seconds": round(time.process_time(), 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "bytes_downloaded": _state["bytes_downloaded"],
+        "http_requests": dict(sorted(_state["http_requests"].items())),
+        "phases": {name: phases[name] for name in PHASES},
+        "new_data": _state.get("new_data"),
+    }
+
+
+def _write_script_telemetry(path):
+    # Phases still open (the script stopped with an error) are closed first
+    while _state["stack"]:
+        _exit_phase()
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(get_script_telemetry(), f)
+    except Exception as e:
+        print(f"Could not write telemetry to {path}: {e}")
+
+
+def start_script_telemetry():
+    """
+    Starts telemetry for this script if SCRIPT_TELEMETRY_FILE is set (does nothing otherwise, or if it is
+    already started). The summary is written to the file when the process exits.
+
+    Returns:
+        bool: True if telemetry is active.
+    """
+    global _state, _original_send
+    path = os.environ.get(TELEMETRY_FILE_ENV)
+    if _state is not None or not path:
+        return _state is not None
+
+    _state = {
+        "started": _now(),
+        "stack": [],
+        "phases": {name: 0.0 for name in PHASES},
+        "bytes_downloaded": 0,
+        "http_requests": {},
+        "new_data": None,
+    }
+    # Wraps whatever send is installed (e.g. HTTP fixtures), so replayed requests are counted too
+    _original_send = requests.Session.send
+    requests.Session.send = _telemetry_send
+    atexit.register(_write_script_telemetry, path)
+    return True
+
+
+## Samling i master-kjøringen (brukes av master_script.py og email_when_run_completed.py)
+
+
+def read_script_telemetry(path):
+    """Reads and deletes the summary a script wrote. Returns an empty dict if there is none."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read telemetry from {path}: {e}")
+        return {}
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_history_file():
+    """The telemetry history of all runs (Cache/telemetry/master_run_history.jsonl)."""
+    return os.path.join(get_cache_folder("telemetry"), HISTORY_FILE_NAME)
+
+
+def append_telemetry(record, run_file, history_file=None):
+    """
+    Appends one record as a JSON line to the run's telemetry file and to the history.
+
+    Args:
+        record (dict): Telemetry for one script.
+        run_file (str): The telemetry file of this run (next to the master log).
+        history_file (str or None): History file (default: get_history_file()).
+    """
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    for path in (run_file, history_file or get_history_file()):
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Could not write telemetry to {path}: {e}")
+
+
+def read_telemetry(path):
+    """Reads a JSON lines telemetry file. Returns a list of records (empty if the file does not exist)."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping invalid telemetry line in {path}")
+    return records
+
+
+def telemetry_baseline(history, task, before, metric="wall_seconds", runs=7):
+    """
+    Median of a metric for a task over its last runs before a time, used as the trend baseline.
+
+    Args:
+        history (list): Records from read_telemetry.
+        task (str): Task name.
+        before (str): ISO timestamp; only runs before it are used (i.e. not the current run).
+        metric (str): Key in the records.
+        runs (int): Number of earlier completed runs to use.
+
+    Returns:
+        float or None: The median, or None if there are no earlier runs.
+    """
+    values = [
+        record[metric] for record in history
+        if record.get("task") == task and record.get("timestamp", "") < before
+        and record.get("status") == "Completed" and record.get(metric) is not None
+    ][-runs:]
+    if not values:
+        return None
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def new_record(task_name, script_name, status, wall_seconds, script_telemetry, new_data, last_commit=None):
+    """Builds the record master_script.py writes for one script."""
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "task": task_name,
+        "script": script_name,
+        "status": status,
+        "new_data": new_data,
+        "last_commit": last_commit,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+    for key in ("cpu_seconds", "peak_rss_mb", "bytes_downloaded", "http_requests", "phases"):
+        record[key] = script_telemetry.get(key)
+    return record
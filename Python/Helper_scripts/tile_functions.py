@@ -0,0 +1,288 @@
+# tile_functions.py
+
+import os
+import json
+import math
+
+# Statiske kartfliser (GeoJSON) for webkart.
+#
+# Builds files that a Leaflet map can load as static files instead of querying a feature service on every map
+# move:
+#
+#     Polygons (e.g. kommunegrenser)   One simplified FeatureCollection per zoom level. Douglas-Peucker with a
+#                                      tolerance of about one screen pixel at that zoom, and coordinates rounded
+#                                      to the precision the zoom can show.
+#     Points (e.g. bedrifter)          A z/x/y pyramid in the usual web map tiling (the same x/y as the
+#                                      OpenStreetMap tiles). Low zooms only get the points that pass a minimum
+#                                      (e.g. employees), so tiles stay small when the whole fylke is visible.
+#
+# Only the listed properties are kept. write_tileset writes manifest.json with the zoom levels, the bounds and the
+# tiles that exist, so the map never requests empty tiles.
+
+TILE_SIZE = 256
+
+## Fliskoordinater
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """
+    Returns the x/y of the web map tile (EPSG:3857 tiling) that contains a point.
+
+    Args:
+        lon (float): Longitude (WGS84).
+        lat (float): Latitude (WGS84).
+        zoom (int): Zoom level.
+
+    Returns:
+        tuple: (x, y).
+    """
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def degrees_per_pixel(zoom):
+    """Width of one screen pixel in degrees longitude at a zoom level."""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def decimals_for_zoom(zoom):
+    """Number of decimals needed to place coordinates within a pixel at a zoom level."""
+    return max(0, math.ceil(-math.log10(degrees_per_pixel(zoom)))) + 1
+
+
+## Forenkling av polygoner
+
+
+def simplify_line(coords, tolerance):
+    """
+    Douglas-Peucker simplification of a list of [lon, lat] coordinates (first and last point are kept).
+
+    Args:
+        coords (list): Coordinates.
+        tolerance (float): Maximum distance (degrees) between the line and a removed point.
+
+    Returns:
+        list: The kept coordinates.
+    """
+    if len(coords) <= 2:
+        return list(coords)
+
+    keep = [False] * len(coords)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+    while stack:
+        start, end = stack.pop()
+        (x1, y1), (x2, y2) = coords[start][:2], coords[end][:2]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+
+        max_distance, index = -1.0, None
+        for i in range(start + 1, end):
+            x, y = coords[i][:2]
+            if length == 0:
+                distance = math.hypot(x - x1, y - y1)
+            else:
+                distance = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / length
+            if distance > max_distance:
+                max_distance, index = distance, i
+
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return [point for point, kept in zip(coords, keep) if kept]
+
+
+def simplify_ring(ring, tolerance, decimals):
+    """
+    Simplifies a closed ring and rounds its coordinates. Returns None if the ring collapses (fewer than 4 points).
+    """
+    simplified = []
+    for lon, lat in (point[:2] for point in simplify_line(ring, tolerance)):
+        point = [round(lon, decimals), round(lat, decimals)]
+        if not simplified or point != simplified[-1]:
+            simplified.append(point)
+    if len(simplified) < 4:
+        return None
+    if simplified[0] != simplified[-1]:
+        simplified.append(simplified[0])
+    return simplified
+
+
+def simplify_polygon(rings, tolerance, decimals):
+    """
+    Simplifies the rings of one polygon. Holes that collapse are dropped; if the outer ring collapses it is kept
+    unsimplified (only rounded), so small kommuner never disappear.
+    """
+    exterior = simplify_ring(rings[0], tolerance, decimals)
+    if exterior is None:
+        exterior = [[round(lon, decimals), round(lat, decimals)] for lon, lat in (point[:2] for point in rings[0])]
+    holes = [hole for hole in (simplify_ring(ring, tolerance, decimals) for ring in rings[1:]) if hole]
+    return [exterior] + holes
+
+
+def simplify_geometry(geometry, zoom, pixels=1.0):
+    """
+    Simplifies a Polygon or MultiPolygon for display at a zoom level.
+
+    Args:
+        geometry (dict): GeoJSON geometry in WGS84.
+        zoom (int): Zoom level.
+        pixels (float): Tolerance in screen pixels.
+
+    Returns:
+        dict: The simplified geometry.
+    """
+    tolerance = degrees_per_pixel(zoom) * pixels
+    decimals = decimals_for_zoom(zoom)
+    if geometry["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": simplify_polygon(geometry["coordinates"], tolerance, decimals)}
+    if geometry["type"] == "MultiPolygon":
+        return {
+            "type": "MultiPolygon",
+            "coordinates": [simplify_polygon(polygon, tolerance, decimals) for polygon in geometry["coordinates"]],
+        }
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def build_polygon_levels(feature_collection, zooms, properties, pixels=1.0):
+    """
+    Builds one simplified FeatureCollection per zoom level.
+
+    Args:
+        feature_collection (dict): GeoJSON FeatureCollection with Polygon/MultiPolygon features (WGS84).
+        zooms (iterable): Zoom levels.
+        properties (dict): Source property -> output property; other properties are dropped.
+        pixels (float): Tolerance in screen pixels.
+
+    Returns:
+        dict: Zoom -> FeatureCollection.
+    """
+    levels = {}
+    for zoom in zooms:
+        features = []
+        for feature in feature_collection["features"]:
+            features.append({
+                "type": "Feature",
+                "properties": {
+                    target: feature["properties"].get(source) for source, target in properties.items()
+                },
+                "geometry": simplify_geometry(feature["geometry"], zoom, pixels),
+            })
+        levels[zoom] = {"type": "FeatureCollection", "features": features}
+    return levels
+
+
+## Punktfliser
+
+
+def build_point_tiles(df, zooms, lon_column, lat_column, properties, min_value=None, value_column=None):
+    """
+    Builds a z/x/y pyramid of point tiles from a DataFrame.
+
+    Args:
+        df (pd.DataFrame): One row per point, with numeric longitude and latitude columns (WGS84).
+        zooms (iterable): Zoom levels.
+        lon_column (str): Longitude column.
+        lat_column (str): Latitude column.
+        properties (dict): Column -> output property; other columns are dropped.
+        min_value (dict or None): Zoom -> minimum of value_column for a point to be included at that zoom
+            (zooms not in the dict include all points).
+        value_column (str or None): Column compared with min_value (e.g. "Antall ansatte").
+
+    Returns:
+        dict: (zoom, x, y) -> FeatureCollection (empty tiles are not included).
+    """
+    rows = df.dropna(subset=[lon_column, lat_column])
+    columns = list(properties)
+    tiles = {}
+    for zoom in zooms:
+        subset = rows
+        minimum = (min_value or {}).get(zoom)
+        if minimum:
+            subset = rows[rows[value_column].fillna(0) >= minimum]
+
+        for lon, lat, values in zip(subset[lon_column], subset[lat_column], subset[columns].itertuples(index=False)):
+            x, y = lonlat_to_tile(lon, lat, zoom)
+            feature = {
+                "type": "Feature",
+                "properties": {
+                    properties[column]: _json_value(value) for column, value in zip(columns, values)
+                },
+                "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+            }
+            tiles.setdefault((zoom, x, y), {"type": "FeatureCollection", "features": []})["features"].append(feature)
+    return tiles
+
+
+def _json_value(value):
+    """Plain Python value for JSON (NaN becomes None, numpy numbers become int/float)."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+## Skriving
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return os.path.getsize(path)
+
+
+def write_tileset(output_folder, name, polygon_levels=None, point_tiles=None, bounds=None):
+    """
+    Writes a tile set and its manifest.
+
+    Files:
+        <output_folder>/<name>/manifest.json
+        <output_folder>/<name>/z<zoom>.json          (polygon levels)
+        <output_folder>/<name>/<zoom>/<x>/<y>.json   (point tiles)
+
+    Args:
+        output_folder (str): Folder served with the web app (e.g. public/tiles).
+        name (str): Name of the tile set (e.g. "bedrifter").
+        polygon_levels (dict or None): From build_polygon_levels.
+        point_tiles (dict or None): From build_point_tiles.
+        bounds (list or None): [[south, west], [north, east]] of the data.
+
+    Returns:
+        dict: The manifest.
+    """
+    folder = os.path.join(output_folder, name)
+    total_bytes = 0
+    manifest = {"name": name, "bounds": bounds}
+
+    if polygon_levels:
+        for zoom, feature_collection in polygon_levels.items():
+            total_bytes += _write_json(os.path.join(folder, f"z{zoom}.json"), feature_collection)
+        manifest["type"] = "levels"
+        manifest["zooms"] = sorted(polygon_levels)
+
+    if point_tiles:
+        tiles_by_zoom = {}
+        for (zoom, x, y), feature_collection in point_tiles.items():
+            total_bytes += _write_json(os.path.join(folder, str(zoom), str(x), f"{y}.json"), feature_collection)
+            tiles_by_zoom.setdefault(zoom, []).append([x, y])
+        manifest["type"] = "tiles"
+        manifest["zooms"] = sorted(tiles_by_zoom)
+        manifest["tiles"] = {str(zoom): sorted(tiles) for zoom, tiles in sorted(tiles_by_zoom.items())}
+
+    _write_json(os.path.join(folder, "manifest.json"), manifest)
+    count = len(polygon_levels or {}) + len(point_tiles or {})
+    print(f"Tile set '{name}': {count} files, {total_bytes / 1024:.1f} KB in {folder}")
+    return manifest
@@ -0,0 +1,342 @@
+# transform_functions.py
+
+import re
+import numpy as np
+import pandas as pd
+
+from Helper_scripts.klass_functions import get_snapshot
+
+# Faste plasseringer i SortKommune: aggregater først, historiske kommuner (Bø/Sauherad) sist
+KOMMUNE_SORT_FIRST = ["Telemark", "Hele landet"]
+KOMMUNE_SORT_LAST = ["Bø", "Sauherad"]
+
+KJONN_SORT = {
+    "Kjønn samlet": 1, "Begge kjønn": 1,
+    "Menn": 2, "Mann": 2, "Gutter": 2,
+    "Kvinner": 3, "Kvinne": 3, "Jenter": 3,
+}
+
+ALDER_SORT_FIRST = ["Alle aldre", "0-74 år"]
+
+ANDEL_TERMS = ["andel", "prosent", "percent"]
+
+_YEAR_PATTERN = re.compile(r"^(\d{4})(?:[-/](\d{4}))?$")
+_LEADING_NUMBER = re.compile(r"\d+")
+
+# Cache for kommunekategoriene, slik at de kun beregnes én gang per prosess
+_kommune_categories = None
+
+
+## Hjelpefunksjoner for å jobbe på unike verdier i stedet for alle rader
+
+
+def map_unique_values(series, func):
+    """
+    Applies a function to each unique value of a Series and broadcasts the result back.
+
+    FHI/SSB-kolonner som Kommune, Kjønn og Alder har svært få unike verdier sammenlignet med
+    antall rader, så funksjonen kalles kun én gang per unike verdi.
+
+    Args:
+        series (pd.Series): Series to transform.
+        func (callable): Function applied to every unique, non-missing value.
+
+    Returns:
+        pd.Series: Transformed Series with the same index as the input. Missing values stay missing.
+    """
+    codes, uniques = pd.factorize(series)
+    mapped = np.array([func(value) for value in uniques] + [np.nan], dtype=object)
+    # Code -1 (missing) points to the trailing NaN
+    result = pd.Series(mapped[codes], index=series.index, name=series.name)
+    return result.infer_objects()
+
+
+def _move_columns_after(df, columns, anchor):
+    """Return df with the given columns placed directly after the anchor column."""
+    cols = [col for col in df.columns if col not in columns]
+    idx = cols.index(anchor)
+    return df[cols[: idx + 1] + list(columns) + cols[idx + 1 :]]
+
+
+## Funksjon for å hente kommunekategorier (sorteringsrekkefølge) fra KLASS-metadata
+
+
+def get_kommune_categories():
+    """
+    Returns the precomputed SortKommune order based on the current KLASS kommune snapshot (klass_functions).
+
+    Order: "Telemark", "Hele landet", all kommuner alphabetically, then "Bø" and "Sauherad".
+
+    Returns:
+        list: Kommune names in sort order.
+    """
+    global _kommune_categories
+    if _kommune_categories is None:
+        # Flerspråklige navn ("Oslo - Oslove") er forkortet til det norske navnet, slik FHI/SSB bruker dem
+        names = get_snapshot("kommune")["codes"]["simple_name"]
+        regular = sorted(set(names) - set(KOMMUNE_SORT_FIRST) - set(KOMMUNE_SORT_LAST))
+        _kommune_categories = KOMMUNE_SORT_FIRST + regular + KOMMUNE_SORT_LAST
+    return _kommune_categories
+
+
+## Funksjoner for sorteringskolonner
+
+
+def kommune_sort_order(series):
+    """
+    Computes SortKommune for a Series of kommune names using categorical codes.
+
+    "Telemark" is always 1 and "Hele landet" always 2. Remaining kommuner present in the data are
+    numbered consecutively from 3 in alphabetical order, with "Bø" and "Sauherad" last.
+
+    Args:
+        series (pd.Series): Kommune names.
+
+    Returns:
+        pd.Series: Sort numbers (int64, or float64 if the Series contains missing values).
+    """
+    categories = get_kommune_categories()
+    cat = pd.Categorical(series, categories=categories)
+
+    # Names not found in the metadata (e.g. aggregates) are merged into the alphabetical part
+    unknown = pd.unique(series[(cat.codes == -1) & series.notna()])
+    if len(unknown):
+        fixed = set(KOMMUNE_SORT_FIRST) | set(KOMMUNE_SORT_LAST)
+        regular = sorted((set(categories) | set(unknown)) - fixed)
+        categories = KOMMUNE_SORT_FIRST + regular + KOMMUNE_SORT_LAST
+        cat = pd.Categorical(series, categories=categories)
+
+    codes = cat.codes
+    present = np.zeros(len(categories), dtype=bool)
+    present[codes[codes >= 0]] = True
+    present[: len(KOMMUNE_SORT_FIRST)] = True  # Telemark/Hele landet beholder alltid 1 og 2
+    dense_rank = np.cumsum(present)
+
+    result = pd.Series(
+        np.where(codes >= 0, dense_rank[codes], np.nan),
+        index=series.index,
+        name="SortKommune",
+    )
+    if result.notna().all():
+        result = result.astype("int64")
+    return result
+
+
+def alder_sort_order(series):
+    """
+    Computes SortAlder for a Series of age groups.
+
+    "Alle aldre" and "0-74 år" come first, then the remaining groups ordered by their lower bound.
+    Groups without a numeric lower bound are placed last (in order of appearance). Open-ended
+    groups like "75+ år" are ordered by their number.
+
+    Args:
+        series (pd.Series): Age group labels, e.g. "0-74 år", "45-74 år".
+
+    Returns:
+        pd.Series: Sort numbers.
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = list(uniques)
+
+    ordered = [a for a in ALDER_SORT_FIRST if a in uniques]
+    remaining = sorted(
+        [a for a in uniques if a not in ordered],
+        key=lambda x: (int(_LEADING_NUMBER.match(x).group()) if _LEADING_NUMBER.match(x) else 999),
+    )
+    rank = {value: i + 1 for i, value in enumerate(ordered + remaining)}
+
+    lookup = np.array([rank[value] for value in uniques] + [np.nan], dtype=float)
+    result = pd.Series(lookup[codes], index=series.index, name="SortAlder")
+    if result.notna().all():
+        result = result.astype("int64")
+    return result
+
+
+def kjonn_sort_order(series):
+    """
+    Computes SortKjonn for a Series of gender labels ("Kjønn samlet" = 1, menn = 2, kvinner = 3).
+
+    Args:
+        series (pd.Series): Capitalized gender labels.
+
+    Returns:
+        pd.Series: Sort numbers (NaN for unknown labels).
+    """
+    return map_unique_values(series, lambda x: KJONN_SORT.get(x, np.nan)).rename("SortKjonn")
+
+
+## Funksjoner for å tolke År- og Skoleår-kolonner
+
+
+def parse_year_column(series):
+    """
+    Vectorized parser for FHI/SSB year columns.
+
+    Handles single years ("2023") and intervals ("2013-2016" or "2013/2016"). Only the unique values
+    are parsed with a regex; the result is broadcast back to all rows.
+
+    Args:
+        series (pd.Series): Year values as strings or integers.
+
+    Returns:
+        tuple: (kind, end_year) where kind is "single", "interval" or None (mixed/unrecognized values),
+               and end_year is a Series with the last year as "YYYY-01-01" (None if kind is None).
+    """
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0 or (codes == -1).any():
+        return None, None
+
+    parsed = pd.Index(uniques).astype(str).str.extract(_YEAR_PATTERN)
+    if parsed[0].isna().any():
+        return None, None
+
+    if parsed[1].notna().all():
+        kind, end_years = "interval", parsed[1]
+    elif parsed[1].isna().all():
+        kind, end_years = "single", parsed[0]
+    else:
+        return None, None
+
+    dates = (end_years + "-01-01").to_numpy(dtype=object)
+    return kind, pd.Series(dates[codes], index=series.index, name=series.name)
+
+
+def parse_skoleaar_column(series):
+    """
+    Vectorized parser for FHI school year columns (e.g. "2022/23-2024/25" or "2024/25").
+
+    Args:
+        series (pd.Series): Skoleår values.
+
+    Returns:
+        tuple: (aar, skoleaar_slutt) where aar is the first calendar year of the last school year
+               as "YYYY-01-01", and skoleaar_slutt is the last school year (e.g. "2024/25").
+    """
+    slutt = map_unique_values(series, lambda x: str(x).split("-")[-1])
+    aar = map_unique_values(slutt, lambda x: f"{x[:4]}-01-01")
+    return aar.rename("År"), slutt.rename("Skoleår_slutt")
+
+
+def detect_value_column_name(series):
+    """
+    Returns "Andel" if any Måltall value refers to a share/percentage, otherwise "Antall".
+
+    Args:
+        series (pd.Series): The Måltall column.
+
+    Returns:
+        str: "Andel" or "Antall".
+    """
+    uniques = pd.unique(series.dropna())
+    for value in uniques:
+        value = str(value).lower()
+        if any(term in value for term in ANDEL_TERMS):
+            return "Andel"
+    return "Antall"
+
+
+## Funksjon for standard FHI-transformasjoner
+
+
+def standard_fhi_transformations(df, categorical=False):
+    """
+    Applies the standard FHI transformations used by the generated FHI scripts.
+
+    Steps:
+    1. Skoleår -> "År" (YYYY-01-01) and "Skoleår_slutt"
+    2. År intervals -> "År (intervall)" + "År"; single years -> YYYY-01-01
+    3. Capitalizes Kjønn and Alder
+    4. Renames "value" to "Andel"/"Antall" based on Måltall (Andel divided by 100)
+    5. Adds SortKjonn, SortAlder and SortKommune (Geografi is renamed to Kommune)
+
+    Args:
+        df (pd.DataFrame): Raw FHI data as returned by fetch_data.
+        categorical (bool): If True, Kommune, Kjønn and Alder are returned as categorical dtypes
+                            (ordered like their sort columns) to save memory. Defaults to False,
+                            which keeps plain string columns for CSV output and GitHub comparison.
+
+    Returns:
+        pd.DataFrame: Transformed DataFrame.
+    """
+    df = df.copy()
+
+    # Handle Skoleår column: keep as-is, create "År" and "Skoleår_slutt" directly after it
+    if "Skoleår" in df.columns:
+        df["År"], df["Skoleår_slutt"] = parse_skoleaar_column(df["Skoleår"])
+        df = _move_columns_after(df, ["År", "Skoleår_slutt"], "Skoleår")
+
+    # Convert År to YYYY-01-01. Intervals are kept in "År (intervall)"
+    if "År" in df.columns:
+        kind, end_year = parse_year_column(df["År"])
+        if kind == "interval":
+            df = df.rename(columns={"År": "År (intervall)"})
+            df["År"] = end_year
+            df = _move_columns_after(df, ["År"], "År (intervall)")
+        elif kind == "single":
+            df["År"] = end_year
+
+    # Capitalize first letter in Kjønn and Alder
+    for col in ["Kjønn", "Alder"]:
+        if col in df.columns:
+            df[col] = map_unique_values(df[col], lambda x: x.capitalize() if isinstance(x, str) else x)
+
+    # Determine value column name based on Måltall content
+    value_col_name = "Antall"
+    if "Måltall" in df.columns:
+        value_col_name = detect_value_column_name(df["Måltall"])
+
+    # Replace ":" with empty string and process value column
+    if "value" in df.columns:
+        df["value"] = df["value"].replace(":", "")
+        df["value"] = pd.to_numeric(df["value"], errors="coerce").round(1)
+        df = df.rename(columns={"value": value_col_name})
+
+    # Divide by 100 for Andel columns (named "Andel" or "Andel (YYYY)")
+    for col in df.columns:
+        if col == "Andel" or (col.startswith("Andel (") and col.endswith(")")):
+            df[col] = df[col] / 100
+
+    # Sort columns are only added when there is something to sort
+    if "Kjønn" in df.columns and df["Kjønn"].nunique() > 1:
+        df["SortKjonn"] = kjonn_sort_order(df["Kjønn"])
+
+    if "Alder" in df.columns and df["Alder"].nunique() > 1:
+        df["SortAlder"] = alder_sort_order(df["Alder"])
+
+    if "Geografi" in df.columns:
+        df = df.rename(columns={"Geografi": "Kommune"})
+
+    if "Kommune" in df.columns:
+        df["SortKommune"] = kommune_sort_order(df["Kommune"])
+
+    if categorical:
+        df = to_sorted_categoricals(df)
+
+    return df
+
+
+def to_sorted_categoricals(df):
+    """
+    Converts Kommune, Kjønn and Alder to ordered categoricals, using the Sort* columns as order.
+
+    Args:
+        df (pd.DataFrame): DataFrame with (some of) the columns Kommune/SortKommune, Kjønn/SortKjonn,
+                           Alder/SortAlder.
+
+    Returns:
+        pd.DataFrame: DataFrame with categorical dimension columns.
+    """
+    df = df.copy()
+    for col, sort_col in [("Kommune", "SortKommune"), ("Kjønn", "SortKjonn"), ("Alder", "SortAlder")]:
+        if col not in df.columns:
+            continue
+        if sort_col in df.columns:
+            order = (
+                df[[col, sort_col]].drop_duplicates().sort_values([sort_col, col], kind="stable")[col].dropna()
+            )
+            categories = list(dict.fromkeys(order))
+        else:
+            categories = sorted(pd.unique(df[col].dropna()))
+        df[col] = pd.Categorical(df[col], categories=categories, ordered=True)
+    return df
@@ -1,17 +1,22 @@
 # utility_functions.py
 
 import requests
-from pyjstat import pyjstat
 import os
 import glob
+import tempfile
 from io import BytesIO
-import pandas as pd
 from Helper_scripts.github_functions import get_current_file
+from Helper_scripts.telemetry_functions import track_phase
+from Helper_scripts.artifact_functions import get_run_download_path
+from Helper_scripts.coalesce_functions import fetch_ssb_coalesced
 import time
 
+# pandas, numpy and pyjstat are imported in the functions that use them, so importing this module is fast
+
 ## Funksjon for å kjøre en spørring
 
 
+@track_phase("fetch")
 def fetch_data(
     url,
     payload=None,
@@ -20,6 +25,11 @@ def fetch_data(
     response_type="json",
     delimiter=";",
     encoding="ISO-8859-1",
+    usecols=None,
+    dtype=None,
+    row_filter=None,
+    chunksize=100_000,
+    run_cache=False,
 ):
     """
     Fetches data using POST or GET requests and processes the response as JSON or CSV.
@@ -33,11 +43,47 @@ def fetch_data(
     - delimiter (str): The delimiter for CSV data (default: ';').
     - encoding (str): The encoding for CSV data (default: 'ISO-8859-1').
 
+    CSV only (see read_csv_filtered). If any of these are given, the response is streamed to disk and parsed in
+    chunks, so only the selected rows and columns of a large file are kept in memory:
+    - usecols (list or None): Columns to read.
+    - dtype (dict or None): Dtypes per column, e.g. {"Kommunenummer": str}.
+    - row_filter (dict or callable or None): Rows to keep, e.g. {"Fylkesnummer": [8, 40]} (column -> allowed
+      values), or a function taking a chunk and returning a boolean mask.
+    - chunksize (int): Rows per chunk.
+    - run_cache (bool): Share the downloaded file with the other scripts in the master_script run (see
+      artifact_functions.get_run_download_path), so a file used by several scripts is downloaded once per run.
+
     Returns:
     - DataFrame: A Pandas DataFrame containing the response data if successful.
     """
 
     try:
+        if response_type == "csv" and (usecols or dtype or row_filter is not None or run_cache):
+            path, is_temporary = download_to_file(url, payload, run_cache)
+            try:
+                data = read_csv_filtered(
+                    path,
+                    delimiter=delimiter,
+                    encoding=encoding,
+                    usecols=usecols,
+                    dtype=dtype,
+                    row_filter=row_filter,
+                    chunksize=chunksize,
+                )
+            except Exception as e:
+                raise ValueError(f"Error processing CSV response for {query_name}: {e}")
+            finally:
+                if is_temporary:
+                    os.remove(path)
+            print(f"{query_name} CSV data loaded successfully ({len(data)} rows kept).")
+            return data
+
+        # SSB JSON-stat requests are shared with the other requests in the run (see coalesce_functions.py)
+        if response_type == "json":
+            data = fetch_ssb_coalesced(url, payload, query_name)
+            if data is not None:
+                return data
+
         # Make the request (POST if payload is provided, otherwise GET)
         if payload:
             response = requests.post(url, json=payload)
@@ -58,6 +104,8 @@ def fetch_data(
                     return data
                 else:
                     # If it looks like JSON-stat data, use pyjstat
+                    from pyjstat import pyjstat
+
                     dataset = pyjstat.Dataset.read(response.text)
                     print(f"{query_name} JSON-stat data loaded successfully.")
                     return dataset.write("dataframe")
@@ -69,6 +117,8 @@ def fetch_data(
         elif response_type == "csv":
             try:
                 # Load CSV data into a Pandas DataFrame
+                import pandas as pd
+
                 data = pd.read_csv(
                     BytesIO(response.content), delimiter=delimiter, encoding=encoding
                 )
@@ -89,6 +139,113 @@ def fetch_data(
         raise  # Re-raise the exception to propagate the error
 
 
+## Funksjoner for å laste ned og lese store CSV-filer i biter (kun utvalgte rader og kolonner)
+
+
+def download_to_file(url, payload=None, run_cache=False):
+    """
+    Streams a response to a file without holding it in memory.
+
+    With run_cache=True the file is stored in the run folder and reused if an earlier script in the same run
+    downloaded it. Otherwise a temporary file is used.
+
+    Returns:
+    - tuple: (path, is_temporary). Temporary files should be deleted by the caller.
+    """
+    path = get_run_download_path(url, payload) if run_cache else None
+    if path and os.path.exists(path):
+        print(f"Using {url} downloaded earlier in this run")
+        return path, False
+
+    is_temporary = path is None
+    if is_temporary:
+        handle, path = tempfile.mkstemp(suffix=".download", dir=os.environ.get("TEMP_FOLDER") or None)
+        os.close(handle)
+
+    if payload:
+        response = requests.post(url, json=payload, stream=True)
+    else:
+        response = requests.get(url, stream=True)
+    try:
+        response.raise_for_status()
+        # Written to a temporary name first, so other scripts never see a half-written download
+        partial_path = f"{path}.part"
+        with open(partial_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+        os.replace(partial_path, path)
+    except Exception:
+        if is_temporary and os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        response.close()
+    return path, is_temporary
+
+
+def _common_dtype(first, second):
+    """The dtype pandas would give a column that has both dtypes (numbers widen, anything else is object)."""
+    import numpy as np
+    import pandas as pd
+
+    if first == second:
+        return first
+    if pd.api.types.is_numeric_dtype(first) and pd.api.types.is_numeric_dtype(second) \
+            and not pd.api.types.is_bool_dtype(first) and not pd.api.types.is_bool_dtype(second):
+        return np.result_type(first, second)
+    return np.dtype(object)
+
+
+def read_csv_filtered(source, delimiter=";", encoding="ISO-8859-1", usecols=None, dtype=None, row_filter=None, chunksize=100_000):
+    """
+    Reads a CSV file in chunks, keeping only the selected columns and rows.
+
+    Columns get the dtype they would have had if the whole file had been read at once (e.g. a number column with
+    missing values outside the kept rows is still float), so the result matches filtering after pd.read_csv.
+
+    Parameters:
+    - source (str or file-like): Path or file object.
+    - delimiter (str): The delimiter (default: ';').
+    - encoding (str): The encoding (default: 'ISO-8859-1').
+    - usecols (list or None): Columns to read (default: all).
+    - dtype (dict or None): Dtypes per column.
+    - row_filter (dict or callable or None): {column: allowed values} or a function chunk -> boolean mask.
+    - chunksize (int): Rows per chunk.
+
+    Returns:
+    - DataFrame: The kept rows, with a new index.
+    """
+    import pandas as pd
+
+    kept = []
+    dtypes = {}
+    with pd.read_csv(
+        source, delimiter=delimiter, encoding=encoding, usecols=usecols, dtype=dtype, chunksize=chunksize
+    ) as reader:
+        for chunk in reader:
+            for column, column_dtype in chunk.dtypes.items():
+                dtypes[column] = _common_dtype(dtypes.get(column, column_dtype), column_dtype)
+
+            if callable(row_filter):
+                chunk = chunk[row_filter(chunk)]
+            elif row_filter:
+                mask = pd.Series(True, index=chunk.index)
+                for column, values in row_filter.items():
+                    mask &= chunk[column].isin(values)
+                chunk = chunk[mask]
+            if len(chunk):
+                kept.append(chunk)
+
+    if not kept:
+        return pd.DataFrame({column: pd.Series(dtype=column_dtype) for column, column_dtype in dtypes.items()})
+
+    df = pd.concat(kept, ignore_index=True)
+    for column, column_dtype in dtypes.items():
+        if column_dtype != object and df[column].dtype != column_dtype:
+            df[column] = df[column].astype(column_dtype)
+    return df
+
+
 ## Funksjon for å slette filer i Temp-mappen, unntatt "readme.txt" (Er Temp-mappen tom "forsvinner" den fra Github, noe som kan skape krøll.)
 
 
@@ -64,7 +64,7 @@ print("=" * 60)
 print("Step 1: Reading historical data")
 print("=" * 60)
 
-df_hist = download_github_file(f"{GITHUB_FOLDER}/{HISTORICAL_FILE}")
+df_hist = download_github_file(f"{GITHUB_FOLDER}/{HISTORICAL_FILE}", use_artifact_store=True, typed=True)
 
 if df_hist is None:
     raise RuntimeError(f"Could not download {HISTORICAL_FILE} from GitHub")
@@ -170,7 +170,7 @@ all_prediction_fylke = []
 
 for file_name in PREDICTION_FILES:
     print(f"\nProcessing: {file_name}")
-    df_pred = download_github_file(f"{GITHUB_FOLDER}/{file_name}")
+    df_pred = download_github_file(f"{GITHUB_FOLDER}/{file_name}", use_artifact_store=True, typed=True)
 
     if df_pred is None:
         print(f"  WARNING: Could not download {file_name}, skipping.")
@@ -1,11 +1,8 @@
 import os
 import re
-import time
-import requests
 import pandas as pd
-from pyjstat import pyjstat
 
-from Helper_scripts.utility_functions import fetch_data
+from Helper_scripts.pxweb_functions import search_tables, get_table_metadata, fetch_many
 from Helper_scripts.github_functions import handle_output_data
 
 script_name = os.path.basename(__file__)
@@ -28,39 +25,16 @@ TELEMARK_NAMES = [
 # The SSB search API does not return discontinued tables by default.
 # We use includeDiscontinued=true and a broad search query to find all tables.
 
-base_url = "https://data.ssb.no/api/pxwebapi/v2/tables"
-
-
-def search_ssb_tables(query, include_discontinued=True):
-    """Search SSB API with pagination, return list of table dicts."""
-    results = []
-    page = 1
-    while True:
-        params = {
-            "query": query,
-            "lang": "no",
-            "pagesize": 50,
-            "pageNumber": page,
-            "includeDiscontinued": str(include_discontinued).lower(),
-        }
-        r = requests.get(base_url, params=params)
-        r.raise_for_status()
-        data = r.json()
-        results.extend(data["tables"])
-        if page >= data["page"]["totalPages"]:
-            break
-        page += 1
-        time.sleep(0.3)
-    return results
-
+# Requests go through the PxWeb v2 client in Helper_scripts/pxweb_functions.py, which handles
+# SSB's rate limit (no fixed sleeps needed) and caches table metadata between runs.
 
 # Search for all framskriving tables (current + discontinued)
-all_tables_raw = search_ssb_tables("folkemengde framskrivingen")
+all_tables_raw = search_tables("folkemengde framskrivingen")
 print(f"Found {len(all_tables_raw)} tables via search (including discontinued)")
 
 # Also search without "framskrivingen" to catch the newest active tables
 # which don't have "(YYYY-framskrivingen)" in the title
-active_tables = search_ssb_tables("title:Framskrevet folkemengde", include_discontinued=False)
+active_tables = search_tables("title:Framskrevet folkemengde", include_discontinued=False)
 print(f"Found {len(active_tables)} active tables via title search")
 
 # Combine all unique tables
@@ -150,12 +124,9 @@ def get_era(first_period):
         return "pre2020"
 
 
-def get_telemark_info(table_id, first_period):
-    """Fetch metadata and extract Telemark-relevant region codes and codelist."""
-    meta_url = f"https://data.ssb.no/api/pxwebapi/v2/tables/{table_id}/metadata?lang=no"
-    r = requests.get(meta_url)
-    r.raise_for_status()
-    meta = r.json()
+def get_telemark_info(table_id, first_period, updated=None):
+    """Fetch metadata (cached per table version) and extract Telemark-relevant region codes and codelist."""
+    meta = get_table_metadata(table_id, updated)
 
     era = get_era(first_period)
     valid_prefixes = ERA_PREFIXES[era]
@@ -305,7 +276,7 @@ table_info = {}
 for t in regional_tables:
     tid = t["id"]
     print(f"Fetching metadata for table {tid}...")
-    info = get_telemark_info(tid, t["firstPeriod"])
+    info = get_telemark_info(tid, t["firstPeriod"], t.get("updated"))
     table_info[tid] = info
     print(
         f"  -> Era: {info['era']}, "
@@ -320,7 +291,6 @@ for t in regional_tables:
     if info["has_framskriv"]:
         print(f"  -> Has Framskriv dimension, codes: {info['framskriv_codes']}")
     print(f"  -> ContentsCode: {info['contents_codes']}")
-    time.sleep(0.3)  # Be polite to the API
 
 # ============================================================
 # Step 4: Query data from each table for:
@@ -334,8 +304,9 @@ for t in regional_tables:
 # - If not -> use direct region codes in valuecodes[Region]=...
 # - Kjønn is eliminated by not specifying it (default behavior in v2)
 # - Alder is broken down by functional age groups (agg_Funksjonell4 or agg_Funksjonell3)
+# The queries for all tables are collected first and then run concurrently (within SSB's rate limit).
 
-all_dfs = []
+queries_per_table = {}
 
 for t in regional_tables:
     tid = t["id"]
@@ -420,36 +391,41 @@ for t in regional_tables:
     )
     table_queries.append({"name": "Norge", "url": url_norge})
 
-    print(f"\nQuerying table {tid} ({t['firstPeriod']}-framskrivingen)...")
-
-    table_dfs = []
     for q in table_queries:
+        q["name"] = f"Framskriving {tid} - {q['name']}"
         print(f"  {q['name']}: {q['url'][:100]}...")
+    queries_per_table[tid] = table_queries
 
-        try:
-            df = fetch_data(
-                url=q["url"],
-                payload=None,
-                error_messages=error_messages,
-                query_name=f"Framskriving {tid} - {q['name']}",
-                response_type="json",
-            )
-
-            if df is not None and not df.empty:
-                # For Framskriv-style tables, move 'alternativ' into 'statistikkvariabel'
-                if has_framskriv and "alternativ" in df.columns:
-                    df["statistikkvariabel"] = df["alternativ"]
-                    df = df.drop(columns=["alternativ"])
-                table_dfs.append(df)
-                print(f"    -> Got {len(df)} rows")
-            else:
-                print(f"    -> No data returned")
-
-        except Exception as e:
-            print(f"    -> Error: {e}")
-            error_messages.append(f"Table {tid} ({q['name']}): {e}")
-
-        time.sleep(1.5)  # Avoid 429 rate limiting
+all_queries = [q for table_queries in queries_per_table.values() for q in table_queries]
+print(f"\nRunning {len(all_queries)} queries for {len(queries_per_table)} tables concurrently...")
+results = iter(fetch_many(all_queries, error_messages=error_messages))
+
+all_dfs = []
+
+for t in regional_tables:
+    tid = t["id"]
+    if tid not in queries_per_table:
+        continue
+    has_framskriv = table_info[tid]["has_framskriv"]
+
+    print(f"\nTable {tid} ({t['firstPeriod']}-framskrivingen):")
+
+    table_dfs = []
+    for q in queries_per_table[tid]:
+        df = next(results)
+
+        if isinstance(df, Exception):
+            # fetch_many has already added the error to error_messages
+            print(f"  {q['name']} -> Error: {df}")
+        elif df is not None and not df.empty:
+            # For Framskriv-style tables, move 'alternativ' into 'statistikkvariabel'
+            if has_framskriv and "alternativ" in df.columns:
+                df["statistikkvariabel"] = df["alternativ"]
+                df = df.drop(columns=["alternativ"])
+            table_dfs.append(df)
+            print(f"  {q['name']} -> Got {len(df)} rows")
+        else:
+            print(f"  {q['name']} -> No data returned")
 
     if table_dfs:
         df_table = pd.concat(table_dfs, ignore_index=True)
@@ -458,8 +434,6 @@ for t in regional_tables:
         all_dfs.append(df_table)
         print(f"  -> Combined: {len(df_table)} rows")
 
-    time.sleep(1.0)  # Be polite to the API
-
 print(f"\n--- Errors during fetching ---")
 if error_messages:
     for msg in error_messages:
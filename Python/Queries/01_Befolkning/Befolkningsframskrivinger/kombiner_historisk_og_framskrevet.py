@@ -13,12 +13,14 @@ error_messages = []
 
 # ============================================================
 # Step 1: Read historical and framskrevet data from GitHub
+#         (from the artifact store if the source scripts ran
+#         earlier in the same master_script run)
 # ============================================================
 
 github_folder = "Data/01_Befolkning/Befolkningsframskrivinger"
 
-df_hist = download_github_file(f"{github_folder}/befolkningsframskrivinger_historiske.csv")
-df_fram = download_github_file(f"{github_folder}/befolkningsframskrivinger_siste_tabell.csv")
+df_hist = download_github_file(f"{github_folder}/befolkningsframskrivinger_historiske.csv", use_artifact_store=True, typed=True)
+df_fram = download_github_file(f"{github_folder}/befolkningsframskrivinger_siste_tabell.csv", use_artifact_store=True, typed=True)
 
 if df_hist is None or df_fram is None:
     raise RuntimeError("Could not download one or both source files from GitHub.")
@@ -142,7 +144,7 @@ df_combined = df_combined.sort_values(
 df_combined = df_combined.drop(columns=["KommuneSort"])
 
 # Convert År to datetime format (YYYY-01-01)
-df_combined["År"] = pd.to_datetime(df_combined["År"], format="%Y").dt.strftime("%Y-%m-%d")
+df_combined["År"] = pd.to_datetime(df_combined["År"].astype(str), format="%Y").dt.strftime("%Y-%m-%d")
 
 # Reorder columns: Kommunenummer first
 df_combined = df_combined[["Kommunenummer", "Kommune", "Alder", "År", "Type", "Personer", "SortColumn"]]
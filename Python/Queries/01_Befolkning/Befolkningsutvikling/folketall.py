@@ -6,6 +6,7 @@ from pyjstat import pyjstat
 from Helper_scripts.utility_functions import fetch_data
 
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.klass_functions import telemark_kommuner
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -25,25 +26,7 @@ payload = {
       "code": "Region",
       "selection": {
         "filter": "agg:KommSummer",
-        "values": [
-          "K-4001",
-          "K-4003",
-          "K-4005",
-          "K-4010",
-          "K-4012",
-          "K-4014",
-          "K-4016",
-          "K-4018",
-          "K-4020",
-          "K-4022",
-          "K-4024",
-          "K-4026",
-          "K-4028",
-          "K-4030",
-          "K-4032",
-          "K-4034",
-          "K-4036"
-        ]
+        "values": [f"K-{kommunenummer}" for kommunenummer in telemark_kommuner()]
       }
     },
     {
@@ -1,8 +1,9 @@
 import os
 import pandas as pd
 
-from Helper_scripts.utility_functions import fetch_data
+from Helper_scripts.od_functions import fetch_od_matrix, od_to_dataframe, aggregate_od_to_fylke
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.klass_functions import telemark_kommuner, simplify_name, map_fylke_names, fylke_names
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -12,36 +13,22 @@ error_messages = []
 
 # ============================================================
 # Step 1: Query flytting til og fra Telemark-kommuner (table 13864)
-#         Fraflyttingsregion x TilflyttRegion for all
-#         Telemark municipalities, latest year.
+#         Two narrow queries (Telemark x alle kommuner and
+#         alle kommuner x Telemark) instead of the full national
+#         kommune x kommune matrix, latest year.
 # ============================================================
 
-TELEMARK_KOMMUNER = [
-    "Porsgrunn", "Skien", "Notodden", "Siljan", "Bamble", "Kragerø",
-    "Drangedal", "Nome", "Midt-Telemark", "Seljord", "Hjartdal", "Tinn",
-    "Kviteseid", "Nissedal", "Fyresdal", "Tokke", "Vinje",
-]
-
-GET_URL = (
-    "https://data.ssb.no/api/pxwebapi/v2/tables/13864/data?lang=no"
-    "&outputFormat=json-stat2"
-    "&valuecodes[ContentsCode]=*"
-    "&valuecodes[Tid]=top(1)"
-    "&valuecodes[Fraflyttingsregion]=*"
-    "&codelist[Fraflyttingsregion]=agg_KommGjeldende"
-    "&valuecodes[TilflyttRegion]=*"
-    "&codelist[TilflyttRegion]=agg_KommGjeldende"
-    "&heading=ContentsCode,Tid,TilflyttRegion"
-    "&stub=Fraflyttingsregion"
-)
+TELEMARK_KOMMUNER = telemark_kommuner()
 
 try:
-    df = fetch_data(
-        url=GET_URL,
-        payload=None,
+    od = fetch_od_matrix(
+        table_id="13864",
+        origin_dimension="Fraflyttingsregion",
+        destination_dimension="TilflyttRegion",
+        region_codes=list(TELEMARK_KOMMUNER),
+        codelist="agg_KommGjeldende",
         error_messages=error_messages,
         query_name="Flytting til og fra Telemark-kommuner",
-        response_type="json",
     )
 except Exception as e:
     print(f"Error occurred: {e}")
@@ -49,82 +36,13 @@ except Exception as e:
         "A critical error occurred during data fetching, stopping execution."
     )
 
-print(f"Raw data: {len(df)} rows")
-print(f"  Columns: {list(df.columns)}")
-print(df.head(10))
+print(f"Non-zero flows touching Telemark: {len(od['value'])} ({od['time']})")
 
 # ============================================================
-# Step 2: Load kommunenummer mapping
+# Step 2: Load metadata (koordinater; kommune- og fylkesnavn
+#         come from Helper_scripts.klass_functions)
 # ============================================================
 
-# Read kommuneinndeling metadata to get kommunenummer for each kommune name
-metadata_path = os.path.join(
-    os.environ["PYTHONPATH"],
-    "..",
-    "Python",
-    "Metadata",
-    "ssb_klass_kommuneinndeling_2026.csv",
-)
-df_komm = pd.read_csv(metadata_path, sep=";", dtype=str, encoding="latin-1")
-
-# Mapping to standardize multi-part SSB/Sami kommune names to Norwegian names
-name_replacements = {
-    # Remove last part (keep first)
-    "Oslo - Oslove": "Oslo",
-    "Trondheim - Tråante": "Trondheim",
-    "Sortland - Suortá": "Sortland",
-    "Nordreisa - Ráisa - Raisi": "Nordreisa",
-    "Hammerfest - Hámmerfeasta": "Hammerfest",
-    "Steinkjer - Stïentje": "Steinkjer",
-    "Namsos - Nåavmesjenjaelmie": "Namsos",
-    "Rana - Raane": "Rana",
-    "Fauske - Fuossko": "Fauske",
-    "Evenes - Evenássi": "Evenes",
-    "Harstad - Hárstták": "Harstad",
-    "Levanger - Levangke": "Levanger",
-    "Porsanger - Porsángu - Porsanki": "Porsanger",
-    "Gratangen - Rivtták": "Gratangen",
-    "Røros - Rosse": "Røros",
-    "Sørfold - Fuolldá": "Sørfold",
-    "Lyngen - Ivgu - Yykeä": "Lyngen",
-    "Storfjord - Omasvuotna - Omasvuono": "Storfjord",
-    # Remove first part (keep last)
-    "Dielddanuorri - Tjeldsund": "Tjeldsund",
-    "Deatnu - Tana": "Tana",
-    "Guovdageaidnu - Kautokeino": "Kautokeino",
-    "Aarborte - Hattfjelldal": "Hattfjelldal",
-    "Hábmer - Hamarøy": "Hamarøy",
-    "Kárásjohka - Karasjok": "Karasjok",
-    "Kárá?johka - Karasjok": "Karasjok",
-    "Loabák - Lavangen": "Lavangen",
-    "Raarvihke - Røyrvik": "Røyrvik",
-    "Snåase - Snåsa": "Snåsa",
-    "Unjárga - Nesseby": "Nesseby",
-    # Remove first and last part (keep middle)
-    "Gáivuotna - Kåfjord - Kaivuono": "Kåfjord",
-}
-
-# Clean metadata names: apply replacements, then fall back to first part before ' - '
-df_komm["name_clean"] = df_komm["name"].replace(name_replacements)
-still_multipart = df_komm["name_clean"].str.contains(" - ", na=False)
-df_komm.loc[still_multipart, "name_clean"] = (
-    df_komm.loc[still_multipart, "name_clean"].str.split(" - ").str[0].str.strip()
-)
-
-# Create a mapping from kommune name to kommunenummer (code)
-komm_map = dict(zip(df_komm["name_clean"], df_komm["code"]))
-
-# Read fylkesinndeling metadata to map kommunenummer prefix to county name
-fylke_path = os.path.join(
-    os.environ["PYTHONPATH"],
-    "..",
-    "Python",
-    "Metadata",
-    "ssb_klass_fylkesinndeling_2026.csv",
-)
-df_fylke = pd.read_csv(fylke_path, sep=";", dtype=str, encoding="utf-8-sig")
-fylke_map = dict(zip(df_fylke["code"], df_fylke["name"]))
-
 # Read coordinates for each kommune (mean centroid)
 coord_path = os.path.join(
     os.environ["PYTHONPATH"],
@@ -140,35 +58,20 @@ df_coord = pd.read_csv(coord_path, sep=",", dtype={"kommunenummer": str})
 # Step 3: Clean and reshape the data
 # ============================================================
 
-# Filter: keep only rows where fra OR til is a Telemark kommune
-is_fra_telemark = df["fraflyttingsregion"].isin(TELEMARK_KOMMUNER)
-is_til_telemark = df["tilflyttingsregion"].isin(TELEMARK_KOMMUNER)
-df = df[is_fra_telemark | is_til_telemark].copy()
+# Sparse OD structure -> long DataFrame (one row per non-zero flow, with kommunenummer from SSB)
+df = od_to_dataframe(od, origin_column="Fra kommune", destination_column="Til kommune", value_column="Antall")
+df.insert(0, "År", od["time"])
 
-print(f"\nAfter filtering to Telemark: {len(df)} rows")
-print(f"  Unique fraflyttingsregion: {sorted(df['fraflyttingsregion'].unique())}")
-print(f"  Unique tilflyttingsregion: {sorted(df['tilflyttingsregion'].unique())}")
+print(f"  Unique Fra kommune: {df['Fra kommune'].nunique()}")
+print(f"  Unique Til kommune: {df['Til kommune'].nunique()}")
 
-# Rename columns
-df = df.rename(columns={
-    "fraflyttingsregion": "Fra kommune",
-    "tilflyttingsregion": "Til kommune",
-    "statistikkvariabel": "Statistikkvariabel",
-    "år": "År",
-    "value": "Antall",
-})
-
-# Clean kommune names using the name_replacements dict defined in Step 2
-df["Fra kommune"] = df["Fra kommune"].replace(name_replacements)
-df["Til kommune"] = df["Til kommune"].replace(name_replacements)
-
-# Add kommunenummer for Fra and Til kommune
-df["Fra kommunenummer"] = df["Fra kommune"].map(komm_map)
-df["Til kommunenummer"] = df["Til kommune"].map(komm_map)
+# Multi-part SSB/Sami kommune names -> Norwegian names ("Oslo - Oslove" -> "Oslo")
+df["Fra kommune"] = df["Fra kommune"].map(simplify_name)
+df["Til kommune"] = df["Til kommune"].map(simplify_name)
 
 # Add county columns based on first 2 digits of kommunenummer
-df["Fra fylke"] = df["Fra kommunenummer"].str[:2].map(fylke_map)
-df["Til fylke"] = df["Til kommunenummer"].str[:2].map(fylke_map)
+df["Fra fylke"] = map_fylke_names(df["Fra kommunenummer"])
+df["Til fylke"] = map_fylke_names(df["Til kommunenummer"])
 
 # Merge coordinates for Fra kommune
 df = df.merge(
@@ -185,6 +88,10 @@ df = df.merge(
 )
 
 # Report kommuner missing coordinates (no matching kommunenummer in coordinates file)
+komm_map = {
+    **dict(zip(df["Fra kommune"], df["Fra kommunenummer"])),
+    **dict(zip(df["Til kommune"], df["Til kommunenummer"])),
+}
 missing_from = df[df["Fra lat"].isna()]["Fra kommune"].unique()
 missing_to = df[df["Til lat"].isna()]["Til kommune"].unique()
 missing_all = sorted(set(missing_from) | set(missing_to))
@@ -196,21 +103,20 @@ if missing_all:
 else:
     print("\nAll kommuner matched to coordinates.")
 
-# Drop statistikkvariabel if only one value
-if df["Statistikkvariabel"].nunique() == 1:
-    df = df.drop(columns=["Statistikkvariabel"])
+df["Antall"] = df["Antall"].astype(int)
 
-df["Antall"] = df["Antall"].fillna(0).astype(int)
+# Flytting mellom Telemark og de andre fylkene (aggregated to fylke level from the sparse OD structure)
+od_fylke = aggregate_od_to_fylke(od, fylke_names=fylke_names())
+df_fylke = od_to_dataframe(od_fylke, origin_column="Fra fylke", destination_column="Til fylke")
+print("\nFlytting mellom Telemark og andre fylker:")
+print(df_fylke[(df_fylke["Fra fylkenummer"] == "40") != (df_fylke["Til fylkenummer"] == "40")].to_string(index=False))
 
 # Split into two datasets:
 # 1) Fraflytting: rows where a Telemark kommune is the origin (Fra kommune)
 # 2) Tilflytting: rows where a Telemark kommune is the destination (Til kommune)
-df_fra = df[df["Fra kommune"].isin(TELEMARK_KOMMUNER)].copy()
-df_til = df[df["Til kommune"].isin(TELEMARK_KOMMUNER)].copy()
-
-# Remove rows with no flyttinger (Antall = 0)
-df_fra = df_fra[df_fra["Antall"] != 0]
-df_til = df_til[df_til["Antall"] != 0]
+# (The sparse OD structure only contains non-zero flows.)
+df_fra = df[df["Fra kommunenummer"].isin(TELEMARK_KOMMUNER)].copy()
+df_til = df[df["Til kommunenummer"].isin(TELEMARK_KOMMUNER)].copy()
 
 print(f"\nFraflytting fra Telemark-kommuner: {len(df_fra)} rows")
 print(df_fra.head(10))
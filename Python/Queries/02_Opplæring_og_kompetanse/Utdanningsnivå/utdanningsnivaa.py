@@ -5,6 +5,7 @@ from pyjstat import pyjstat
 
 # Import the utility functions from the Helper_scripts folder
 from Helper_scripts.utility_functions import fetch_data
+from Helper_scripts.pxweb_functions import clamp_tid_in_payload
 
 from Helper_scripts.github_functions import handle_output_data
 
@@ -117,39 +118,24 @@ payload = {
 
 ## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
 
-df_antall_2024_naa = None
-while df_antall_2024_naa is None and years_to_query:
-    try:
-        # Update payload with the current list of years to try
-        payload['query'][-1]['selection']['values'] = years_to_query
-
-        df_antall_2024_naa = fetch_data(
-            url=POST_URL,
-            payload=payload,  # The JSON payload for POST requests. If None, a GET request is used.
-            error_messages=error_messages,
-            query_name="Antall 2024 - NÅ",
-            response_type="json",  # The expected response type, either 'json' or 'csv'.
-        )
-        print(f"Successfully fetched data for years: {years_to_query}")
-
-    except Exception as e:
-        # Check if the error is a 400 Bad Request and there are years to remove
-        if "400 Client Error" in str(e) and len(years_to_query) > 1:
-            removed_year = years_to_query.pop()
-            print(f"Query failed for years up to {removed_year}. Retrying with years up to {years_to_query[-1]}.")
-            # If we successfully fall back from current year, explain this is normal
-            if removed_year == str(current_year):
-                print(f"NOTE: This error is perfectly normal - data for {removed_year} is not yet available in SSB. The script will continue with data up to {years_to_query[-1]}.")
-        else:
-            print(f"An unrecoverable error occurred: {e}")
-            raise RuntimeError("A critical error occurred during data fetching, stopping execution.")
+try:
+    # Limit the Tid selection to the years that exist in the table (years not yet published are left out).
+    # Raises if none of them exist, so no other period is fetched into this block.
+    payload = clamp_tid_in_payload(POST_URL, payload)
 
-# If df is still None after the loop, it means all attempts failed
-if df_antall_2024_naa is None:
-    error_msg = "Could not fetch data from SSB after multiple attempts."
-    print(error_msg)
-    error_messages.append(error_msg)
-    raise RuntimeError(error_msg)
+    df_antall_2024_naa = fetch_data(
+        url=POST_URL,
+        payload=payload,  # The JSON payload for POST requests. If None, a GET request is used.
+        error_messages=error_messages,
+        query_name="Antall 2024 - NÅ",
+        response_type="json",  # The expected response type, either 'json' or 'csv'.
+    )
+    print(f"Successfully fetched data for years: {payload['query'][-1]['selection']['values']}")
+except Exception as e:
+    print(f"Error occurred: {e}")
+    raise RuntimeError(
+        "A critical error occurred during data fetching, stopping execution."
+    )
 
 
 
@@ -463,39 +449,24 @@ payload = {
 
 ## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
 
-df_andel_2024_naa = None
-while df_andel_2024_naa is None and years_to_query:
-    try:
-        # Update payload with the current list of years to try
-        payload['query'][-1]['selection']['values'] = years_to_query
-
-        df_andel_2024_naa = fetch_data(
-            url=POST_URL,
-            payload=payload,  # The JSON payload for POST requests. If None, a GET request is used.
-            error_messages=error_messages,
-            query_name="Andel 2024 - NÅ",
-            response_type="json",  # The expected response type, either 'json' or 'csv'.
-        )
-        print(f"Successfully fetched data for years: {years_to_query}")
-
-    except Exception as e:
-        # Check if the error is a 400 Bad Request and there are years to remove
-        if "400 Client Error" in str(e) and len(years_to_query) > 1:
-            removed_year = years_to_query.pop()
-            print(f"Query failed for years up to {removed_year}. Retrying with years up to {years_to_query[-1]}.")
-            # If we successfully fall back from current year, explain this is normal
-            if removed_year == str(current_year):
-                print(f"NOTE: This error is perfectly normal - data for {removed_year} is not yet available in SSB. The script will continue with data up to {years_to_query[-1]}.")
-        else:
-            print(f"An unrecoverable error occurred: {e}")
-            raise RuntimeError("A critical error occurred during data fetching, stopping execution.")
-
-# If df is still None after the loop, it means all attempts failed
-if df_andel_2024_naa is None:
-    error_msg = "Could not fetch data from SSB after multiple attempts."
-    print(error_msg)
-    error_messages.append(error_msg)
-    raise RuntimeError(error_msg)
+try:
+    # Limit the Tid selection to the years that exist in the table (years not yet published are left out).
+    # Raises if none of them exist, so no other period is fetched into this block.
+    payload = clamp_tid_in_payload(POST_URL, payload)
+
+    df_andel_2024_naa = fetch_data(
+        url=POST_URL,
+        payload=payload,  # The JSON payload for POST requests. If None, a GET request is used.
+        error_messages=error_messages,
+        query_name="Andel 2024 - NÅ",
+        response_type="json",  # The expected response type, either 'json' or 'csv'.
+    )
+    print(f"Successfully fetched data for years: {payload['query'][-1]['selection']['values']}")
+except Exception as e:
+    print(f"Error occurred: {e}")
+    raise RuntimeError(
+        "A critical error occurred during data fetching, stopping execution."
+    )
 
 # Process df_andel_2024_naa: filter most recent year and kjønn = "Begge kjønn"
 # Get the most recent year
@@ -14,6 +14,7 @@ import shutil
 # Import the utility functions from the Helper_scripts folder
 from Helper_scripts.utility_functions import delete_files_in_temp_folder, fetch_data
 from Helper_scripts.github_functions import upload_github_file, download_github_file, compare_to_github, handle_output_data
+from Helper_scripts.klass_functions import telemark_kommuner
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -98,10 +99,7 @@ try:
 
     # Process JSON data
     print("Processing JSON file...")
-    telemark_kommunenummer = [
-        "4001", "4003", "4005", "4010", "4012", "4014", "4016", "4018", "4020", 
-        "4022", "4024", "4026", "4028", "4030", "4032", "4034", "4036"
-    ]
+    telemark_kommunenummer = set(telemark_kommuner())
 
     # Read and filter JSON data
     with open(json_file_path, 'r', encoding='utf-8') as f:
@@ -10,6 +10,7 @@ from pyjstat import pyjstat
 # Import the utility functions from the Helper_scripts folder
 from Helper_scripts.utility_functions import delete_files_in_temp_folder
 from Helper_scripts.github_functions import upload_github_file, download_github_file, compare_to_github, handle_output_data
+from Helper_scripts.miljodirektoratet_functions import read_norskeutslipp_export
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -27,40 +28,11 @@ error_messages = []
 try:
     ### Kjøre spørring (Excel --> Pandas DataFrame)
 
-    # URL for the main page or the page that needs to be visited first
-    initial_url = "https://www.norskeutslipp.no/no/Komponenter/Utslipp/Klimagasser-CO2-ekvivalenter/?ComponentType=utslipp&ComponentPageID=1166&SectorID=600"
-
-    # URL for the Excel file
-    download_url = "https://www.norskeutslipp.no/Templates/NorskeUtslipp/Pages/exportTableData.aspx?PageID=1166&ComponentType=utslipp&exportType=temaexcel&epslanguage=no"
-
-    # Create a session object to persist cookies (her samles cookies og brukes automatisk videre)
-    session = requests.Session()
-
-    # Step 1: Send an initial request to the main page to establish the session
-    initial_response = session.get(initial_url)
-    if initial_response.status_code != 200:
-        raise ValueError(
-            f"Failed to access the initial page. Status code: {initial_response.status_code}"
-        )
-
-    # Step 2: Attempt to download the Excel file using the same session
-    response = session.get(download_url)
-
-    # Step 3: Check if the request was successful
-    if response.status_code == 200:
-        # Load the Excel file into pandas using the 'openpyxl' engine
-        excel_data = BytesIO(response.content)
-        try:
-            df_downloaded = pd.read_excel(excel_data, engine="openpyxl")
-        except Exception as e:
-            raise ValueError(f"Error reading Excel file: {e}")
-
-        # Display the DataFrame
-        # print(df_downloaded)
-    else:
-        raise ValueError(
-            f"Failed to download the file. Status code: {response.status_code}"
-        )
+    # Besøker nettsiden og laster ned eksporten i samme session (se miljodirektoratet_functions)
+    df_downloaded = read_norskeutslipp_export()
+
+    # Display the DataFrame
+    # print(df_downloaded)
 
 except Exception as e:
     error_message = f"An error occurred: {str(e)}"
@@ -133,8 +105,12 @@ df["År"] = df["År"].dt.year
 
 
 # Kolonne 2 (Mdir - industriutslipp) <--- Denne genereres fra det andre scriptet, "klimagassutslipp.py"
-url = "https://raw.githubusercontent.com/evensrii/Telemark/refs/heads/main/Data/04_Klima%20og%20ressursforvaltning/Klimagassutslipp/klimagassutslipp_telemark.csv"
-df_industri = pd.read_csv(url)
+# Read from the artifact store if klimagassutslipp.py ran earlier in the same run, otherwise from GitHub (typed sibling if available)
+df_industri = download_github_file("Data/04_Klima og ressursforvaltning/Klimagassutslipp/klimagassutslipp_telemark.csv", use_artifact_store=True, typed=True)
+if df_industri is None:
+    raise RuntimeError("Could not download klimagassutslipp_telemark.csv from GitHub.")
+df_industri["År"] = df_industri["År"].astype(int)
+df_industri["Utslipp"] = pd.to_numeric(df_industri["Utslipp"], errors="coerce")
 df_industri = df_industri[df_industri["Sektor"] == "Industri, olje og gass"]
 df_industri = df_industri.groupby("År")["Utslipp"].sum().reset_index()
 # convert "År" to datetime
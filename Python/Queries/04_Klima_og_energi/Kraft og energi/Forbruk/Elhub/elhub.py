@@ -8,6 +8,18 @@ import io
 import sys
 
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.partition_functions import (
+    partitions_available,
+    new_manifest,
+    read_manifest,
+    write_manifest,
+    latest_partition_time,
+    derived_is_current,
+    mark_derived,
+    append_partitions,
+    read_partitions,
+    compact_closed_months,
+)
 
 ## Get the GITHUB_TOKEN from the token.env file
 
@@ -50,6 +62,16 @@ BRANCH = "main"
 GITHUB_API_URL = "https://api.github.com"
 DATA_PATH = github_folder + "/"
 
+# Columns of the yearly CSV files, and the columns that identify a row
+CSV_COLUMNS = ["Knr", "Kommunenavn", "Tid", "Gruppe", "Forbruk (kWh)", "Antall målere"]
+KEY_COLUMNS = ["Knr", "Kommunenavn", "Tid", "Gruppe"]
+
+# Daily and monthly rollups per kommune and group, published next to the partitions
+ROLLUP_PATH = DATA_PATH + "rollups/"
+DAILY_ROLLUP = "forbruk_per_dag.csv"
+MONTHLY_ROLLUP = "forbruk_per_maaned.csv"
+LOCAL_TIMEZONE = "Europe/Oslo"
+
 # Function to get current timestamp
 def get_timestamp():
     return datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
@@ -75,7 +97,8 @@ def download_github_file(file_path):
         return None
 
 
-# Function to upload a file to GitHub
+# Function to upload a file to GitHub. Raises if the upload fails, so the manifest never records a file
+# (e.g. a rebuilt yearly CSV) that was not published.
 def upload_github_file(file_path, content, message="Updating data"):
     url = f"{GITHUB_API_URL}/repos/{REPO}/contents/{file_path}"
     headers = {
@@ -84,6 +107,9 @@ def upload_github_file(file_path, content, message="Updating data"):
     }
 
     response = requests.get(url, headers=headers)
+    if response.status_code not in (200, 404):
+        print(f"{get_timestamp()} Failed to check file on GitHub: {file_path}, Status Code: {response.status_code}")
+        response.raise_for_status()
     sha = response.json().get("sha") if response.status_code == 200 else None
 
     payload = {
@@ -99,7 +125,8 @@ def upload_github_file(file_path, content, message="Updating data"):
     if response.status_code in [201, 200]:
         print(f"{get_timestamp()} File uploaded successfully: {file_path}")
     else:
-        print(f"{get_timestamp()} Failed to upload file: {response.json()}")
+        print(f"{get_timestamp()} Failed to upload file: {response.text}")
+        response.raise_for_status()
 
 
 # Function to query the Elhub API for a specific date
@@ -282,9 +309,203 @@ def save_data_by_year_to_github(df):
     latest_commit_time = max(commit_times) if commit_times else None
     return files_updated, latest_commit_time
 
+## Partisjonert lagring (se Helper_scripts/partition_functions.py)
+#
+# The hourly data is stored as append-only monthly parquet partitions under <github_folder>/partitions. New days
+# are written as new partitions, and the yearly CSV files (used by the website and Power BI) are rebuilt from the
+# partitions of a year only when they have changed. Without pyarrow the script uses the yearly CSV files directly,
+# as before.
+
+
+def to_partition_frame(df):
+    """Typed rows for the partitions: UTC timestamps, and kommune and group as dictionary (category) columns."""
+    df = df[CSV_COLUMNS].copy()
+    df["Knr"] = pd.to_numeric(df["Knr"]).astype("int16")
+    df["Kommunenavn"] = df["Kommunenavn"].astype(str).astype("category")
+    df["Tid"] = pd.to_datetime(df["Tid"], utc=True)
+    df["Gruppe"] = df["Gruppe"].astype(str).astype("category")
+    df["Forbruk (kWh)"] = pd.to_numeric(df["Forbruk (kWh)"]).astype("float64")
+    df["Antall målere"] = pd.to_numeric(df["Antall målere"]).astype("Int32")
+    return df
+
+
+def to_yearly_csv_frame(df):
+    """The yearly CSV as it has been published (plain text columns, number of meters as float, sorted by time)."""
+    df = df.drop_duplicates(subset=KEY_COLUMNS)
+    df = df.astype({"Kommunenavn": str, "Gruppe": str, "Antall målere": "float64"})
+    return df.sort_values(["Tid", "Kommunenavn", "Gruppe"]).reset_index(drop=True)[CSV_COLUMNS]
+
+
+def load_partition_manifest():
+    """
+    Reads the partition manifest. The first time (no manifest yet) the yearly CSV files of the last years are
+    imported as partitions, so the CSV files already published are not rebuilt.
+    """
+    manifest = read_manifest(github_folder)
+    if manifest is not None:
+        return manifest
+
+    print(f"{get_timestamp()} No partitions found, importing the yearly CSV files")
+    manifest = new_manifest()
+    current_year = datetime.now().year
+    for year in range(current_year - 3, current_year + 1):
+        file_content = download_github_file(f"{DATA_PATH}{year}.csv")
+        if not file_content:
+            continue
+        df_year = clean_existing_data(pd.read_csv(io.StringIO(file_content)))
+        append_partitions(to_partition_frame(df_year), manifest, github_folder, temp_folder, "Tid", name="month")
+        mark_derived(manifest, f"{year}.csv", year)
+
+    write_manifest(manifest, github_folder, temp_folder)
+    return manifest
+
+
+def save_data_to_partitions(df, manifest):
+    """
+    Writes new days as partitions, compacts closed months and rebuilds the yearly CSV files whose partitions
+    changed. Returns the updated CSV files and the time of the last upload, like save_data_by_year_to_github.
+    """
+    df_typed = to_partition_frame(df.dropna(subset=["Tid"]))
+    append_partitions(df_typed, manifest, github_folder, temp_folder, "Tid")
+    compact_closed_months(manifest, github_folder, temp_folder, "Tid", before=df_typed["Tid"].max())
+
+    files_updated = []
+    commit_times = []
+    for year in sorted({partition["year"] for partition in manifest["partitions"]}):
+        file_name = f"{year}.csv"
+        if derived_is_current(manifest, file_name, year):
+            continue
+
+        df_year = to_yearly_csv_frame(read_partitions(manifest, github_folder, year=year))
+        upload_github_file(f"{DATA_PATH}{file_name}", df_year.to_csv(index=False), message=f"Updated {file_name}")
+        mark_derived(manifest, file_name, year)
+
+        files_updated.append(file_name)
+        commit_times.append(datetime.now())
+        print(f"{get_timestamp()} {file_name} rebuilt from {sum(p['year'] == year for p in manifest['partitions'])} partitions.")
+
+    files_updated += update_rollups(df_typed, manifest)
+
+    # The manifest is written last, so it never lists partitions that were not uploaded
+    write_manifest(manifest, github_folder, temp_folder)
+
+    # master_script reads "New data detected" from the output (the partition path does not use compare_to_github)
+    for file_name in files_updated:
+        print(f"{get_timestamp()} New data detected in {file_name} and pushed to GitHub.")
+
+    latest_commit_time = max(commit_times) if commit_times else None
+    return files_updated, latest_commit_time
+
+
+## Aggregerte tall per dag og måned
+#
+# rollups/forbruk_per_dag.csv and rollups/forbruk_per_maaned.csv hold the consumption per kommune and group per
+# day (Norwegian time) and month, so Power BI and the website do not have to aggregate the hourly files. They are
+# updated from the new hours only: the days in the new rows replace the same days in the daily file (each run
+# queries whole days, so processing a day again does not count it twice), and only the months with new days are
+# summed again, from the daily file. manifest["rollups"] records the last hour included.
+
+
+def daily_rollup(df):
+    """Consumption per day (Norwegian time), kommune and group, from typed hourly rows."""
+    dates = df["Tid"].dt.tz_convert(LOCAL_TIMEZONE).dt.strftime("%Y-%m-%d").rename("Dato")
+    daily = df.groupby([dates, "Knr", "Kommunenavn", "Gruppe"], observed=True).agg(
+        **{
+            "Forbruk (kWh)": ("Forbruk (kWh)", "sum"),
+            "Antall målere": ("Antall målere", "mean"),
+            "Timer": ("Tid", "count"),
+        }
+    )
+    return daily.reset_index().astype({"Kommunenavn": str, "Gruppe": str})
+
+
+def monthly_rollup(daily):
+    """Consumption per month, kommune and group, from the daily rollup."""
+    months = daily["Dato"].str[:7].rename("Måned")
+    monthly = daily.groupby([months, "Knr", "Kommunenavn", "Gruppe"]).agg(
+        **{
+            "Forbruk (kWh)": ("Forbruk (kWh)", "sum"),
+            "Antall målere": ("Antall målere", "mean"),
+            "Dager": ("Dato", "count"),
+        }
+    )
+    return monthly.reset_index()
+
+
+def replace_days(existing, new):
+    """
+    Replaces the days in new (all kommuner and groups) in the existing daily rollup.
+
+    Each run queries whole days, so the new rows of a day are all its hours. Replacing (not adding) keeps the
+    rollup right if the same days are processed again, e.g. after a run whose manifest upload failed.
+    """
+    if existing is None:
+        return new
+    daily = pd.concat([existing[~existing["Dato"].isin(new["Dato"])], new], ignore_index=True)
+    return daily.sort_values(["Dato", "Kommunenavn", "Gruppe"]).reset_index(drop=True)
+
+
+def replace_months(existing, new):
+    """Replaces the months in new (all kommuner and groups) in the existing monthly rollup."""
+    if existing is None:
+        return new
+    monthly = pd.concat([existing[~existing["Måned"].isin(new["Måned"])], new], ignore_index=True)
+    return monthly.sort_values(["Måned", "Kommunenavn", "Gruppe"]).reset_index(drop=True)
+
+
+def read_rollup(file_name):
+    file_content = download_github_file(f"{ROLLUP_PATH}{file_name}")
+    if not file_content:
+        return None
+    return pd.read_csv(io.StringIO(file_content), dtype={"Dato": str, "Måned": str, "Kommunenavn": str, "Gruppe": str})
+
+
+def update_rollups(df_typed, manifest):
+    """
+    Updates the daily and monthly rollups with new hourly rows (typed, see to_partition_frame).
+
+    The rollups are built from all partitions when they do not exist yet, or when the last run did not update
+    them (the new rows do not follow the last hour in manifest["rollups"]).
+
+    Returns:
+        list: The rollup files that were uploaded.
+    """
+    state = manifest.get("rollups", {})
+    existing_daily = read_rollup(DAILY_ROLLUP) if state.get("end") else None
+    first_new = df_typed["Tid"].min()
+
+    if existing_daily is None or pd.Timestamp(state["end"]) + pd.Timedelta(hours=1) < first_new:
+        print(f"{get_timestamp()} Building the rollups from all partitions")
+        rows = read_partitions(manifest, github_folder)
+        existing_daily, existing_monthly = None, None
+    else:
+        rows = df_typed
+        existing_monthly = read_rollup(MONTHLY_ROLLUP)
+
+    new_daily = daily_rollup(rows)
+    daily = replace_days(existing_daily, new_daily)
+
+    # Only the months with new days are summed again
+    changed_months = daily[daily["Dato"].str[:7].isin(new_daily["Dato"].str[:7].unique())]
+    monthly = replace_months(existing_monthly, monthly_rollup(changed_months))
+
+    upload_github_file(f"{ROLLUP_PATH}{DAILY_ROLLUP}", daily.to_csv(index=False), message=f"Updated {DAILY_ROLLUP}")
+    upload_github_file(f"{ROLLUP_PATH}{MONTHLY_ROLLUP}", monthly.to_csv(index=False), message=f"Updated {MONTHLY_ROLLUP}")
+    latest = rows["Tid"].max() if existing_daily is None else max(rows["Tid"].max(), pd.Timestamp(state["end"]))
+    manifest["rollups"] = {"end": latest.isoformat()}
+
+    print(f"{get_timestamp()} Rollups updated: {new_daily['Dato'].nunique()} days, {changed_months['Dato'].str[:7].nunique()} months.")
+    return [DAILY_ROLLUP, MONTHLY_ROLLUP]
+
+
 def query_and_append_new_data():
-    # Get the latest date from GitHub files
-    latest_date = get_latest_date_from_github()
+    # Get the latest date from the partitions (or from the yearly CSV files on GitHub without pyarrow)
+    manifest = load_partition_manifest() if partitions_available() else None
+    if manifest is not None:
+        latest_time = latest_partition_time(manifest)
+        latest_date = latest_time.date() if latest_time is not None else datetime(datetime.now().year - 3, 1, 1).date()
+    else:
+        latest_date = get_latest_date_from_github()
     print(f"{get_timestamp()} Latest date in GitHub files: {latest_date}")
 
     if latest_date:
@@ -309,8 +530,11 @@ def query_and_append_new_data():
                 combined_df = pd.concat(all_data, ignore_index=True)
                 # Process the data
                 processed_df = process_data(combined_df)
-                # Save to GitHub by year
-                files_updated, latest_commit_time = save_data_by_year_to_github(processed_df)
+                # Save to GitHub (new partitions and the yearly CSV files that changed)
+                if manifest is not None:
+                    files_updated, latest_commit_time = save_data_to_partitions(processed_df, manifest)
+                else:
+                    files_updated, latest_commit_time = save_data_by_year_to_github(processed_df)
                 
                 # Write status log
                 log_dir = os.environ.get("LOG_FOLDER", os.getcwd())
@@ -1,27 +1,20 @@
 # Import required libraries
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver import ActionChains
-from selenium.webdriver.chrome.options import Options
-import requests
-import sys
+from selenium.common.exceptions import TimeoutException
 import os
-import glob
-import io
-from io import BytesIO
-from io import StringIO
 import pandas as pd
-from pyjstat import pyjstat
-import time
 
 # Import the utility functions from the Helper_scripts folder
-from Helper_scripts.utility_functions import delete_files_in_temp_folder
-from Helper_scripts.github_functions import upload_github_file
-from Helper_scripts.github_functions import download_github_file
-from Helper_scripts.github_functions import compare_to_github
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.browser_functions import (
+    create_driver,
+    click_if_present,
+    export_session_state,
+    wait_for_dom_condition,
+    map_in_browsers,
+)
 
 # Set up environment variables
 file_name = "økologisk_tilstand_vann.csv"
@@ -32,587 +25,311 @@ task_name = "Klima og energi - Okologisk tilstand vann"
 if not os.environ.get("TEMP_FOLDER"):
     raise ValueError("TEMP_FOLDER environment variable is not set")
 
+# The page can be replaced by a saved local copy for testing, e.g. VANN_NETT_URL=file:///C:/.../vann-nett.html
+url = os.environ.get("VANN_NETT_URL", "https://vann-nett.no/waterbodies/factsheet/environmental-status")
+
+# One browser per vannkategori, run in parallel
+categories = ['Elv', 'Innsjø', 'Kystvann']
+max_browsers = int(os.environ.get("VANN_NETT_MAX_BROWSERS", len(categories)))
+
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
 
 # List to collect error messages during execution
 error_messages = []
 
-### Function to extract data from the surface water table
-
-
-def collect_water_body_data(water_body_name):
-    print(f"\nCollecting data for {water_body_name}...")
-    
-    # Add multiple retries for finding the table
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            # Force UTF-8 encoding in webdriver
-            driver.execute_script("document.charset='utf-8';")
-            
-            # Locate the table element using its class attribute
-            table = wait.until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//table[contains(@class, '_table_i0c5l_1')]")
-                )
-            )
-            
-            # Wait for table to be visible and interactable
-            wait.until(EC.visibility_of(table))
-            
-            # Additional wait to ensure table is fully loaded
-            driver.execute_script("return document.readyState") == "complete"
-            
-            # Wait until the table contains multiple rows (ensures the table is fully loaded)
-            rows = wait.until(lambda d: table.find_elements(By.XPATH, ".//tbody/tr"))
-            if len(rows) <= 3:
-                if attempt < max_retries - 1:
-                    print(f"Attempt {attempt + 1}: Table not fully loaded (only {len(rows)} rows). Retrying...")
-                    driver.refresh()
-                    time.sleep(2)  # Add small delay before retry
-                    continue
-                else:
-                    raise Exception(f"Table not fully loaded after {max_retries} attempts")
-            
-            
-
-            # Extract header names from the second row of <thead>
-            header_row = wait.until(
-                EC.presence_of_element_located((By.XPATH, ".//thead/tr[2]"))
-            )
-            header_names = [th.text for th in header_row.find_elements(By.TAG_NAME, "th")[:3]]
-            print(f"Headers found: {header_names}")
-            
-            # Extract data from the <tbody> section of the table
-            data_rows = table.find_elements(By.XPATH, ".//tbody/tr")
-            print(f"Number of rows found: {len(data_rows)}")
-            
-            data = []
-            for row in data_rows:
-                try:
-                    # Wait for row elements to be present
-                    wait.until(EC.presence_of_element_located((By.TAG_NAME, "th")))
-                    wait.until(EC.presence_of_all_elements_located((By.TAG_NAME, "td")))
-                    
-                    # Get the header (state) of the row
-                    row_header = row.find_element(By.TAG_NAME, "th").text.strip()
-                    if not row_header:
-                        print(f"Warning: Empty row header found, skipping row")
-                        continue
-                    
-                    # Get the first two data points in the row
-                    cells = row.find_elements(By.TAG_NAME, "td")[:2]
-                    first_two_data = [td.text.strip() for td in cells]
-                    
-                    # Handle dash values
-                    if first_two_data[1] == '-':
-                        # Try to get the value from the first column if second column is dash
-                        if first_two_data[0] != '-':
-                            try:
-                                count = int(first_two_data[0])
-                                total_rows = sum(int(row.find_elements(By.TAG_NAME, "td")[0].text.strip()) 
-                                               for row in data_rows 
-                                               if row.find_elements(By.TAG_NAME, "td")[0].text.strip() != '-')
-                                percentage = f"{(count/total_rows)*100:.1f} %"
-                                first_two_data[1] = percentage
-                            except (ValueError, ZeroDivisionError):
-                                first_two_data[1] = '0,0 %'
-                        else:
-                            first_two_data[1] = '0,0 %'
-                    
-                    # Verify we have valid data
-                    if len(first_two_data) < 2 or not all(x.strip() for x in first_two_data):
-                        print(f"Warning: Invalid data in row: {first_two_data}")
-                        continue
-                    
-                    print(f"Row data - Header: {row_header}, Values: {first_two_data}")
-                    data.append([row_header] + first_two_data)
-                except Exception as e:
-                    print(f"Error processing row: {str(e)}")
-                    continue
-            
-            if not data:
-                if attempt < max_retries - 1:
-                    print("No valid data collected. Retrying...")
-                    driver.refresh()
-                    time.sleep(2)  # Add small delay before retry
-                    continue
-                else:
-                    raise Exception("No valid data collected after all retries")
-            
-            # Create a DataFrame from the extracted data
-            df = pd.DataFrame(data, columns=["Tilstand"] + header_names[:2])
-            print(f"\nRaw DataFrame for {water_body_name}:")
-            print(df)
-            
-            # Drop the second column (optional step based on requirement)
-            df.drop(df.columns[1], axis=1, inplace=True)
-            
-            # Rename columns to include the specific water body name
-            df.columns = ["Tilstand", water_body_name]
-            
-            # Remove the last row (if necessary, for cleaning)
-            df = df[:-1]
-            
-            print(f"\nFinal DataFrame for {water_body_name}:")
-            print(df)
-            
-            return df
-            
-        except Exception as e:
-            print(f"Attempt {attempt + 1} failed: {str(e)}")
-            if attempt < max_retries - 1:
-                print("Refreshing page and retrying...")
-                driver.refresh()
-                time.sleep(2)  # Add small delay before retry
-                continue
-            else:
-                raise Exception(f"Failed to collect data for {water_body_name} after {max_retries} attempts")
-
-
-def clean_percentage(value):
-    """Clean percentage values by removing % symbol and converting comma to period."""
-    print(f"Cleaning value: {value} (type: {type(value)})")
-    if isinstance(value, str):
-        # Remove % symbol and whitespace
-        value = value.replace('%', '').strip()
-        # Convert comma to period
-        value = value.replace(',', '.')
-        try:
-            result = float(value)
-            print(f"Converted to: {result}")
-            return result
-        except ValueError:
-            print(f"Could not convert {value} to float, returning 0")
-            return 0
-    print(f"Value is not a string, returning as is: {value}")
-    return value
-
-
-# Store the default total when the page first loads
-default_total = None
-
-def get_table_total():
+TABLE_SELECTOR = "table[class*='_table_i0c5l_1']"
+TIMEOUT = 15
+
+# JavaScript (function bodies) evaluated in the page. They are re-checked by a MutationObserver each time the
+# page changes (see wait_for_dom_condition), so no fixed sleeps are needed.
+
+# Total in the "Alle" row of the table (thousands separators removed), or null if the table is not ready
+TABLE_TOTAL_JS = f"""
+const table = document.querySelector("{TABLE_SELECTOR}");
+if (!table) return null;
+const row = [...table.querySelectorAll('tbody tr')].find(tr => {{
+    const th = tr.querySelector('th');
+    return th && th.textContent.trim() === 'Alle';
+}});
+const cell = row && row.querySelector('td');
+if (!cell) return null;
+const total = parseInt(cell.textContent.replace(/[.\\s]/g, ''), 10);
+return Number.isNaN(total) ? null : total;
+"""
+
+# Headers (second header row) and the row header + first two cells of every body row, once the table has
+# more than 3 rows
+TABLE_CONTENT_JS = f"""
+const table = document.querySelector("{TABLE_SELECTOR}");
+if (!table) return null;
+const rows = [...table.querySelectorAll('tbody tr')];
+const headerRow = table.querySelectorAll('thead tr')[1];
+if (rows.length <= 3 || !headerRow) return null;
+return {{
+    headers: [...headerRow.querySelectorAll('th')].slice(0, 3).map(th => th.innerText.trim()),
+    rows: rows.map(tr => {{
+        const th = tr.querySelector('th');
+        return [th ? th.innerText.trim() : ''].concat([...tr.querySelectorAll('td')].slice(0, 2).map(td => td.innerText.trim()));
+    }}),
+}};
+"""
+
+
+# True once the filter panel is shown in Norwegian
+FILTERS_IN_NORWEGIAN_JS = "return [...document.querySelectorAll('span')].some(span => span.textContent.trim() === 'Fylke') || null;"
+
+
+def total_changed_js(previous_total):
+    """Condition that returns the table total once it differs from previous_total."""
+    previous = "null" if previous_total is None else int(previous_total)
+    return f"const total = (() => {{ {TABLE_TOTAL_JS} }})(); return total !== null && total !== {previous} ? total : null;"
+
+
+### Functions to prepare the page (cookie banners, messages, language)
+
+
+def prepare_session(driver):
     """
-    Gets the current total from the "Alle" row in the table.
-    Returns None if total cannot be retrieved.
+    Opens the page in one browser and goes through the cookie banner, operational messages, the welcome
+    window and the language menu. The resulting session (cookies and storage) is shared with the other browsers.
     """
+    driver.get(url)
+
+    if not click_if_present(driver, "//button[text()='Accept all']"):
+        print("No cookie banner appeared, continuing...")
+    if not click_if_present(driver, "//button[text()='Ok']", timeout=3):
+        print("Ingen driftsmeldinger dukket opp, continuing...")
+    if not click_if_present(driver, "//button[contains(@class, 'close')]", timeout=3):
+        print("No welcome window appeared, continuing...")
+
+    select_norwegian(driver)
+    return export_session_state(driver)
+
+
+def select_norwegian(driver):
+    """Changes the page language to Norwegian (bokmål), unless the filters are already in Norwegian."""
     try:
-        # Wait for table to be present and visible
-        table = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//table[contains(@class, '_table_i0c5l_1')]")
-        ))
-        
-        # Wait specifically for the "Alle" row
-        alle_row = wait.until(EC.presence_of_element_located(
-            (By.XPATH, "//table[contains(@class, '_table_i0c5l_1')]//tr[.//th[normalize-space()='Alle']]")
-        ))
-        
-        # Get the first td element in the Alle row
-        total_cell = alle_row.find_element(By.TAG_NAME, "td")
-        total_text = total_cell.text.strip()
-        
-        # Remove any thousands separators (periods) and convert to integer
-        try:
-            # Remove periods used as thousand separators and any spaces
-            cleaned_total = total_text.replace('.', '').replace(' ', '')
-            print(f"Converting total from '{total_text}' (cleaned: '{cleaned_total}')")
-            return int(cleaned_total)
-        except ValueError:
-            print(f"Could not convert total '{total_text}' (cleaned: '{cleaned_total}') to integer")
-            return None
-            
-    except Exception as e:
-        print(f"Error getting table total: {str(e)}")
-        return None
-
-def initialize_default_total():
-    """
-    Initialize the default total after Telemark has been selected.
-    Should be called only once after Telemark selection.
-    """
-    global default_total
-    default_total = get_table_total()
-    if default_total is None:
-        raise Exception("Could not establish default total after Telemark selection")
-    print(f"Default total established as: {default_total} after Telemark selection")
+        wait_for_dom_condition(driver, FILTERS_IN_NORWEGIAN_JS, timeout=5, description="Norwegian filters")
+        return
+    except TimeoutException:
+        pass
+    wait = WebDriverWait(driver, TIMEOUT)
+    wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, '_menuButton_13182_1')]"))).click()
+    wait.until(EC.element_to_be_clickable((By.XPATH, "//li[contains(text(), 'Norwegian (bokmål)')]"))).click()
+    wait.until(EC.presence_of_element_located((By.XPATH, "//span[normalize-space()='Fylke']")))
 
-def ensure_table_updated(expecting_default=False, max_retries=10, retry_delay=1):
-    """
-    Ensures the table has been fully updated after a category selection change.
-    
-    Args:
-        expecting_default (bool): True if we expect to see the default total (after unchecking)
-        max_retries (int): Maximum number of retry attempts
-        retry_delay (int): Delay in seconds between retries
-        
-    Returns:
-        bool: True if table is confirmed updated, False otherwise
-    """
-    global default_total
-    
-    # Verify default_total has been initialized
-    if default_total is None:
-        raise Exception("Default total not initialized. Must select Telemark first.")
-    
-    for attempt in range(max_retries):
-        try:
-            current_total = get_table_total()
-            
-            if current_total is None:
-                print(f"Attempt {attempt + 1}/{max_retries}: Could not get current total")
-                time.sleep(retry_delay)
-                continue
-                
-            if expecting_default:
-                # When unchecking, we expect to return to default total
-                if current_total == default_total:
-                    print(f"Table returned to default state (total: {current_total})")
-                    return True
-            else:
-                # When checking a category, we expect a different total than default
-                if current_total != default_total:
-                    print(f"Table updated with new total: {current_total} (different from default: {default_total})")
-                    return True
-            
-            print(f"Attempt {attempt + 1}/{max_retries}: Waiting for table update...")
-            time.sleep(retry_delay)
-            
-        except Exception as e:
-            print(f"Error checking table update (attempt {attempt + 1}): {str(e)}")
-            time.sleep(retry_delay)
-            
-    return False
-
-def safely_collect_data(water_body_name, label_xpath, error_messages):
-    """
-    Collects data for a given water body category and handles errors.
 
-    Parameters:
-        water_body_name (str): The name of the water body (e.g., "Elv", "Innsjø").
-        label_xpath (str): The XPath of the checkbox label for the water body.
-        error_messages (list): A list to append error messages.
+def select_filter_checkbox(driver, label_text):
+    """
+    Selects the checkbox belonging to a filter label (e.g. 'Telemark' or 'Elv').
 
     Returns:
-        pd.DataFrame or None: The collected DataFrame, or None if an error occurred.
+        bool: True if the checkbox was clicked, False if it was already selected (e.g. restored from the session).
     """
-    try:
-        print(f"\nCollecting data for {water_body_name}...")
-        
-        # Make sure Vannkategori is expanded
-        try:
-            vannkategori = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//span[normalize-space()='Vannkategori']")
-                )
-            )
-            
-            # Check if we need to expand by looking for visible checkboxes
-            checkboxes_visible = driver.find_elements(By.XPATH, "//label[contains(text(), 'Elv')]")
-            if not checkboxes_visible or not any(cb.is_displayed() for cb in checkboxes_visible):
-                vannkategori.click()
-                time.sleep(1)
-        except Exception as e:
-            print(f"Warning: Issue with Vannkategori section: {str(e)}")
-        
-        # Wait for and locate the label with retry
-        max_retries = 3
-        label = None
-        for attempt in range(max_retries):
-            try:
-                label = wait.until(EC.presence_of_element_located((By.XPATH, label_xpath)))
-                if label.is_displayed():
-                    break
-                time.sleep(1)
-            except Exception:
-                if attempt == max_retries - 1:
-                    raise Exception(f"Could not locate visible label for {water_body_name}")
-                time.sleep(1)
-        
-        # Get checkbox ID and locate checkbox
-        checkbox_id = label.get_attribute("for")
-        if not checkbox_id:
-            raise Exception(f"Could not get checkbox ID for {water_body_name}")
-        
-        # Try to find the checkbox both by ID and by following the label
-        try:
-            checkbox = wait.until(EC.presence_of_element_located((By.ID, checkbox_id)))
-        except:
-            # If ID fails, try finding the input associated with the label
-            checkbox = label.find_element(By.XPATH, "following-sibling::input[@type='checkbox']")
-        
-        # Ensure checkbox is not already selected
-        if checkbox.is_selected():
-            print(f"Warning: {water_body_name} checkbox was already selected, unchecking first")
-            driver.execute_script("arguments[0].click();", checkbox)
-            time.sleep(1)
-        
-        # Select the checkbox
-        print(f"Clicking checkbox for {water_body_name}")
-        driver.execute_script("arguments[0].click();", checkbox)
-        time.sleep(1)
-        
-        # Verify selection and retry if needed
-        if not checkbox.is_selected():
-            print(f"First click failed for {water_body_name}, retrying...")
-            driver.execute_script("arguments[0].click();", checkbox)
-            time.sleep(1)
-            
-            if not checkbox.is_selected():
-                raise Exception(f"Failed to select checkbox for {water_body_name} after retry")
-        
-        # Wait for table to update
-        print("Waiting for table to update...")
-        time.sleep(2)
-        
-        # Collect data
-        df = collect_water_body_data(water_body_name)
-        
-        # Uncheck after collection
-        if checkbox.is_selected():
-            driver.execute_script("arguments[0].click();", checkbox)
-            time.sleep(1)
-        
-        return df
-        
-    except Exception as e:
-        error_message = f"Failed to collect data for {water_body_name}: {str(e)}"
-        print(error_message)
-        error_messages.append(error_message)
-        return None
-
-try:
-    ########################## SETTING UP SELENIUM AND OPENING THE WEBSITE
+    wait = WebDriverWait(driver, TIMEOUT)
+    label = wait.until(EC.visibility_of_element_located((By.XPATH, f"//label[contains(text(), '{label_text}')]")))
+    checkbox = driver.find_element(By.ID, label.get_attribute("for"))
+    if checkbox.is_selected():
+        return False
+    driver.execute_script("arguments[0].click();", checkbox)
+    if not checkbox.is_selected():
+        raise Exception(f"Failed to select checkbox for {label_text}")
+    return True
 
-    options = Options()
-    options.add_argument("--headless=new")  # Run in headless mode
 
-    # Initialize the WebDriver
-    driver = webdriver.Chrome(options=options)
+### Function to collect one water category (runs in its own browser)
 
-    # Navigate to the webpage containing the water data
-    url = "https://vann-nett.no/waterbodies/factsheet/environmental-status"
-    driver.get(url)
 
-    # Set up an explicit wait for elements to load
-    wait = WebDriverWait(driver, 15)
+def collect_water_body_data(driver, water_body_name):
+    """
+    Selects Telemark and one water category and reads the table.
 
-    ########################## ACCEPT COOKIES
+    Every step waits for the table to change (a new total in the "Alle" row) instead of sleeping.
 
-    # Attempt to click the "Aksepter alle" button for cookie consent
-    try:
-        accept_all_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept all']"))
-        )
-        accept_all_button.click()
-    except:
-        print("No cookie banner appeared, continuing...")
+    Parameters:
+        driver (webdriver.Chrome): A browser with the shared session loaded.
+        water_body_name (str): The water category, e.g. "Elv".
 
-    ########################## GODTA DRIFTSMELDINGER
+    Returns:
+        pd.DataFrame: Columns "Tilstand" and water_body_name (percentages as text).
+    """
+    print(f"\nCollecting data for {water_body_name}...")
+    wait = WebDriverWait(driver, TIMEOUT)
+
+    select_norwegian(driver)
+    current_total_js = f"return (() => {{ {TABLE_TOTAL_JS} }})();"
+    total = wait_for_dom_condition(driver, current_total_js, TIMEOUT, "the table")
+
+    # Select Telemark and wait for the table to show the Telemark total
+    wait.until(EC.element_to_be_clickable((By.XPATH, "//span[normalize-space()='Fylke']"))).click()
+    if select_filter_checkbox(driver, "Telemark"):
+        total = wait_for_dom_condition(driver, total_changed_js(total), TIMEOUT, "the Telemark total")
+    print(f"{water_body_name}: default total after Telemark selection: {total}")
+
+    # Expand Vannkategori, select the category and wait for the table to update
+    wait.until(EC.element_to_be_clickable((By.XPATH, "//span[normalize-space()='Vannkategori']"))).click()
+    if select_filter_checkbox(driver, water_body_name):
+        total = wait_for_dom_condition(driver, total_changed_js(total), TIMEOUT, f"the {water_body_name} total")
+    print(f"{water_body_name}: table updated with new total: {total}")
+
+    content = wait_for_dom_condition(driver, TABLE_CONTENT_JS, TIMEOUT, "the table rows")
+    header_names = content["headers"]
+    print(f"Headers found: {header_names}")
+    print(f"Number of rows found: {len(content['rows'])}")
+
+    # Sum of the first column (counts), used when a percentage is shown as '-'
+    counts = [cells[1] for cells in content["rows"] if len(cells) > 1 and cells[1] != '-']
+
+    data = []
+    for cells in content["rows"]:
+        row_header, first_two_data = cells[0], cells[1:3]
+        if not row_header:
+            print(f"Warning: Empty row header found, skipping row")
+            continue
+        if len(first_two_data) < 2:
+            print(f"Warning: Invalid data in row: {first_two_data}")
+            continue
+
+        # Handle dash values
+        if first_two_data[1] == '-':
+            if first_two_data[0] != '-':
+                try:
+                    count = int(first_two_data[0])
+                    total_rows = sum(int(value) for value in counts)
+                    first_two_data[1] = f"{(count/total_rows)*100:.1f} %"
+                except (ValueError, ZeroDivisionError):
+                    first_two_data[1] = '0,0 %'
+            else:
+                first_two_data[1] = '0,0 %'
 
-    try:
-        driftsmeldinger_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, "//button[text()='Ok']"))
-        )
-        driftsmeldinger_button.click()
-    except:
-        print("Ingen driftsmeldinger dukket opp, continuing...")
+        # Verify we have valid data
+        if not all(x.strip() for x in first_two_data):
+            print(f"Warning: Invalid data in row: {first_two_data}")
+            continue
 
-    ########################## CLOSE WELCOME WINDOW
+        print(f"Row data - Header: {row_header}, Values: {first_two_data}")
+        data.append([row_header] + first_two_data)
 
-    try:
-        close_welcome_button = wait.until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//button[contains(@class, 'close')]")
-            )
-        )
-        close_welcome_button.click()
-    except:
-        print("No welcome window appeared, continuing...")
+    if not data:
+        raise Exception(f"No valid data collected for {water_body_name}")
 
-    ########################## PRESS LANGUAGE BUTTON
+    # Create a DataFrame from the extracted data
+    df = pd.DataFrame(data, columns=["Tilstand"] + header_names[:2])
 
+    # Drop the count column and name the percentage column after the water category
+    df.drop(df.columns[1], axis=1, inplace=True)
+    df.columns = ["Tilstand", water_body_name]
 
-    language_button = wait.until(
-        EC.element_to_be_clickable(
-            (By.XPATH, "//button[contains(@class, '_menuButton_13182_1')]")
-        )
-    )
-    language_button.click()
+    # Remove the last row (if necessary, for cleaning)
+    df = df[:-1]
 
+    print(f"\nFinal DataFrame for {water_body_name}:")
+    print(df)
+    return df
 
-    ########################## CHANGE LANGUAGE TO NORWEGIAN
-  
-    norwegian_button = wait.until(
-        EC.element_to_be_clickable(
-            (By.XPATH, "//li[contains(text(), 'Norwegian (bokmål)')]")
-        )
-    )
-    norwegian_button.click()
 
-    ########################## SELECT TELEMARK COUNTY
+try:
+    ########################## PREPARE A SHARED SESSION (COOKIES, MESSAGES, LANGUAGE)
 
+    driver = create_driver()
     try:
-        # First select Telemark
-        fylke = driver.find_element(By.XPATH, "//span[normalize-space()='Fylke']")
-        fylke.click()
-
-        telemark_label = wait.until(
-            EC.presence_of_element_located(
-                (By.XPATH, "//label[contains(text(), 'Telemark')]")
-            )
-        )
-        telemark_checkbox_id = telemark_label.get_attribute("for")
-        telemark_checkbox = driver.find_element(By.ID, telemark_checkbox_id)
+        session_state = prepare_session(driver)
+    finally:
+        driver.quit()
 
-        # Select Telemark if not already selected
-        if not telemark_checkbox.is_selected():
-            driver.execute_script("arguments[0].click();", telemark_checkbox)
-            time.sleep(2)  # Give time for the table to update after Telemark selection
+    ########################## COLLECT WATER CATEGORY DATA (ONE BROWSER PER CATEGORY, IN PARALLEL)
 
-        ########################## EXPAND VANNKATEGORI SECTION
+    results = map_in_browsers(
+        collect_water_body_data,
+        categories,
+        session_state=session_state,
+        url=url,
+        max_browsers=max_browsers,
+    )
 
-        # Click on the "Vannkategori" filter to expand the options
-        try:
-            vannkategori = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//span[normalize-space()='Vannkategori']")
+    data_frames = {}
+    for category, result in zip(categories, results):
+        if isinstance(result, Exception):
+            error_message = f"Failed to collect data for {category}: {str(result)}"
+            print(error_message)
+            error_messages.append(error_message)
+        else:
+            data_frames[category] = result
+
+    # Only proceed with data processing if we collected at least one dataset successfully
+    if data_frames:
+        # Combine all the collected dataframes
+        df_combined = pd.concat(data_frames.values(), keys=data_frames.keys())
+        df_combined.index.names = ['Vannkategori', 'Index']
+
+        # Reset index to make 'Vannkategori' a column
+        df_combined = df_combined.reset_index()
+        df_combined = df_combined.drop('Index', axis=1)
+
+        print("\nInitial combined DataFrame:")
+        print(df_combined)
+
+        # Create the pivoted dataframe
+        df_pivoted = pd.DataFrame()
+
+        # Process each water category
+        for category in categories:
+            category_data = df_combined[df_combined['Vannkategori'] == category].copy()
+            if not category_data.empty:
+                # Get the percentage values and clean them
+                values = category_data[category].apply(
+                    lambda x: float(str(x).replace('%', '').replace(',', '.').strip()) if pd.notnull(x) else 0.0
                 )
-            )
-            vannkategori.click()
-            time.sleep(1)  # Give time for the section to expand
-        except Exception as e:
-            raise Exception(f"Failed to expand Vannkategori section: {str(e)}")
-        
-        # Initialize the default total after Telemark is selected and Vannkategori is expanded
-        # Retry a few times if needed
-        max_retries = 5
-        for attempt in range(max_retries):
-            try:
-                initialize_default_total()
-                print("Successfully initialized default total")
-                break
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise Exception(f"Failed to initialize default total after {max_retries} attempts: {str(e)}")
-                print(f"Attempt {attempt + 1}/{max_retries} to initialize default total failed, retrying...")
-                time.sleep(2)
-
-        ########################## COLLECT WATER CATEGORY DATA
-
-        # Dictionary to store collected data
-        data_frames = {}
-        successful_collections = 0
-
-        # Collect data for "Elv"
-        df_elv = safely_collect_data(
-            "Elv", "//label[contains(text(), 'Elv')]", error_messages
+                # Create a dictionary with the values for each condition
+                row_data = {
+                    'Kategori': category,
+                    'Svært god': values[category_data['Tilstand'] == 'Svært god'].iloc[0],
+                    'God': values[category_data['Tilstand'] == 'God'].iloc[0],
+                    'Moderat': values[category_data['Tilstand'] == 'Moderat'].iloc[0],
+                    'Dårlig': values[category_data['Tilstand'] == 'Dårlig'].iloc[0],
+                    'Svært dårlig': values[category_data['Tilstand'] == 'Svært dårlig'].iloc[0]
+                }
+                df_pivoted = pd.concat([df_pivoted, pd.DataFrame([row_data])], ignore_index=True)
+
+        # Ensure the DataFrame is in the exact format requested
+        column_order = ['Kategori', 'Svært god', 'God', 'Moderat', 'Dårlig', 'Svært dårlig']
+        df_pivoted = df_pivoted[column_order]
+
+        # Round all numeric columns to 1 decimal place
+        numeric_columns = ['Svært god', 'God', 'Moderat', 'Dårlig', 'Svært dårlig']
+        df_pivoted[numeric_columns] = df_pivoted[numeric_columns].round(1)
+
+        # Sort categories in the desired order
+        category_order = {'Elv': 0, 'Innsjø': 1, 'Kystvann': 2}
+        df_pivoted['sort_order'] = df_pivoted['Kategori'].map(category_order)
+        df_pivoted = df_pivoted.sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
+
+        print(f"\nFinal pivoted DataFrame:")
+        print(df_pivoted.to_string())
+
+        # Call the function and get the "New Data" status
+        is_new_data = handle_output_data(
+            df_pivoted,
+            file_name,
+            github_folder,
+            os.environ.get("TEMP_FOLDER"),
+            keepcsv=True
         )
-        if df_elv is not None:
-            data_frames["Elv"] = df_elv
-            successful_collections += 1
 
-        # Collect data for "Innsjø"
-        df_innsjo = safely_collect_data(
-            "Innsjø", "//label[contains(text(), 'Innsjø')]", error_messages
-        )
-        if df_innsjo is not None:
-            data_frames["Innsjø"] = df_innsjo
-            successful_collections += 1
-
-        # Collect data for "Kystvann"
-        df_kystvann = safely_collect_data(
-            "Kystvann", "//label[contains(text(), 'Kystvann')]", error_messages
-        )
-        if df_kystvann is not None:
-            data_frames["Kystvann"] = df_kystvann
-            successful_collections += 1
-
-        # Only proceed with data processing if we collected at least one dataset successfully
-        if successful_collections > 0:
-            # Combine all the collected dataframes
-            df_combined = pd.concat(data_frames.values(), keys=data_frames.keys())
-            df_combined.index.names = ['Vannkategori', 'Index']
-            
-            # Reset index to make 'Vannkategori' a column
-            df_combined = df_combined.reset_index()
-            df_combined = df_combined.drop('Index', axis=1)
-            
-            print("\nInitial combined DataFrame:")
-            print(df_combined)
-            
-            # Create the pivoted dataframe
-            df_pivoted = pd.DataFrame()
-            
-            # Process each water category
-            categories = ['Elv', 'Innsjø', 'Kystvann']
-            for category in categories:
-                category_data = df_combined[df_combined['Vannkategori'] == category].copy()
-                if not category_data.empty:
-                    # Get the percentage values and clean them
-                    values = category_data[category].apply(
-                        lambda x: float(str(x).replace('%', '').replace(',', '.').strip()) if pd.notnull(x) else 0.0
-                    )
-                    # Create a dictionary with the values for each condition
-                    row_data = {
-                        'Kategori': category,
-                        'Svært god': values[category_data['Tilstand'] == 'Svært god'].iloc[0],
-                        'God': values[category_data['Tilstand'] == 'God'].iloc[0],
-                        'Moderat': values[category_data['Tilstand'] == 'Moderat'].iloc[0],
-                        'Dårlig': values[category_data['Tilstand'] == 'Dårlig'].iloc[0],
-                        'Svært dårlig': values[category_data['Tilstand'] == 'Svært dårlig'].iloc[0]
-                    }
-                    df_pivoted = pd.concat([df_pivoted, pd.DataFrame([row_data])], ignore_index=True)
-
-            # Ensure the DataFrame is in the exact format requested
-            column_order = ['Kategori', 'Svært god', 'God', 'Moderat', 'Dårlig', 'Svært dårlig']
-            df_pivoted = df_pivoted[column_order]
-
-            # Round all numeric columns to 1 decimal place
-            numeric_columns = ['Svært god', 'God', 'Moderat', 'Dårlig', 'Svært dårlig']
-            df_pivoted[numeric_columns] = df_pivoted[numeric_columns].round(1)
-
-            # Sort categories in the desired order
-            category_order = {'Elv': 0, 'Innsjø': 1, 'Kystvann': 2}
-            df_pivoted['sort_order'] = df_pivoted['Kategori'].map(category_order)
-            df_pivoted = df_pivoted.sort_values('sort_order').drop('sort_order', axis=1).reset_index(drop=True)
-
-            print(f"\nFinal pivoted DataFrame:")
-            print(df_pivoted.to_string())
-
-            # Call the function and get the "New Data" status
-            is_new_data = handle_output_data(
-                df_pivoted, 
-                file_name, 
-                github_folder, 
-                os.environ.get("TEMP_FOLDER"), 
-                keepcsv=True
-            )
-
-            if is_new_data:
-                print("New data detected and pushed to GitHub.")
-            else:
-                print("No new data detected.")
+        if is_new_data:
+            print("New data detected and pushed to GitHub.")
         else:
-            raise Exception("No data was successfully collected from any water body category")
-
-    except Exception as e:
-        error_message = f"An unexpected error occurred during data collection: {str(e)}"
-        print(error_message)
-        error_messages.append(error_message)
+            print("No new data detected.")
+    else:
+        raise Exception("No data was successfully collected from any water body category")
 
 except Exception as e:
-    error_message = f"An unexpected error occurred during setup: {str(e)}"
+    error_message = f"An unexpected error occurred during data collection: {str(e)}"
     print(error_message)
     error_messages.append(error_message)
 
 finally:
-    try:
-        driver.quit()
-    except:
-        print("Failed to quit driver, it may have already been closed")
-
     # Report errors if any occurred
     if error_messages:
-        print(f"Completed with {len(error_messages)} error(s).")
\ No newline at end of file
+        print(f"Completed with {len(error_messages)} error(s).")
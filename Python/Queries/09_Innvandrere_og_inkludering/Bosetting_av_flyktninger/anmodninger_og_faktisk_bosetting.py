@@ -23,41 +23,6 @@ error_messages = []
 # Finner URL vha. "Inspiser side" og fane "Network" (F12)
 url = "https://app-simapi-prod.azurewebsites.net/download_csv/k/bosatt_anmodede"
 
-## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
-
-try:
-    df = fetch_data(
-        url=url,
-        payload=None,  # The JSON payload for POST requests. If None, a GET request is used.
-        error_messages=error_messages,
-        query_name="Anmodninger og faktisk bosetting",
-        response_type="csv",  # The expected response type, either 'json' or 'csv'.
-        delimiter=";",  # The delimiter for CSV data (default: ';').
-        encoding="ISO-8859-1",  # The encoding for CSV data (default: 'ISO-8859-1').
-    )
-except Exception as e:
-    print(f"Error occurred: {e}")
-    raise RuntimeError(
-        "A critical error occurred during data fetching, stopping execution."
-    )
-
-# df.info()
-#df.head()
-
-# print(df["Kommunenummer"].unique())
-
-# Rename column "Anmodning, vedtak og faktisk bosetting" til "Kategori"
-df = df.rename(columns={"Anmodning, vedtak og faktisk bosetting": "Kategori"})
-
-# dtale.show(open_browser=True)
-
-# Konverter "Kommunenummer" til string med 4 siffer
-df["Kommunenummer"] = df["Kommunenummer"].astype(str).str.pad(width=4, fillchar="0")
-#df.info()
-
-# Konverter "Antall" til integer, og erstatt manglende verdier med NaN
-df["Antall"] = pd.to_numeric(df["Antall"], errors="coerce")
-
 # Dictionary for innfylling av manglende kommunenavn, samt filtrering av datasettet
 
 kommuner_telemark = {
@@ -115,6 +80,49 @@ kommuner_telemark = {
     "4036": "Vinje",
 }
 
+## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
+
+try:
+    df = fetch_data(
+        url=url,
+        payload=None,  # The JSON payload for POST requests. If None, a GET request is used.
+        error_messages=error_messages,
+        query_name="Anmodninger og faktisk bosetting",
+        response_type="csv",  # The expected response type, either 'json' or 'csv'.
+        delimiter=";",  # The delimiter for CSV data (default: ';').
+        encoding="ISO-8859-1",  # The encoding for CSV data (default: 'ISO-8859-1').
+        # Only Telemark kommuner (old and new kommunenummer) and "Personer" are read from the national file
+        usecols=["Kommunenummer", "Kommune", "År", "Enhet", "Anmodning, vedtak og faktisk bosetting", "Antall"],
+        dtype={"Kommunenummer": str},
+        row_filter=lambda chunk: (
+            chunk["Kommunenummer"].str.pad(width=4, fillchar="0").isin(kommuner_telemark.keys())
+            & (chunk["Enhet"] == "Personer")
+        ),
+        run_cache=True,  # Shared with other scripts in the same run
+    )
+except Exception as e:
+    print(f"Error occurred: {e}")
+    raise RuntimeError(
+        "A critical error occurred during data fetching, stopping execution."
+    )
+
+# df.info()
+#df.head()
+
+# print(df["Kommunenummer"].unique())
+
+# Rename column "Anmodning, vedtak og faktisk bosetting" til "Kategori"
+df = df.rename(columns={"Anmodning, vedtak og faktisk bosetting": "Kategori"})
+
+# dtale.show(open_browser=True)
+
+# Konverter "Kommunenummer" til string med 4 siffer
+df["Kommunenummer"] = df["Kommunenummer"].astype(str).str.pad(width=4, fillchar="0")
+#df.info()
+
+# Konverter "Antall" til integer, og erstatt manglende verdier med NaN
+df["Antall"] = pd.to_numeric(df["Antall"], errors="coerce")
+
 ## Innfylling av manglende kommunenavn
 
 # Map the dictionary to the DataFrame using the 'Kommunenummer' column
@@ -39,6 +39,10 @@ try:
         response_type="csv",  # The expected response type, either 'json' or 'csv'.
         delimiter=";",  # The delimiter for CSV data (default: ';').
         encoding="ISO-8859-1",  # The encoding for CSV data (default: 'ISO-8859-1').
+        # Only Telemark (fylkesnummer 8 and 40) and "Personer" are read from the national file
+        usecols=["Fylkesnummer", "Fylke", "År", "Enhet", "Anmodning, vedtak og faktisk bosetting", "Antall"],
+        row_filter={"Fylkesnummer": [8, 40], "Enhet": ["Personer"]},
+        run_cache=True,  # Shared with other scripts in the same run
     )
 except Exception as e:
     print(f"Error occurred: {e}")
@@ -51,9 +55,7 @@ df_fylker.head()
 
 # print(df_fylker["Fylkesnummer"].unique())
 
-# Filter columns where fylkesnummer is 8 (Telemark)
-df_fylker = df_fylker[df_fylker["Fylkesnummer"].isin([8, 40])]
-df_fylker = df_fylker[df_fylker["Enhet"] == "Personer"]
+# Rows for Telemark (fylkesnummer 8 and 40) and enhet "Personer" are already selected while reading
 df_fylker = df_fylker[
     df_fylker["Anmodning, vedtak og faktisk bosetting"].isin(
         ["Anmodning om bosetting", "Faktisk bosetting"]
@@ -88,6 +90,28 @@ url_kommuner = (
     "https://app-simapi-prod.azurewebsites.net/download_csv/k/enslige_mindrearige"
 )
 
+# Dictionary for innfylling av manglende kommunenavn, samt filtrering av datasettet
+
+kommuner_telemark = {
+    "3806": "Porsgrunn",
+    "3807": "Skien",
+    "3808": "Notodden",
+    "3812": "Siljan",
+    "3813": "Bamble",
+    "3814": "Kragerø",
+    "3815": "Drangedal",
+    "3816": "Nome",
+    "3817": "Midt-Telemark",
+    "3818": "Tinn",
+    "3819": "Hjartdal",
+    "3820": "Seljord",
+    "3821": "Kviteseid",
+    "3822": "Nissedal",
+    "3823": "Fyresdal",
+    "3824": "Tokke",
+    "3825": "Vinje",
+}
+
 ## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
 
 try:
@@ -99,6 +123,15 @@ try:
         response_type="csv",  # The expected response type, either 'json' or 'csv'.
         delimiter=";",  # The delimiter for CSV data (default: ';').
         encoding="ISO-8859-1",  # The encoding for CSV data (default: 'ISO-8859-1').
+        # Only Telemark kommuner 2020-2023 and "Personer" are read from the national file
+        usecols=["Kommunenummer", "År", "Enhet", "Anmodning, vedtak og faktisk bosetting", "Antall"],
+        dtype={"Kommunenummer": str},
+        row_filter=lambda chunk: (
+            chunk["Kommunenummer"].str.pad(width=4, side="left", fillchar="0").isin(kommuner_telemark.keys())
+            & chunk["År"].isin([2020, 2021, 2022, 2023])
+            & (chunk["Enhet"] == "Personer")
+        ),
+        run_cache=True,  # Shared with other scripts in the same run
     )
 except Exception as e:
     print(f"Error occurred: {e}")
@@ -109,36 +142,11 @@ except Exception as e:
 # df_kommuner.info()
 df_kommuner.head()
 
-# Filter columns where "År" is either 2020, 2021, 2022 or 2023
-df_kommuner = df_kommuner[df_kommuner["År"].isin([2020, 2021, 2022, 2023])]
-
 # Convert the column "Kommunenummer" to a string with 4 digits
 df_kommuner["Kommunenummer"] = (
     df_kommuner["Kommunenummer"].astype(str).str.pad(width=4, side="left", fillchar="0")
 )
 
-# Dictionary for innfylling av manglende kommunenavn, samt filtrering av datasettet
-
-kommuner_telemark = {
-    "3806": "Porsgrunn",
-    "3807": "Skien",
-    "3808": "Notodden",
-    "3812": "Siljan",
-    "3813": "Bamble",
-    "3814": "Kragerø",
-    "3815": "Drangedal",
-    "3816": "Nome",
-    "3817": "Midt-Telemark",
-    "3818": "Tinn",
-    "3819": "Hjartdal",
-    "3820": "Seljord",
-    "3821": "Kviteseid",
-    "3822": "Nissedal",
-    "3823": "Fyresdal",
-    "3824": "Tokke",
-    "3825": "Vinje",
-}
-
 ## Innfylling av manglende kommunenavn
 
 # Map the dictionary to the DataFrame using the 'Kommunenummer' column
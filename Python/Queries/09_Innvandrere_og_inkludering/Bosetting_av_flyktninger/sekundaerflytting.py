@@ -22,6 +22,45 @@ url = (
     "https://app-simapi-prod.azurewebsites.net/download_csv/k/flyktning_botid_flytting"
 )
 
+# Dictionary for innfylling av manglende kommunenavn, samt filtrering av datasettet
+
+kommuner_telemark = {
+    "3806": "Porsgrunn",
+    "3807": "Skien",
+    "3808": "Notodden",
+    "3812": "Siljan",
+    "3813": "Bamble",
+    "3814": "Kragerø",
+    "3815": "Drangedal",
+    "3816": "Nome",
+    "3817": "Midt-Telemark",
+    "3818": "Tinn",
+    "3819": "Hjartdal",
+    "3820": "Seljord",
+    "3821": "Kviteseid",
+    "3822": "Nissedal",
+    "3823": "Fyresdal",
+    "3824": "Tokke",
+    "3825": "Vinje",
+    "4001": "Porsgrunn",
+    "4003": "Skien",
+    "4005": "Notodden",
+    "4010": "Siljan",
+    "4012": "Bamble",
+    "4014": "Kragerø",
+    "4016": "Drangedal",
+    "4018": "Nome",
+    "4020": "Midt-Telemark",
+    "4022": "Seljord",
+    "4024": "Hjartdal",
+    "4026": "Tinn",
+    "4028": "Kviteseid",
+    "4030": "Nissedal",
+    "4032": "Fyresdal",
+    "4034": "Tokke",
+    "4036": "Vinje",
+}
+
 ## Kjøre spørringer i try-except for å fange opp feil. Quitter hvis feil.
 
 try:
@@ -33,6 +72,15 @@ try:
         response_type="csv",  # The expected response type, either 'json' or 'csv'.
         delimiter=";",  # The delimiter for CSV data (default: ';').
         encoding="ISO-8859-1",  # The encoding for CSV data (default: 'ISO-8859-1').
+        # Only the rows for Telemark kommuner that are used below are read from the national file
+        dtype={"Kommunenummer": str},
+        row_filter=lambda chunk: (
+            chunk["Kommunenummer"].str.pad(width=4, side="left", fillchar="0").isin(kommuner_telemark.keys())
+            & (chunk["Enhet"] == "Personer")
+            & chunk["Sekundærflytting"].isin(["Bosatt her", "Flyttet hit", "Uoppgitt"])
+            & (chunk["Botid i Norge"] == "Alle")
+        ),
+        run_cache=True,  # Shared with other scripts in the same run
     )
 except Exception as e:
     print(f"Error occurred: {e}")
@@ -46,7 +94,7 @@ df.head()
 # Format "År" as datetime
 df["År"] = pd.to_datetime(df["År"], format="%Y")
 
-# Filter the most recent year
+# Filter the most recent year (of the Telemark rows selected while reading)
 df = df[df["År"] == df["År"].max()]
 print(f"Most recent year in table is {df['År'].max()}")
 
@@ -67,45 +115,6 @@ df = df[df["Botid i Norge"] == "Alle"]
 # Remove colums "Enhet"
 df = df.drop(columns=["Enhet"])
 
-# Dictionary for innfylling av manglende kommunenavn, samt filtrering av datasettet
-
-kommuner_telemark = {
-    "3806": "Porsgrunn",
-    "3807": "Skien",
-    "3808": "Notodden",
-    "3812": "Siljan",
-    "3813": "Bamble",
-    "3814": "Kragerø",
-    "3815": "Drangedal",
-    "3816": "Nome",
-    "3817": "Midt-Telemark",
-    "3818": "Tinn",
-    "3819": "Hjartdal",
-    "3820": "Seljord",
-    "3821": "Kviteseid",
-    "3822": "Nissedal",
-    "3823": "Fyresdal",
-    "3824": "Tokke",
-    "3825": "Vinje",
-    "4001": "Porsgrunn",
-    "4003": "Skien",
-    "4005": "Notodden",
-    "4010": "Siljan",
-    "4012": "Bamble",
-    "4014": "Kragerø",
-    "4016": "Drangedal",
-    "4018": "Nome",
-    "4020": "Midt-Telemark",
-    "4022": "Seljord",
-    "4024": "Hjartdal",
-    "4026": "Tinn",
-    "4028": "Kviteseid",
-    "4030": "Nissedal",
-    "4032": "Fyresdal",
-    "4034": "Tokke",
-    "4036": "Vinje",
-}
-
 ## Filtrering av rader hvor "Kommunenummer" er i kommuner_telemark.keys()
 df_kommuner = df[df["Kommunenummer"].isin(kommuner_telemark.keys())]
 
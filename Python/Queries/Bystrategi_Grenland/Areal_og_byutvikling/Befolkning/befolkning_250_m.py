@@ -27,6 +27,7 @@ import geopandas as gpd
 import pandas as pd
 
 from Helper_scripts.github_functions import download_github_file, handle_output_data, GITHUB_TOKEN
+from Helper_scripts.grid_functions import read_grid_definitions, in_grid
 
 ##################### Configuration #####################
 
@@ -366,16 +367,15 @@ if needs_update:
             "Accept": "application/vnd.github.v3.raw",
         })
         filter_response.raise_for_status()
-        grenland_df = pd.read_csv(BytesIO(filter_response.content), sep=';', dtype={'ssbid': str})
-        grenland_ids = set(grenland_df['ssbid'].astype(str).str.strip())
-        print(f"  Grenland grid cells: {len(grenland_ids)}")
+        grid_index = read_grid_definitions(BytesIO(filter_response.content))
+        print(f"  Grenland grid cells: {len(grid_index)}")
 
         # Filter combined Geonorge data
         combined_path = OUTPUT_FOLDER / "befolkning_250m_2016_and_later.csv"
         combined_df = pd.read_csv(combined_path, sep=';', dtype={'ssbid250m': str})
         combined_df['ssbid250m'] = combined_df['ssbid250m'].astype(str).str.strip()
 
-        grenland_bef = combined_df[combined_df['ssbid250m'].isin(grenland_ids)].copy()
+        grenland_bef = combined_df[in_grid(combined_df['ssbid250m'], grid_index)].copy()
         print(f"  Rows matching Grenland: {len(grenland_bef)}")
 
         grenland_bef['År'] = grenland_bef['statistikkar'].astype(str) + '-01-01'
@@ -406,7 +406,7 @@ if needs_update:
 
             df = df.rename(columns={'SSBID0250M': 'ssbid_250', 'pop_tot': 'Populasjon'})
             df['ssbid_250'] = df['ssbid_250'].astype(str).str.strip()
-            df = df[df['ssbid_250'].isin(grenland_ids)]
+            df = df[in_grid(df['ssbid_250'], grid_index)]
             df['År'] = f"{year}-01-01"
             df = df[['ssbid_250', 'År', 'Populasjon']]
             manual_dfs.append(df)
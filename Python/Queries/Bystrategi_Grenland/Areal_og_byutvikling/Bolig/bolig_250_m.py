@@ -23,6 +23,7 @@ from io import BytesIO, StringIO
 import pandas as pd
 
 from Helper_scripts.github_functions import download_github_file, handle_output_data, GITHUB_TOKEN
+from Helper_scripts.grid_functions import read_grid_definitions, in_grid
 
 ##################### Configuration #####################
 
@@ -236,9 +237,8 @@ elif True:  # Main workflow block
             "Accept": "application/vnd.github.v3.raw",
         })
         filter_response.raise_for_status()
-        grenland_df = pd.read_csv(BytesIO(filter_response.content), sep=';', dtype={'ssbid': str})
-        grenland_ids = set(grenland_df['ssbid'].astype(str).str.strip())
-        print(f"  Grenland grid cells: {len(grenland_ids)}")
+        grid_index = read_grid_definitions(BytesIO(filter_response.content))
+        print(f"  Grenland grid cells: {len(grid_index)}")
 
         ##################### Download data from export API #####################
 
@@ -295,13 +295,13 @@ elif True:  # Main workflow block
             new_combined_df['SSBID0250M'] = new_combined_df['SSBID0250M'].astype(str).str.strip()
 
             # Filter to Grenland cells
-            new_grenland = new_combined_df[new_combined_df['SSBID0250M'].isin(grenland_ids)].copy()
+            new_grenland = new_combined_df[in_grid(new_combined_df['SSBID0250M'], grid_index)].copy()
             print(f"After Grenland filter: {len(new_grenland)} rows")
 
             if new_grenland.empty:
                 print("\nWARNING: No matching Grenland cells found in new data!")
                 print(f"  Sample downloaded SSBID values: {new_combined_df['SSBID0250M'].head(5).tolist()}")
-                print(f"  Sample filter ssbid values: {list(grenland_ids)[:5]}")
+                print(f"  Sample filter ssbid values: {grid_index.index[:5].tolist()}")
 
             else:
                 ##################### Format and merge with existing data #####################
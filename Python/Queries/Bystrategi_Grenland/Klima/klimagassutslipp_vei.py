@@ -11,6 +11,7 @@ from pyjstat import pyjstat
 from Helper_scripts.utility_functions import fetch_data
 
 from Helper_scripts.github_functions import handle_output_data
+from Helper_scripts.miljodirektoratet_functions import get_kommune_emissions
 
 # Capture the name of the current script
 script_name = os.path.basename(__file__)
@@ -20,61 +21,26 @@ error_messages = []
 
 ## Dette scriptet gir data for donut-figur (csv x2) og stolpediagram (csv x1)
 
-## Mdir gir ingen direkte url til .xlsx-fil, så jeg bruker requests for å simulere nedlasting av filen
-
-url = "https://www.miljodirektoratet.no/globalassets/netttjenester/klimagassutslipp-kommuner/utslippsstatistikk_alle_kommuner.xlsx"
+## Regnearket fra Mdir lastes ned og leses inn i miljodirektoratet_functions (felles for utslippsskriptene)
 
 try:
-    # Make a GET request to the URL to simulate downloading the file
-    response = requests.get(url)
-
-    # Check if the request was successful (status code 200)
-    if response.status_code == 200:
-        # Use BytesIO to create a file-like object from the content (BytesIO lar deg jobbe med binære filer.)
-        excel_file = BytesIO(response.content)
-
-        # Use pandas ExcelFile to work with multiple sheets
-        xls = pd.ExcelFile(excel_file)
-
-        # Get the sheet names
-        sheet_names = xls.sheet_names
-
-        # Create a dictionary to store DataFrames for each sheet
-        sheet_data = {}
-
-        # Iterate through each sheet and read the data into a DataFrame
-        for sheet_name in sheet_names:
-            try:
-                sheet_data[sheet_name] = xls.parse(sheet_name)
-            except Exception as e:
-                error_message = f"Failed to parse sheet '{sheet_name}': {str(e)}"
-                print(error_message)
-                error_messages.append(error_message)
-
-        # Check if the specific sheet exists in the Excel file
-        if "Veitrafikk" in sheet_data:
-            # Hente ut aktuelt ark
-            df = sheet_data["Veitrafikk"]
-
-            # Basic overview of dataset
-            # df.head()
-            # df.info()
-        else:
-            error_message = "Sheet 'Veitrafikk' not found in the Excel file."
-            print(error_message)
-            error_messages.append(error_message)
-    else:
-        error_message = (
-            f"Failed to download the file. Status code: {response.status_code}"
-        )
-        print(error_message)
-        error_messages.append(error_message)
+    # Hente ut aktuelt ark, filtrert på Telemark fylke
+    df_telemark = get_kommune_emissions("Veitrafikk", fylke="Telemark")
+
+    # Basic overview of dataset
+    # df_telemark.head()
+    # df_telemark.info()
 
 except requests.exceptions.RequestException as e:
     error_message = f"Error occurred while downloading the file: {str(e)}"
     print(error_message)
     error_messages.append(error_message)
 
+except KeyError as e:
+    error_message = str(e.args[0])
+    print(error_message)
+    error_messages.append(error_message)
+
 except Exception as e:
     error_message = f"An unexpected error occurred: {str(e)}"
     print(error_message)
@@ -88,9 +54,6 @@ else:
 
 ########################### HOVED-DATASETT (2009 - d.d.)
 
-# Filter Telemark fylke
-df_telemark = df[df["Fylke"] == "Telemark"]
-
 # Rename column name "Utslipp (tonn CO₂-ekvivalenter)" to "Utslipp"
 df_telemark = df_telemark.rename(columns={"Utslipp (tonn CO2-ekvivalenter)": "Utslipp"})
 
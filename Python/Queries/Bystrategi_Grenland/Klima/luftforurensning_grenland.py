@@ -9,7 +9,12 @@ import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'Helper_scripts'))
 
 from Helper_scripts.github_functions import GITHUB_TOKEN  # noqa: E402
+from Helper_scripts.cache_functions import get_cache_folder, read_cached_frame, write_cached_frame  # noqa: E402
 
+# Parsed workbooks are cached per GitHub blob SHA, so only new or changed years are downloaded and parsed.
+# Bump INGESTION_VERSION when the per-workbook parsing below changes, to invalidate old cache files.
+INGESTION_VERSION = 1
+CACHE_FOLDER = get_cache_folder("luftforurensning_grenland")
 
 
 def _headers():
@@ -24,7 +29,7 @@ def list_excel_files_from_github(folder_path: str) -> list:
     """
     List Excel files in the GitHub folder matching pattern:
     "PM10 og NO2 døgn [YYYY] ... .xlsx"
-    Returns a list of dicts with name and download_url.
+    Returns a list of dicts with name, sha (git blob SHA) and download_url.
     """
     url = f"https://api.github.com/repos/evensrii/Telemark/contents/{folder_path}?ref=main"
     resp = requests.get(url, headers=_headers())
@@ -40,6 +45,7 @@ def list_excel_files_from_github(folder_path: str) -> list:
         if lower.startswith('pm10 og no2 døgn') and lower.endswith('.xlsx'):
             files.append({
                 'name': name,
+                'sha': it.get('sha'),
                 'download_url': it.get('download_url')
             })
     # Sort by year extracted from name if possible
@@ -231,6 +237,41 @@ def convert_comma_decimals_to_float(df: pd.DataFrame, exclude_columns=None) -> p
     return df_converted
 
 
+def parse_workbook(content: bytes) -> pd.DataFrame:
+    """
+    Parse one "PM10 og NO2 døgn" workbook and convert the measurement columns to float.
+    """
+    df = pd.read_excel(BytesIO(content))
+
+    # Prepare numeric conversions
+    preserve_cols = ['Fra-tid', 'Til-tid']
+    preserve_cols.extend([c for c in df.columns if 'Datadekning (%)' in c])
+    return convert_comma_decimals_to_float(df, exclude_columns=preserve_cols)
+
+
+def load_workbook(f: dict) -> pd.DataFrame:
+    """
+    Return the parsed workbook for a file from list_excel_files_from_github.
+    Uses the local cache (keyed by blob SHA) and only downloads/parses on a cache miss.
+    """
+    key = f"{f['sha']}_v{INGESTION_VERSION}" if f.get('sha') else None
+    if key:
+        df = read_cached_frame(CACHE_FOLDER, key)
+        if df is not None:
+            print(f"Cached: {f['name']} ({len(df)} rows, {len(df.columns)} cols)")
+            return df
+
+    print(f"\nDownloading: {f['name']}")
+    r = requests.get(f['download_url'], headers=_headers())
+    r.raise_for_status()
+    df = parse_workbook(r.content)
+    print(f"  Loaded {len(df)} rows, {len(df.columns)} cols")
+
+    if key:
+        write_cached_frame(CACHE_FOLDER, key, df)
+    return df
+
+
 def load_and_combine_luftforurensing_from_github_excel() -> pd.DataFrame:
     print("=== Listing Excel files from GitHub ===")
     files = list_excel_files_from_github("Data/Bystrategi_Grenland/Klima/Luftforurensing")
@@ -245,18 +286,7 @@ def load_and_combine_luftforurensing_from_github_excel() -> pd.DataFrame:
     combined = []
     for f in files:
         try:
-            print(f"\nDownloading: {f['name']}")
-            r = requests.get(f['download_url'], headers=_headers())
-            r.raise_for_status()
-            bio = BytesIO(r.content)
-            df = pd.read_excel(bio)
-            print(f"  Loaded {len(df)} rows, {len(df.columns)} cols")
-
-            # Prepare numeric conversions
-            preserve_cols = ['Fra-tid', 'Til-tid']
-            preserve_cols.extend([c for c in df.columns if 'Datadekning (%)' in c])
-            df = convert_comma_decimals_to_float(df, exclude_columns=preserve_cols)
-            combined.append(df)
+            combined.append(load_workbook(f))
         except Exception as e:
             print(f"  Error processing {f['name']}: {e}")
             continue
@@ -265,28 +295,13 @@ def load_and_combine_luftforurensing_from_github_excel() -> pd.DataFrame:
         print("No data could be loaded from Excel files.")
         return pd.DataFrame()
 
-    print(f"\nCombining {len(combined)} DataFrames...")
-    
-    # Standardize columns before concatenation to ensure consistent structure
-    all_columns = set()
-    for df in combined:
-        all_columns.update(df.columns)
-    all_columns = sorted(list(all_columns))
-    
-    # Ensure all DataFrames have the same columns in the same order
-    standardized = []
-    for i, df in enumerate(combined):
-        df_std = df.copy()
-        # Add missing columns with NaN
-        for col in all_columns:
-            if col not in df_std.columns:
-                df_std[col] = pd.NA
-        # Reorder columns consistently
-        df_std = df_std[all_columns]
-        standardized.append(df_std)
-        print(f"  Standardized DataFrame {i+1}: {df_std.shape}")
-    
-    df_all = pd.concat(standardized, ignore_index=True)
+    # Single schema-aligned concat: the union of all columns in sorted order, missing columns as NaN
+    all_columns = sorted(set().union(*(df.columns for df in combined)))
+    print(f"\nCombining {len(combined)} DataFrames into {len(all_columns)} columns...")
+    df_all = pd.concat(
+        [df.reindex(columns=all_columns) for df in combined],
+        ignore_index=True,
+    )
 
     # Sort by Fra-tid assuming format 'DD.MM.YYYY HH:MM'
     if 'Fra-tid' in df_all.columns:
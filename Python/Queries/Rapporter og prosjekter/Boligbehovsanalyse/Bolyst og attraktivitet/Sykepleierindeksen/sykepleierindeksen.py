@@ -4,8 +4,10 @@ import requests
 import pandas as pd
 import pdfplumber
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 
 from Helper_scripts.github_functions import handle_output_data, GITHUB_TOKEN
+from Helper_scripts.cache_functions import get_cache_folder, read_cache, write_cache
 
 # Script metadata
 script_name = os.path.basename(__file__)
@@ -43,23 +45,13 @@ def download_github_pdf(file_path):
         print(f"Failed to download file: {file_path}, Status Code: {response.status_code}")
         return None
 
-# List and download PDFs from GitHub
-folder_contents = list_github_folder(github_pdf_folder)
-pdf_entries = sorted(
-    [f for f in folder_contents if f["name"].endswith("_sykepleierindeksen.pdf")],
-    key=lambda f: f["name"],
-)
-
-# Download each PDF into memory as (filename, bytes) tuples
-pdf_files = []
-for entry in pdf_entries:
-    pdf_bytes = download_github_pdf(entry["path"])
-    if pdf_bytes:
-        pdf_files.append({"name": entry["name"], "bytes": pdf_bytes})
-
-print(f"Found {len(pdf_files)} PDFs on GitHub:")
-for f in pdf_files:
-    print(f"  {f['name']}")
+def list_pdf_entries():
+    """List the *_sykepleierindeksen.pdf files on GitHub (name, path and blob SHA), sorted by name."""
+    folder_contents = list_github_folder(github_pdf_folder)
+    return sorted(
+        [f for f in folder_contents if f["name"].endswith("_sykepleierindeksen.pdf")],
+        key=lambda f: f["name"],
+    )
 
 # %% Helper functions
 
@@ -70,17 +62,29 @@ def get_period(filename):
     return match.group(1) if match else stem
 
 
-def find_page(pdf, pattern, start_page=0, end_page=None):
+def build_page_index(pdf):
+    """
+    Extract the text of every page once. All page lookups (find_page, find_pages,
+    find_telemark_page) search this index instead of re-extracting page text.
+    """
+    return [page.extract_text() or "" for page in pdf.pages]
+
+
+def find_page(page_texts, pattern, start_page=0, end_page=None):
     """Find first page index containing text matching regex pattern."""
     if end_page is None:
-        end_page = len(pdf.pages)
-    for i in range(start_page, min(end_page, len(pdf.pages))):
-        text = pdf.pages[i].extract_text() or ""
-        if re.search(pattern, text, re.IGNORECASE):
+        end_page = len(page_texts)
+    for i in range(start_page, min(end_page, len(page_texts))):
+        if re.search(pattern, page_texts[i], re.IGNORECASE):
             return i
     return None
 
 
+def find_pages(page_texts, pattern):
+    """Find all page indices containing text matching regex pattern."""
+    return [i for i, text in enumerate(page_texts) if re.search(pattern, text, re.IGNORECASE)]
+
+
 def group_words_by_line(words, y_tol=5):
     """Group extracted words into lines by y-coordinate proximity."""
     if not words:
@@ -131,11 +135,10 @@ def match_known_area(raw_name):
 
 def dump_pages(pdf_index=0):
     """Print first line of each page for a PDF to help identify page contents."""
-    pdf_entry = pdf_files[pdf_index]
+    pdf_entry = list_pdf_entries()[pdf_index]
     print(f"Inspecting: {pdf_entry['name']}")
-    with pdfplumber.open(BytesIO(pdf_entry['bytes'])) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
+    with pdfplumber.open(BytesIO(download_github_pdf(pdf_entry['path']))) as pdf:
+        for i, text in enumerate(build_page_index(pdf)):
             first_lines = '\n    '.join(text.split('\n')[:3])
             print(f"  Page {i}: {first_lines[:120]}")
 
@@ -144,12 +147,12 @@ def dump_pages(pdf_index=0):
 
 # %% 1. Extract "Sykepleierindeksen - utvalgte områder" (horizontal bar chart)
 
-def extract_alle_omrader(pdf, period):
+def extract_alle_omrader(pdf, page_texts, period):
     """
     Finds the page with title 'Sykepleierindeksen YYYY - utvalgte områder'.
     Extracts area names and percentage values from the horizontal bar chart.
     """
-    page_idx = find_page(pdf, r'Sykepleierindeksen\s+\d{4}.*utvalgte\s+områder')
+    page_idx = find_page(page_texts, r'Sykepleierindeksen\s+\d{4}.*utvalgte\s+områder')
     if page_idx is None:
         print(f"  [alle_omrader] Page not found")
         return []
@@ -177,13 +180,13 @@ def extract_alle_omrader(pdf, period):
 
 # %% 2. Extract "Telemark" bar chart (vertical bar chart, last pages)
 
-def find_telemark_page(pdf):
+def find_telemark_page(page_texts):
     """Find the Telemark bar chart page by looking for known municipality names."""
-    n_pages = len(pdf.pages)
+    n_pages = len(page_texts)
     best_page = None
     best_count = 0
     for i in range(max(0, n_pages - 15), n_pages):
-        text = pdf.pages[i].extract_text() or ""
+        text = page_texts[i]
         count = sum(1 for m in TELEMARK_MUNIS if m in text)
         if count > best_count:
             best_count = count
@@ -191,12 +194,12 @@ def find_telemark_page(pdf):
     return best_page if best_count >= 3 else None
 
 
-def extract_telemark(pdf, period):
+def extract_telemark(pdf, page_texts, period):
     """
     Finds the Telemark bar chart page (which may also contain Troms/Trøndelag charts).
     Limits extraction to ONLY the Telemark section by detecting chart title boundaries.
     """
-    page_idx = find_telemark_page(pdf)
+    page_idx = find_telemark_page(page_texts)
     if page_idx is None:
         print(f"  [telemark] Page not found (no page with >= 3 Telemark municipalities)")
         return []
@@ -333,13 +336,13 @@ def extract_telemark(pdf, period):
 
 # %% 3. Extract "Nødvendig inntekt" (vertical bar chart)
 
-def extract_nodvendig_inntekt(pdf, period):
+def extract_nodvendig_inntekt(pdf, page_texts, period):
     """
     Finds page with 'Nødvendig inntekt for å kjøpe bolig'.
     Extracts area names (rotated text) and income values (above bars).
     Handles: split numbers (e.g. "390" + "000"), Y-axis filtering, rotated labels.
     """
-    page_idx = find_page(pdf, r'Nødvendig inntekt')
+    page_idx = find_page(page_texts, r'Nødvendig inntekt')
     if page_idx is None:
         print(f"  [nødvendig_inntekt] Page not found")
         return []
@@ -488,18 +491,14 @@ def extract_nodvendig_inntekt(pdf, period):
 
 # %% 4. Extract "Sykepleierindeksen historisk" (table)
 
-def extract_historisk(pdf, period):
+def extract_historisk(pdf, page_texts, period):
     """
     Finds pages with 'Sykepleierindeksen historisk'.
     The table may span 2 pages (first part + 'forts.' continuation).
     Uses text-based parsing with strict year header detection.
     """
     # Find relevant pages
-    page_indices = []
-    for i in range(len(pdf.pages)):
-        text = pdf.pages[i].extract_text() or ""
-        if re.search(r'Sykepleierindeksen\s+historisk', text, re.IGNORECASE):
-            page_indices.append(i)
+    page_indices = find_pages(page_texts, r'Sykepleierindeksen\s+historisk')
 
     if not page_indices:
         print(f"  [historisk] Pages not found")
@@ -511,8 +510,7 @@ def extract_historisk(pdf, period):
     all_data = {}   # {area_name: {year: value}}
 
     for page_idx in page_indices:
-        page = pdf.pages[page_idx]
-        text = page.extract_text() or ""
+        text = page_texts[page_idx]
         lines = text.split('\n')
 
         page_years = []  # Years specific to this page's header
@@ -572,7 +570,7 @@ def extract_historisk(pdf, period):
     if not all_years or not all_data:
         print(f"  [historisk] Could not parse (years={len(all_years)}, areas={len(all_data)})")
         for pi in page_indices:
-            text = pdf.pages[pi].extract_text() or ""
+            text = page_texts[pi]
             print(f"  Page {pi} first 500 chars:")
             print(f"    {text[:500]}")
         return None
@@ -605,134 +603,201 @@ def extract_historisk(pdf, period):
     return df_hist
 
 
+# %% Extract all tables from one PDF (runs in a worker process)
+
+# Bump when the extraction logic changes, so cached results from older versions are re-parsed
+EXTRACTION_VERSION = 1
+
+# Parsed results are cached per PDF, keyed by the GitHub blob SHA (a hash of the file content)
+CACHE_FOLDER = get_cache_folder("sykepleierindeksen")
+
+
+def process_pdf(name, pdf_bytes):
+    """
+    Open one PDF, build its page-text index once and run all extractions on it.
+    Must be a top-level function so it can be sent to a ProcessPoolExecutor.
+    """
+    period = get_period(name)
+    print(f"\nProcessing: {name} (period: {period})")
+
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        page_texts = build_page_index(pdf)
+        return {
+            "alle_omrader": extract_alle_omrader(pdf, page_texts, period),     # 1. Alle områder
+            "telemark": extract_telemark(pdf, page_texts, period),             # 2. Telemark
+            "nodvendig_inntekt": extract_nodvendig_inntekt(pdf, page_texts, period),  # 3. Nødvendig inntekt
+            "historisk": extract_historisk(pdf, page_texts, period),           # 4. Historisk
+        }
+
+
+def load_pdf_results(pdf_entries):
+    """
+    Return extraction results for every PDF, in the same order as pdf_entries.
+
+    PDFs already parsed (same blob SHA and EXTRACTION_VERSION) are read from the cache and never
+    downloaded or opened. The remaining PDFs are downloaded and parsed in parallel, one per process.
+    """
+    results = {}
+    to_parse = []
+    for entry in pdf_entries:
+        cache_key = f"{entry['sha']}_v{EXTRACTION_VERSION}"
+        cached = read_cache(CACHE_FOLDER, cache_key)
+        if cached is not None:
+            print(f"  {entry['name']}: loaded from cache")
+            results[entry['name']] = cached
+        else:
+            to_parse.append((entry, cache_key))
+
+    pdf_files = []
+    for entry, cache_key in to_parse:
+        pdf_bytes = download_github_pdf(entry["path"])
+        if pdf_bytes:
+            pdf_files.append((entry["name"], pdf_bytes, cache_key))
+
+    if pdf_files:
+        print(f"\nParsing {len(pdf_files)} new or changed PDFs")
+        max_workers = min(len(pdf_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = executor.map(
+                process_pdf,
+                [name for name, _, _ in pdf_files],
+                [pdf_bytes for _, pdf_bytes, _ in pdf_files],
+            )
+            for (name, _, cache_key), result in zip(pdf_files, parsed):
+                write_cache(CACHE_FOLDER, cache_key, result)
+                results[name] = result
+
+    return [(entry["name"], results[entry["name"]]) for entry in pdf_entries if entry["name"] in results]
+
+
 # %% Process all PDFs
 
-all_alle_omrader = []
-all_telemark = []
-all_nodvendig_inntekt = []
-
-for pdf_entry in pdf_files:
-    period = get_period(pdf_entry['name'])
-    print(f"\nProcessing: {pdf_entry['name']} (period: {period})")
-
-    with pdfplumber.open(BytesIO(pdf_entry['bytes'])) as pdf:
-        # 1. Alle områder
-        rows = extract_alle_omrader(pdf, period)
-        all_alle_omrader.extend(rows)
-
-        # 2. Telemark
-        rows = extract_telemark(pdf, period)
-        all_telemark.extend(rows)
-
-        # 3. Nødvendig inntekt
-        rows = extract_nodvendig_inntekt(pdf, period)
-        all_nodvendig_inntekt.extend(rows)
-
-# 4. Historisk - only from the most recent (last) PDF
-latest_pdf = pdf_files[-1]
-latest_period = get_period(latest_pdf['name'])
-print(f"\nExtracting historisk from latest PDF: {latest_pdf['name']} (period: {latest_period})")
-
-with pdfplumber.open(BytesIO(latest_pdf['bytes'])) as pdf:
-    latest_historisk = extract_historisk(pdf, latest_period)
-
-# Transform historisk to long format, percentages 0-1, datetime year
-if latest_historisk is not None:
-    year_cols = [c for c in latest_historisk.columns if c != 'Område']
-    latest_historisk = latest_historisk.melt(id_vars='Område', value_vars=year_cols, var_name='År', value_name='Andel')
-    latest_historisk['Andel'] = latest_historisk['Andel'] / 100
-    latest_historisk['År'] = pd.to_datetime(latest_historisk['År'], format='%Y')
-    latest_historisk = latest_historisk.sort_values(['Område', 'År']).reset_index(drop=True)
-
-# %% Build DataFrames
-
-df_alle = pd.DataFrame(all_alle_omrader)
-df_telemark = pd.DataFrame(all_telemark)
-df_inntekt = pd.DataFrame(all_nodvendig_inntekt)
-
-print(f"\n--- Results ---")
-print(f"Alle områder: {len(df_alle)} rows across {df_alle['Periode'].nunique() if not df_alle.empty else 0} periods")
-print(f"Telemark: {len(df_telemark)} rows across {df_telemark['Periode'].nunique() if not df_telemark.empty else 0} periods")
-print(f"Nødvendig inntekt: {len(df_inntekt)} rows across {df_inntekt['Periode'].nunique() if not df_inntekt.empty else 0} periods")
-print(f"Historisk: {latest_historisk.shape if latest_historisk is not None else 'None'} (from {latest_period})")
-
-# %% Preview results
-
-if not df_alle.empty:
-    print("\n--- Alle områder (sample) ---")
-    print(df_alle.head(10).to_string(index=False))
-
-if not df_telemark.empty:
-    print("\n--- Telemark (sample) ---")
-    print(df_telemark.head(10).to_string(index=False))
-
-if not df_inntekt.empty:
-    print("\n--- Nødvendig inntekt (sample) ---")
-    print(df_inntekt.head(10).to_string(index=False))
-
-if latest_historisk is not None:
-    print("\n--- Historisk (sample) ---")
-    print(latest_historisk.head(5).to_string(index=False))
-
-# %% Compare and upload to GitHub
-
-github_folder = "Data/Boligbehovsanalyse_2026/Bolyst_og_attraktivitet/Sykepleierindeksen"
-temp_folder = os.environ.get("TEMP_FOLDER")
-
-# 1. Alle områder
-if not df_alle.empty:
-    is_new_data = handle_output_data(
-        df_alle, 
-        "sykepleierindeksen_alle_områder.csv", 
-        github_folder, 
-        temp_folder, 
-        keepcsv=True
-    )
-    if is_new_data:
-        print("New data detected: sykepleierindeksen_alle_områder.csv")
-    else:
-        print("No new data: sykepleierindeksen_alle_områder.csv")
-
-# 2. Telemark
-if not df_telemark.empty:
-    is_new_data = handle_output_data(
-        df_telemark, 
-        "sykepleierindeks_telemark.csv", 
-        github_folder, 
-        temp_folder, 
-        keepcsv=True
-    )
-    if is_new_data:
-        print("New data detected: sykepleierindeks_telemark.csv")
-    else:
-        print("No new data: sykepleierindeks_telemark.csv")
-
-# 3. Nødvendig inntekt
-if not df_inntekt.empty:
-    is_new_data = handle_output_data(
-        df_inntekt, 
-        "nødvendig_inntekt.csv", 
-        github_folder, 
-        temp_folder, 
-        keepcsv=True
-    )
-    if is_new_data:
-        print("New data detected: nødvendig_inntekt.csv")
-    else:
-        print("No new data: nødvendig_inntekt.csv")
-
-# 4. Historisk
-if latest_historisk is not None:
-    is_new_data = handle_output_data(
-        latest_historisk, 
-        "sykepleierindeksen_historisk_alle_områder.csv", 
-        github_folder, 
-        temp_folder, 
-        keepcsv=True
-    )
-    if is_new_data:
-        print("New data detected: sykepleierindeksen_historisk_alle_områder.csv")
-    else:
-        print("No new data: sykepleierindeksen_historisk_alle_områder.csv")
+def main():
+    # List PDFs on GitHub (the listing includes each file's blob SHA)
+    pdf_entries = list_pdf_entries()
+    print(f"Found {len(pdf_entries)} PDFs on GitHub:")
+    for entry in pdf_entries:
+        print(f"  {entry['name']}")
+
+    pdf_results = load_pdf_results(pdf_entries)
+
+    all_alle_omrader = []
+    all_telemark = []
+    all_nodvendig_inntekt = []
+
+    for name, result in pdf_results:
+        all_alle_omrader.extend(result["alle_omrader"])
+        all_telemark.extend(result["telemark"])
+        all_nodvendig_inntekt.extend(result["nodvendig_inntekt"])
+
+    # 4. Historisk - only from the most recent (last) PDF
+    latest_name, latest_result = pdf_results[-1]
+    latest_period = get_period(latest_name)
+    print(f"\nUsing historisk from latest PDF: {latest_name} (period: {latest_period})")
+    latest_historisk = latest_result["historisk"]
+
+    # Transform historisk to long format, percentages 0-1, datetime year
+    if latest_historisk is not None:
+        year_cols = [c for c in latest_historisk.columns if c != 'Område']
+        latest_historisk = latest_historisk.melt(id_vars='Område', value_vars=year_cols, var_name='År', value_name='Andel')
+        latest_historisk['Andel'] = latest_historisk['Andel'] / 100
+        latest_historisk['År'] = pd.to_datetime(latest_historisk['År'], format='%Y')
+        latest_historisk = latest_historisk.sort_values(['Område', 'År']).reset_index(drop=True)
+
+    # %% Build DataFrames
+
+    df_alle = pd.DataFrame(all_alle_omrader)
+    df_telemark = pd.DataFrame(all_telemark)
+    df_inntekt = pd.DataFrame(all_nodvendig_inntekt)
+
+    print(f"\n--- Results ---")
+    print(f"Alle områder: {len(df_alle)} rows across {df_alle['Periode'].nunique() if not df_alle.empty else 0} periods")
+    print(f"Telemark: {len(df_telemark)} rows across {df_telemark['Periode'].nunique() if not df_telemark.empty else 0} periods")
+    print(f"Nødvendig inntekt: {len(df_inntekt)} rows across {df_inntekt['Periode'].nunique() if not df_inntekt.empty else 0} periods")
+    print(f"Historisk: {latest_historisk.shape if latest_historisk is not None else 'None'} (from {latest_period})")
+
+    # %% Preview results
+
+    if not df_alle.empty:
+        print("\n--- Alle områder (sample) ---")
+        print(df_alle.head(10).to_string(index=False))
+
+    if not df_telemark.empty:
+        print("\n--- Telemark (sample) ---")
+        print(df_telemark.head(10).to_string(index=False))
+
+    if not df_inntekt.empty:
+        print("\n--- Nødvendig inntekt (sample) ---")
+        print(df_inntekt.head(10).to_string(index=False))
+
+    if latest_historisk is not None:
+        print("\n--- Historisk (sample) ---")
+        print(latest_historisk.head(5).to_string(index=False))
+
+    # %% Compare and upload to GitHub
+
+    github_folder = "Data/Boligbehovsanalyse_2026/Bolyst_og_attraktivitet/Sykepleierindeksen"
+    temp_folder = os.environ.get("TEMP_FOLDER")
+
+    # 1. Alle områder
+    if not df_alle.empty:
+        is_new_data = handle_output_data(
+            df_alle, 
+            "sykepleierindeksen_alle_områder.csv", 
+            github_folder, 
+            temp_folder, 
+            keepcsv=True
+        )
+        if is_new_data:
+            print("New data detected: sykepleierindeksen_alle_områder.csv")
+        else:
+            print("No new data: sykepleierindeksen_alle_områder.csv")
+
+    # 2. Telemark
+    if not df_telemark.empty:
+        is_new_data = handle_output_data(
+            df_telemark, 
+            "sykepleierindeks_telemark.csv", 
+            github_folder, 
+            temp_folder, 
+            keepcsv=True
+        )
+        if is_new_data:
+            print("New data detected: sykepleierindeks_telemark.csv")
+        else:
+            print("No new data: sykepleierindeks_telemark.csv")
+
+    # 3. Nødvendig inntekt
+    if not df_inntekt.empty:
+        is_new_data = handle_output_data(
+            df_inntekt, 
+            "nødvendig_inntekt.csv", 
+            github_folder, 
+            temp_folder, 
+            keepcsv=True
+        )
+        if is_new_data:
+            print("New data detected: nødvendig_inntekt.csv")
+        else:
+            print("No new data: nødvendig_inntekt.csv")
+
+    # 4. Historisk
+    if latest_historisk is not None:
+        is_new_data = handle_output_data(
+            latest_historisk, 
+            "sykepleierindeksen_historisk_alle_områder.csv", 
+            github_folder, 
+            temp_folder, 
+            keepcsv=True
+        )
+        if is_new_data:
+            print("New data detected: sykepleierindeksen_historisk_alle_områder.csv")
+        else:
+            print("No new data: sykepleierindeksen_historisk_alle_områder.csv")
+
+    print("\nDone!")
+
 
-print("\nDone!")
+# The guard is required: worker processes re-import this file and must not start a new run
+if __name__ == "__main__":
+    main()